@@ -0,0 +1,254 @@
+"""benchmark_sequences.py - Run the Efficiency Measurement pick and place sequences N times against the simulated robot
+(d1_servo_arm/sim_robot.py) and report timing distributions, optionally compared against a stored baseline.
+
+Scenarios (same poses, orientations and Go2 moves as the sequence scripts):
+  seq1_arm_only          - sequence_1_arm_only.py
+  seq1_arm_go2           - sequence_1_arm_and_go2.py (serial: StandDown after pose 1, StandUp after pose 3)
+  seq2_arm_only          - sequence_2_arm_only.py
+  seq2_arm_go2_serial    - Go2 moves 0.2 m first, then the arm sequence
+  seq2_arm_go2_parallel  - sequence_2_arm_and_go2_parallel.py (Go2 and arm in two threads)
+
+Metrics per run (seconds):
+  cycle        - wall time of the timed section, as measured by the scripts
+  ik           - solving all poses with a fresh IKSolver (done before the timer in the scripts)
+  command      - time spent building/encoding/writing arm commands and in SportClient calls (latency_trace spans)
+  convergence  - sum of move_and_wait waits until each pose is reached and settled
+  go2          - Go2 motion time (scenarios with Go2 moves)
+
+Usage (from the repository root):
+  python3 "Robot movements/Efficiency Measurement/benchmark_sequences.py" --runs 20 --save-baseline
+  python3 "Robot movements/Efficiency Measurement/benchmark_sequences.py" --runs 20 --sim cmd_latency_s=0.03
+Exit code 1 if a metric median regressed against the baseline by more than --rel-tol (+ --abs-tol).
+
+Created on 17.01.2026 by Christopher Kania for Forschungsseminar, TH Köln."""
+
+__author__      = "Christopher Kania"
+__license__   = "Creative Commons Attribution-NonCommercial 4.0 International (CC BY-NC 4.0)"
+__version__ = "1.0"
+__maintainer__ = "Christopher Kania"
+__email__ = "kania.christopher@web.de"
+
+import sys, pathlib
+import json
+import time
+import argparse
+import threading
+import numpy as np
+
+# load D1 arm python modules (top-level imports, same module instances as inside the library)
+D1_DIR = pathlib.Path(__file__).resolve().parents[2] / "d1_servo_arm"
+if str(D1_DIR) not in sys.path:
+    sys.path.insert(0, str(D1_DIR))
+
+from sim_robot import SimRobot, SIM_DEFAULTS
+
+BASELINE_PATH = pathlib.Path(__file__).resolve().parent / "benchmark_baseline.json"
+METRICS = ("cycle", "ik", "command", "convergence", "go2")
+COMMAND_STAGES = ("arm.payload", "arm.encode", "arm.publish", "arm.spawn")
+
+gripper_open = 20
+gripper_closed = 0
+go2_x_distance = 0.2  # meters, sequence 2 with Go2
+
+
+def grab_poses(position_1, position_2, default_position):
+    # pose_1 .. pose_4 and default pose as in the sequence scripts
+    return [[position_1, gripper_open], [position_1, gripper_closed],
+            [position_2, gripper_closed], [position_2, gripper_open],
+            [default_position, gripper_open]]
+
+
+def build_scenarios(default_position):
+    orientation_y = ([0, 0, -1], "Y")
+    orientation_all = (np.array([[0, 0, 1], [-1, 0, 0], [0, -1, 0]]), "all")
+    seq1 = grab_poses([0.3, 0., -0.23], [0.3, 0., 0.2], default_position)
+    seq1_go2 = grab_poses([0.3, 0., 0.02], [0.3, 0., 0.2], default_position)
+    seq2 = grab_poses([0.3, 0.2, -0.02], [0.3, 0.2, 0.2], default_position)
+    seq2_go2 = grab_poses([0.3, 0.0, -0.02], [0.3, 0.0, 0.2], default_position)
+    return {
+        "seq1_arm_only":         {"poses": seq1, "orientation": orientation_y, "go2": None},
+        "seq1_arm_go2":          {"poses": seq1_go2, "orientation": orientation_y, "go2": "stand"},
+        "seq2_arm_only":         {"poses": seq2, "orientation": orientation_all, "go2": None},
+        "seq2_arm_go2_serial":   {"poses": seq2_go2, "orientation": orientation_y, "go2": "serial"},
+        "seq2_arm_go2_parallel": {"poses": seq2_go2, "orientation": orientation_y, "go2": "parallel"},
+    }
+
+
+def run_once(scenario, sport_client, chain, lock_settle_s):
+    """One pass of a scenario; returns the metrics dict (seconds)."""
+    tr = lt.tracer()
+    tr.reset()
+    poses = scenario["poses"]
+
+    # inverse kinematics with a fresh solver, like every script run
+    t_ik = time.monotonic()
+    ik = kin.IKSolver(chain, *scenario["orientation"])
+    ik_solutions = ik.solve_many([pose[0] for pose in poses])
+    ik_s = time.monotonic() - t_ik
+    targets = [kin.to_servo_angles(q, pose[1]) for q, pose in zip(ik_solutions, poses)]
+
+    convergence = []
+    go2_time = [0.0]
+
+    def move_arm(stand_events=False):
+        for i, joint_angles in enumerate(targets):
+            result = ac.move_and_wait(joint_angles, tol=2.0, timeout=30.0, mode=1)
+            if not result["reached"]:
+                raise RuntimeError("pose %d not reached: %s" % (i, result))
+            convergence.append(result["elapsed"])
+            if stand_events and i == 0:
+                sport_client.StandDown()
+            elif stand_events and i == 2:
+                sport_client.StandUp()
+
+    def move_go2():
+        t = time.monotonic()
+        Go2VelocityStreamer(sport_client, hz=50, profile="trapezoid").move(go2_x_distance, 0.0, 0.0)
+        go2_time[0] = time.monotonic() - t
+
+    def arm_with_lock():
+        ac.torque_lock(60000)
+        time.sleep(lock_settle_s)
+        move_arm()
+
+    mode = scenario["go2"]
+    if mode == "parallel":
+        # the parallel script locks the arm inside the timed arm thread
+        timer_start = time.monotonic()
+        threads = [threading.Thread(target=move_go2), threading.Thread(target=arm_with_lock)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        ac.torque_lock(60000)
+        time.sleep(lock_settle_s)
+        timer_start = time.monotonic()
+        if mode == "serial":
+            move_go2()
+        move_arm(stand_events=(mode == "stand"))
+    cycle = time.monotonic() - timer_start
+
+    if len(convergence) != len(targets):
+        raise RuntimeError("arm sequence did not complete")
+    summary = tr.summary()
+    command_ms = sum(st["mean_ms"] * st["n"] for name, st in summary.items()
+                     if name in COMMAND_STAGES or name.startswith("sport."))
+    return {"cycle": cycle, "ik": ik_s, "command": command_ms / 1000.0,
+            "convergence": float(sum(convergence)), "go2": go2_time[0]}
+
+
+def distribution(values):
+    v = np.asarray(values, dtype=float)
+    p50, p95 = np.percentile(v, [50, 95])
+    return {"n": int(len(v)), "mean": round(float(v.mean()), 5), "std": round(float(v.std()), 5),
+            "p50": round(float(p50), 5), "p95": round(float(p95), 5),
+            "min": round(float(v.min()), 5), "max": round(float(v.max()), 5)}
+
+
+def compare(results, baseline, rel_tol, abs_tol):
+    """List of (scenario, metric, baseline p50, current p50) that got slower than allowed."""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for metric, st in metrics.items():
+            if metric not in base:
+                continue
+            limit = base[metric]["p50"] * (1.0 + rel_tol) + abs_tol
+            if st["p50"] > limit:
+                regressions.append((name, metric, base[metric]["p50"], st["p50"]))
+    return regressions
+
+
+def format_results(results, baseline=None):
+    lines = ["%-22s %-12s %9s %9s %9s %9s %9s %10s" % ("scenario", "metric", "mean", "p50", "p95", "min", "max", "base p50")]
+    for name, metrics in results.items():
+        base = (baseline or {}).get("scenarios", {}).get(name, {})
+        for metric, st in metrics.items():
+            b = base.get(metric, {}).get("p50")
+            lines.append("%-22s %-12s %9.4f %9.4f %9.4f %9.4f %9.4f %10s" % (
+                name, metric, st["mean"], st["p50"], st["p95"], st["min"], st["max"],
+                "-" if b is None else "%.4f" % b))
+    return "\n".join(lines)
+
+
+def parse_sim(items):
+    config = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        if key not in SIM_DEFAULTS:
+            raise SystemExit("unknown simulator parameter '%s' (known: %s)" % (key, ", ".join(SIM_DEFAULTS)))
+        config[key] = json.loads(value)
+    return config
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pick and place sequences against the simulated robot.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1, help="runs per scenario that are not recorded")
+    parser.add_argument("--scenarios", nargs="+", default=None)
+    parser.add_argument("--sim", nargs="*", default=[], metavar="KEY=VALUE", help="simulator parameters, e.g. vmax_deg_s=90")
+    parser.add_argument("--lock-settle", type=float, default=0.5, help="sleep after torque_lock as in the scripts (s)")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--rel-tol", type=float, default=0.10)
+    parser.add_argument("--abs-tol", type=float, default=0.005)
+    parser.add_argument("--out", default=None, help="write all runs and distributions as JSON")
+    args = parser.parse_args()
+
+    sim_config = parse_sim(args.sim)
+    sim = SimRobot(**sim_config).start()          # sets D1_SDK_BUILD before arm_control is imported
+    try:
+        import arm_control as ac
+        import kinematics as kin
+        import latency_trace as lt
+        from go2_motion import Go2VelocityStreamer
+
+        lt.tracer().enable()
+        chain = kin.load_chain()
+        default_position = kin.ForwardKinematics().servo_positions(ac.STOW_ANGLES)[0]
+        scenarios = build_scenarios(default_position)
+        names = args.scenarios or list(scenarios)
+        sport_client = lt.traced_sport(sim.sport_client())
+
+        runs, results = {}, {}
+        for name in names:
+            runs[name] = []
+            for k in range(args.warmup + args.runs):
+                sim.reset(ac.STOW_ANGLES)
+                sport_client.reset()
+                ac.read_angles_once(timeout=2.0, max_age=0.05)      # feedback after the reset
+                metrics = run_once(scenarios[name], sport_client, chain, args.lock_settle)
+                if k >= args.warmup:
+                    runs[name].append(metrics)
+            used = [m for m in METRICS if m != "go2" or scenarios[name]["go2"] in ("serial", "parallel")]
+            results[name] = {m: distribution([r[m] for r in runs[name]]) for m in used}
+            print("%s: cycle p50 %.3f s" % (name, results[name]["cycle"]["p50"]))
+    finally:
+        sim.close()
+
+    baseline_path = pathlib.Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+    print(format_results(results, baseline))
+
+    doc = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "runs": args.runs,
+           "sim": dict(SIM_DEFAULTS, **sim_config), "scenarios": results}
+    if args.out:
+        pathlib.Path(args.out).write_text(json.dumps(dict(doc, samples=runs), indent=2))
+
+    exit_code = 0
+    if baseline is not None and not args.save_baseline:
+        if baseline.get("sim") != doc["sim"]:
+            print("Note: baseline was recorded with different simulator parameters.")
+        regressions = compare(results, baseline, args.rel_tol, args.abs_tol)
+        for name, metric, base, now in regressions:
+            print("REGRESSION %s/%s: p50 %.4f s -> %.4f s" % (name, metric, base, now))
+        exit_code = 1 if regressions else 0
+        if not regressions:
+            print("No regressions against %s" % baseline_path)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(doc, indent=2))
+        print("Baseline written to %s" % baseline_path)
+    sys.exit(exit_code)
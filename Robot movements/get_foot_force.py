@@ -9,12 +9,11 @@ __maintainer__ = "Christopher Kania"
 __email__ = "kania.christopher@web.de"
 
 import math
-from unitree_sdk2py.core.channel import ChannelSubscriber
-from unitree_sdk2py.idl.unitree_go.msg.dds_ import LowState_
+import numpy as np
+from d1_servo_arm.go2_state import state_hub
 
 from unitree_sdk2py.go2.sport.sport_client import SportClient
 from unitree_sdk2py.core.channel import ChannelFactoryInitialize
-from unitree_sdk2py.utils.timerfd import timerfd_settime
 import time
 
 # get network interface name from terminal command: ifconfig
@@ -25,33 +24,26 @@ sport_client = SportClient()
 sport_client.SetTimeout(10.0)
 sport_client.Init()
 
-# global variable to store the latest foot force data
-current_foot_force = [0, 0, 0, 0]
-
-def foot_force_callback(msg: LowState_):
-    global current_foot_force
-    current_foot_force = msg.foot_force
+# shared state hub: one subscriber on rt/lowstate (and rt/sportmodestate), ring-buffered history
+hub = None
 
 def start_listener(wait_for_data=True, timeout=5.0):
     """Startet den Subscriber und wartet optional auf die ersten Daten."""
-    global lowstate_sub
-    lowstate_sub = ChannelSubscriber("rt/lowstate", LowState_)
-    lowstate_sub.Init(foot_force_callback, 10)
+    global hub
+    hub = state_hub()
 
     if wait_for_data:
-        t0 = time.time()
-        while current_foot_force == [0, 0, 0, 0]:
-            time.sleep(0.01)
-            if time.time() - t0 > timeout:
-                print("⚠️ Warnung: Keine foot_force-Daten erhalten.")
-                break
+        # wakes up on the first non-zero foot force sample, no polling
+        if hub.wait_until(lambda s: np.any(s["foot_force"] != 0), "low", timeout=timeout) is None:
+            print("⚠️ Warnung: Keine foot_force-Daten erhalten.")
 
 def get_latest_low_state():
-    return {"Foot sensor forces": current_foot_force}
+    s = hub.latest("low") if hub is not None else None
+    return {"Foot sensor forces": [0, 0, 0, 0] if s is None else s["foot_force"].astype(int).tolist()}
 
 if __name__ == "__main__":
     # nur laufen lassen, wenn man das Skript direkt ausführt
     start_listener()
     while True:
         print(get_latest_low_state())
-        time.sleep(1)
\ No newline at end of file
+        time.sleep(1)
@@ -7,14 +7,13 @@ __version__ = "1.0"
 __maintainer__ = "Christopher Kania"
 __email__ = "kania.christopher@web.de"
 
-from ikpy.chain import Chain
-from ikpy.link import OriginLink, URDFLink
-import matplotlib.pyplot
-from mpl_toolkits.mplot3d import Axes3D
+from d1_servo_arm import startup_profile as sp  # --profile-startup: time from launch to the first Go2 command
 import math
 import numpy as np
 import time
 import d1_servo_arm.arm_control as ac
+from d1_servo_arm.go2_motion import Go2VelocityStreamer
+from d1_servo_arm.contact_events import contact_detector
 import sys, pathlib
 from unitree_sdk2py.go2.sport.sport_client import SportClient
 from unitree_sdk2py.core.channel import ChannelFactoryInitialize
@@ -27,6 +26,8 @@ ChannelFactoryInitialize(0, interface)
 sport_client = SportClient()
 sport_client.SetTimeout(10.0)
 sport_client.Init()
+sport_client = ac.traced_sport(sport_client)  # per-call latency spans when D1_TRACE=1
+go2_streamer = Go2VelocityStreamer(sport_client, hz=50, profile="trapezoid")
 
 D1_DIR = (pathlib.Path.cwd() / "d1_servo_arm")
 if str(D1_DIR) not in sys.path:
@@ -36,7 +37,6 @@ p = pathlib.Path("/home/forschungsseminar2025/PycharmProjects/forschungsseminar-
 sys.path.insert(0, str(p))
 print("OK")
 
-d1_550 = Chain.from_urdf_file("/home/forschungsseminar2025/PycharmProjects/forschungsseminar-go2-pick-n-place/d1_550_description/urdf/d1.urdf",active_links_mask=[True, True, True, True, True, True, True, False])
 
 
 # Grabbing sequence 2, arm and go2: x and y difference
@@ -73,8 +73,11 @@ def safe_rest(sport, settle_s=0.8):
 def prepare_for_motion(sport, settle_s=0.8):
     try: sport.StopMove()
     except Exception: pass
+    sp.first_command("first Go2 command")
     sport.RecoveryStand()
-    time.sleep(settle_s)
+    # continue as soon as the foot forces are steady; settle_s (the old fixed sleep) is the upper bound
+    if contact_detector().wait_settled(timeout=settle_s) is None:
+        print("Foot forces not settled after %.1f s, continuing." % settle_s)
 
 # Function for Go2 movement
 def move_go2():
@@ -82,11 +85,9 @@ def move_go2():
     #sport_client.StopMove()
     prepare_for_motion(sport_client)
     time.sleep(2)
-    t_end = time.time() + move_time
-    while time.time() < t_end:
-        sport_client.Move(speed_x, speed_y, speed_yaw)
-        time.sleep(0.1)
-    sport_client.StopMove()
+    # 50 Hz trapezoidal velocity profile on absolute deadlines, stops exactly on the commanded distance
+    report = go2_streamer.move(go2_x_distance, go2_y_distance, go2_yaw_distance)
+    print("Move: %s" % go2_streamer.format_report(report))
     time.sleep(2)
     safe_rest(sport_client)
             
@@ -1,24 +1,133 @@
+#include <algorithm>
+#include <chrono>
+#include <condition_variable>
+#include <cstdlib>
 #include <iostream>
+#include <mutex>
 #include <string>
+#include <thread>
 #include <unitree/robot/channel/channel_publisher.hpp>
 #include "msg/ArmString_.hpp"
 
 using unitree::robot::ChannelFactory;
 using unitree::robot::ChannelPublisher;
 
+// Aufruf:
+//   arm_pub --stdin                       jede JSON-Zeile sofort einmal schreiben (bis EOF)
+//   arm_pub --stdin --repeat N --hz H     Takt H Hz (steady_clock, absolute Deadlines):
+//                                         die jeweils neueste Zeile wird N Ticks lang gehalten
+//                                         bzw. bis eine neuere Zeile kommt (N = 0: bis zur nächsten Zeile)
+struct Options {
+    int repeat = 1;
+    double hz = 0.0;
+};
+
+static Options parse_args(int argc, char** argv) {
+    Options o;
+    for (int i = 1; i < argc; ++i) {
+        std::string a = argv[i];
+        if (a == "--repeat" && i + 1 < argc) {
+            o.repeat = std::max(0, std::atoi(argv[++i]));
+        } else if (a == "--hz" && i + 1 < argc) {
+            o.hz = std::atof(argv[++i]);
+        }
+        // --stdin ist immer aktiv und wird nur aus Kompatibilität akzeptiert
+    }
+    return o;
+}
+
 int main(int argc, char** argv) {
+    const Options opt = parse_args(argc, argv);
+
     // optional: Interface per ENV oder Param; hier leer lassen -> SDK/CycloneDDS-Config nutzen
     ChannelFactory::Instance()->Init(0, "");  // "" = nimm CycloneDDS-Config/Default
 
     ChannelPublisher<unitree_arm::msg::dds_::ArmString_> pub("rt/arm_Command");
     pub.InitChannel();
 
-    // Lese eine JSON-Zeile von stdin
-    std::string json;
-    if (!std::getline(std::cin, json)) return 1;
-
+    std::ios::sync_with_stdio(false);
     unitree_arm::msg::dds_::ArmString_ msg{};
-    msg.data_() = json;
-    pub.Write(msg);
-    return 0;
-}
\ No newline at end of file
+    int written = 0;
+
+    // Ohne Takt: jede Zeile sofort schreiben (ggf. N-mal direkt hintereinander).
+    // Einmal-Aufrufe (eine Zeile, dann EOF) verhalten sich wie bisher; arm_control.py hält
+    // dagegen einen Prozess offen und schickt alle Kommandos über dieselbe Pipe/denselben Writer.
+    if (opt.hz <= 0.0) {
+        std::string json;
+        while (std::getline(std::cin, json)) {
+            if (json.empty()) continue;
+            msg.data_() = json;
+            for (int r = 0; r < std::max(1, opt.repeat); ++r) {
+                pub.Write(msg);
+                ++written;
+            }
+        }
+        return written > 0 ? 0 : 1;
+    }
+
+    // Mit Takt: stdin in eigenem Thread lesen, damit das Lesen den Takt nie verzögert.
+    std::mutex m;
+    std::condition_variable cv;
+    std::string pending;
+    bool has_pending = false;
+    bool eof = false;
+
+    std::thread reader([&] {
+        std::string line;
+        while (std::getline(std::cin, line)) {
+            if (line.empty()) continue;
+            std::lock_guard<std::mutex> lk(m);
+            pending.swap(line);
+            has_pending = true;
+            cv.notify_one();
+        }
+        std::lock_guard<std::mutex> lk(m);
+        eof = true;
+        cv.notify_one();
+    });
+
+    using Clock = std::chrono::steady_clock;
+    const auto period = std::chrono::duration_cast<Clock::duration>(std::chrono::duration<double>(1.0 / opt.hz));
+    const int hold_ticks = opt.repeat > 0 ? opt.repeat : -1;  // -1 = halten bis zur nächsten Zeile/EOF
+
+    std::string current;
+    int remaining = 0;
+    auto next = Clock::now();
+
+    while (true) {
+        {
+            std::unique_lock<std::mutex> lk(m);
+            if (remaining == 0) {
+                cv.wait(lk, [&] { return has_pending || eof; });
+                if (!has_pending) break;                 // EOF und nichts mehr zu halten
+                next = std::max(next, Clock::now());     // nach Leerlauf neu ausrichten
+            } else if (remaining < 0 && eof && !has_pending) {
+                break;                                   // unbegrenztes Halten endet mit EOF
+            }
+        }
+
+        std::this_thread::sleep_until(next);
+
+        {
+            // neueste Zeile gewinnt – auch wenn sie während des Schlafens kam
+            std::lock_guard<std::mutex> lk(m);
+            if (has_pending) {
+                current.swap(pending);
+                has_pending = false;
+                remaining = hold_ticks;
+            }
+        }
+
+        msg.data_() = current;
+        pub.Write(msg);
+        ++written;
+        if (remaining > 0) --remaining;
+
+        next += period;
+        const auto now = Clock::now();
+        if (now - next > period) next = now;             // verpasste Ticks auslassen, nicht nachholen
+    }
+
+    reader.join();
+    return written > 0 ? 0 : 1;
+}
@@ -0,0 +1,169 @@
+# arm_client.py
+# Dünner Client für robot_daemon.py: dieselben Funktionen wie arm_control (plus IK und Go2),
+# ausgeführt im laufenden Dienst. Nur Standardbibliothek – kein NumPy, kein ikpy, kein DDS –
+# der Import kostet Millisekunden, das erste Kommando geht ohne Prozessstart/Discovery raus.
+# Jeder Thread hat eine eigene Socket-Verbindung (Arm und Go2 laufen so auch im Dienst parallel).
+# Fehler im Dienst kommen als dieselbe Exception-Klasse zurück (ValueError, TimeoutError, ...),
+# unbekannte Klassen als RuntimeError.
+#
+# Benutzung (Beispiel):
+#   import arm_client as ac
+#   if not ac.available():
+#       raise SystemExit("robot_daemon.py läuft nicht")
+#   ac.torque_lock(60000)
+#   targets = ac.ik_solve([[0.3, 0, -0.23], [0.3, 0, 0.2]], orientation=[0, 0, -1], grippers=20)
+#   for q in targets:
+#       print(ac.move_and_wait(q, tol=2.0))
+#   ac.go2_move(0.2)
+#   print(ac.status())
+
+import os
+import json
+import socket
+import builtins
+import threading
+
+DEFAULT_SOCKET = os.environ.get("D1_DAEMON_SOCKET", f"/tmp/d1-robot-{os.getuid()}.sock")
+
+# wie in arm_control (ohne dessen Import)
+STOW_ANGLES = [-9.8, -87.8, 92.3, -7.7, 0.5, 10.0, 18.0]
+STAND_ANGLES = [-1.0, -88.0, 93.0, 1.0, -0.3, 0.7, 0.0]
+
+_REMOTE_ERRORS = ("ValueError", "TypeError", "KeyError", "RuntimeError", "TimeoutError",
+                  "FileNotFoundError", "AssertionError")
+
+class RobotClient:
+    """
+    Verbindung(en) zum robot_daemon.
+      call(op, *args, **kwargs) – Operation im Dienst ausführen und Ergebnis zurückgeben
+      timeout                   – Socket-Timeout in s (None = unbegrenzt, Bewegungen dauern)
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=None):
+        self.socket_path = str(socket_path)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            c = self._local.conn = (sock, sock.makefile("rb"))
+        return c
+
+    def call(self, op, *args, **kwargs):
+        sock, rfile = self._conn()
+        try:
+            sock.sendall(json.dumps({"op": op, "args": args, "kwargs": kwargs}).encode() + b"\n")
+            line = rfile.readline()
+        except OSError:
+            self.close()
+            raise
+        if not line:
+            self.close()
+            raise ConnectionError("robot_daemon hat die Verbindung geschlossen.")
+        reply = json.loads(line)
+        if reply["ok"]:
+            return reply["result"]
+        exc = getattr(builtins, reply["type"], None) if reply["type"] in _REMOTE_ERRORS else None
+        raise (exc or RuntimeError)(f"[robot_daemon] {reply['error']}" if exc else
+                                    f"[robot_daemon] {reply['type']}: {reply['error']}")
+
+    def close(self):
+        c = getattr(self._local, "conn", None)
+        if c is not None:
+            self._local.conn = None
+            c[1].close()
+            c[0].close()
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+def client():
+    """Modulweiter Client auf DEFAULT_SOCKET (Verbindung pro Thread, lazy)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = RobotClient()
+        return _CLIENT
+
+def available(socket_path=DEFAULT_SOCKET):
+    """True, wenn auf socket_path ein Dienst antwortet."""
+    try:
+        c = RobotClient(socket_path, timeout=1.0)
+        try:
+            return c.call("ping") == "pong"
+        finally:
+            c.close()
+    except OSError:
+        return False
+
+# ---------- Arm (wie arm_control) ----------
+def torque_lock(level=60000):
+    return client().call("torque_lock", level)
+
+def torque_release():
+    return client().call("torque_release")
+
+def go_home():
+    return client().call("go_home")
+
+def go_stow(torque=45000, verify=True):
+    return client().call("go_stow", torque, verify)
+
+def go_stand(torque=45000, verify=False):
+    return client().call("go_stand", torque, verify)
+
+def move_single_joint(joint_id, angle_deg, delay_ms=0):
+    return client().call("move_single_joint", joint_id, angle_deg, delay_ms)
+
+def move_multi(angles_deg, mode=1, habr=20, ply=3):
+    return client().call("move_multi", list(angles_deg), mode, habr, ply)
+
+def move_multi_stream(angles_deg, repeats=30, hz=10, mode=1, habr=20, ply=3):
+    return client().call("move_multi_stream", list(angles_deg), repeats, hz, mode, habr, ply)
+
+def move_multi_simultaneous(angles_deg, v=5, **kwargs):
+    return client().call("move_multi_simultaneous", list(angles_deg), v, **kwargs)
+
+def move_and_wait(target_angles, tol=2.0, timeout=10.0, **kwargs):
+    return client().call("move_and_wait", list(target_angles), tol, timeout, **kwargs)
+
+def read_angles_once(timeout=1.0, max_age=0.2):
+    return client().call("read_angles_once", timeout, max_age)
+
+def compare_angles(target_angles, tol=2.0):
+    return client().call("compare_angles", list(target_angles), tol)
+
+# ---------- IK ----------
+def ik_solve(positions, orientation=(0, 0, -1), orientation_mode="Y", grippers=None):
+    """
+    IK im Dienst (gewärmte Kette, Cache pro Orientierung bleibt zwischen Skriptläufen erhalten).
+    orientation als Liste (Vektor oder 3x3-Matrix). Mit grippers -> 7 Servo-Winkel je Pose.
+    """
+    if hasattr(orientation, "tolist"):
+        orientation = orientation.tolist()
+    return client().call("ik_solve", [list(p) for p in positions], orientation, orientation_mode, grippers)
+
+# ---------- Go2 ----------
+def sport(method, *args):
+    """SportClient-Aufruf im Dienst, z. B. sport("StandDown") oder sport("Move", 0.3, 0, 0)."""
+    return client().call("sport", method, *args)
+
+def go2_move(dx=0.0, dy=0.0, dyaw=0.0, hz=50, profile="trapezoid"):
+    return client().call("go2_move", dx, dy, dyaw, hz, profile)
+
+def go2_move_distance(dx=0.0, dy=0.0, dyaw=0.0, **kwargs):
+    return client().call("go2_move_distance", dx, dy, dyaw, **kwargs)
+
+def go2_state(topic="sport", fields=None):
+    return client().call("go2_state", topic, fields)
+
+# ---------- Dienst ----------
+def status():
+    return client().call("status")
+
+def shutdown():
+    return client().call("shutdown")
@@ -1,7 +1,7 @@
 # d1_servo_arm/arm_control.py
 # Hilfsfunktionen, um den D1-Arm aus Python zu steuern – ohne Neucompilieren.
 # Nutzt die bereits gebauten Binaries aus d1_sdk/build:
-#   - arm_pub               (Publisher mit --stdin)
+#   - arm_pub               (Publisher mit --stdin; bleibt als persistente Session offen)
 #   - arm_zero_control      (bewährtes "Home/Zero" Kommando)
 #   - get_arm_joint_angle   (liest aktuelle Gelenkwinkel)
 #
@@ -31,6 +31,10 @@ move_single_joint(id, angle): ein Gelenk (Doku funcode=1).
 
 move_multi([7-Winkel]): alle Gelenke gleichzeitig (Doku funcode=2).
 
+move_multi_simultaneous([7-Winkel], v): synchrone Ankunft aller Gelenke (ein Burst, Ankunftszeit im Rückgabewert).
+
+move_and_wait([7-Winkel], tol, timeout): fahren und zurückkehren, sobald alle Gelenke in Toleranz und in Ruhe sind.
+
 read_angles_once(): liest aktuelle 7 Winkel (Grad).
 
 print_compare_stow(): vergleicht Ist mit deinen STOW_ANGLES.
@@ -39,7 +43,9 @@ print_compare_stow(): vergleicht Ist mit deinen STOW_ANGLES.
 
 import os
 import re
+import sys
 import json
+import atexit
 import time
 import signal
 import subprocess
@@ -49,6 +55,12 @@ import threading
 
 from pathlib import Path
 SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))  # damit "import latency_trace" lokal klappt
+from latency_trace import tracer
+from latency_trace import traced_sport  # noqa: F401  Re-Export für Skripte (ac.traced_sport, gleicher Tracer)
+import startup_profile
+
+_TRACE = tracer()    # Latenz-Spans (inaktiv, solange nicht D1_TRACE=1 bzw. tracer().enable())
 # ---------- Pfade/Umgebung anpassen ----------
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_BUILD = PROJECT_ROOT / "d1_sdk" / "build"
@@ -60,6 +72,10 @@ CYCLONE_CFG = os.environ.get("CYCLONEDDS_URI", f"file://{(SCRIPT_DIR / 'cdds.xml
 LD_LIBS     = os.path.expanduser("~/cdds/install/lib") + ":/usr/local/lib"
 
 def _assert_binaries():
+    """Prüft die benötigten Binaries – erst beim ersten Start eines Binaries, nicht beim Import."""
+    global _BINARIES_OK
+    if _BINARIES_OK:
+        return
     req = ["get_arm_joint_angle", "arm_zero_control"]  #"arm_pub",
     missing = [exe for exe in req if not (Path(BUILD_DIR)/exe).exists()]
     if missing:
@@ -70,7 +86,9 @@ def _assert_binaries():
             f"  cmake -DCMAKE_BUILD_TYPE=RelWithDebInfo -DCMAKE_PREFIX_PATH=$HOME/cdds/install .\n"
             f"  make -j\n"
         )
-_assert_binaries()
+    _BINARIES_OK = True
+
+_BINARIES_OK = False
 
 # ---------- interne Helfer ----------
 def _env():
@@ -82,40 +100,359 @@ def _env():
 
 def _run_binary(exe, timeout=None):
     """Binary ohne stdin starten und auf Ende warten."""
+    _assert_binaries()
     return subprocess.run([os.path.join(BUILD_DIR, exe)],
                           env=_env(), timeout=timeout, check=False).returncode
 
 
-# ---------- I/O ----------
-def read_angles_once(timeout=1.0):
+# ---------- Publisher-Session ----------
+class ArmPublisher:
     """
-    Liest eine Zeile aus get_arm_joint_angle und gibt 7 floats zurück
-    oder None, wenn kein Parse möglich war.
+    Langlebige Publisher-Session für rt/arm_Command.
+    Hält EINEN arm_pub-Prozess (--stdin) offen und schreibt jedes Kommando als JSON-Zeile
+    in dessen stdin. Prozessstart, DDS-Participant und Discovery fallen so nur einmal an;
+    ein Kommando kostet danach nur noch einen Pipe-Write (Mikrosekunden).
+
+    send(payload, repeats, hz) schickt sofort einmal und wiederholt den Befehl danach im
+    Hintergrund (absolute monotonic-Deadlines), bis 'repeats' erreicht ist oder ein neuer
+    Befehl kommt – das ist das „Halten“, das move_multi_stream erwartet.
+    Stirbt arm_pub, wird er beim nächsten Befehl automatisch neu gestartet.
     """
-    cmd = [os.path.join(BUILD_DIR, "get_arm_joint_angle")]
-    p = subprocess.Popen(cmd, env=_env(),
-                         stdout=subprocess.PIPE,
-                         stderr=subprocess.STDOUT, text=True)
-    t0 = time.time()
-    last = None
-    try:
-        while time.time() - t0 < timeout:
-            line = p.stdout.readline()
-            if not line:
-                break
-            last = line.strip()
-    finally:
+
+    def __init__(self, args=("--stdin",)):
+        self._args = list(args)
+        self._proc = None
+        self._lock = threading.Lock()
+        self._cv = threading.Condition(self._lock)
+        self._hold = None            # [line, remaining, period_s, next_deadline]
+        self._hold_thread = None
+        self._closed = False
+
+    def start(self):
+        """arm_pub jetzt starten statt beim ersten Kommando (Prozessstart/Discovery nicht im Takt)."""
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("ArmPublisher ist bereits geschlossen.")
+            self._ensure_proc()
+        return self
+
+    def _ensure_proc(self):
+        if self._proc is None or self._proc.poll() is not None:
+            _assert_binaries()
+            with _TRACE.span("arm.spawn"):
+                self._proc = subprocess.Popen([ARM_PUB] + self._args, stdin=subprocess.PIPE,
+                                              env=_env(), text=True, bufsize=1)
+        return self._proc
+
+    def _write_line(self, line):
+        """Eine Zeile schreiben; bei kaputter Pipe einmal neu starten. 0 = OK (wie returncode)."""
+        for _ in range(2):
+            p = self._ensure_proc()
+            try:
+                with _TRACE.span("arm.publish"):
+                    p.stdin.write(line)
+                    p.stdin.flush()
+                startup_profile.first_command()
+                return 0
+            except (BrokenPipeError, OSError, ValueError):
+                self._proc = None
+        return 1
+
+    def send(self, payload, repeats=1, hz=10):
+        """Payload (dict) publizieren; repeats > 1 hält den Befehl mit 'hz' im Hintergrund."""
+        with _TRACE.span("arm.encode"):
+            line = json.dumps(payload) + "\n"
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("ArmPublisher ist bereits geschlossen.")
+            rc = self._write_line(line)
+            if int(repeats) > 1 and float(hz) > 0:
+                period = 1.0 / float(hz)
+                self._hold = [line, int(repeats) - 1, period, time.monotonic() + period]
+                if self._hold_thread is None:
+                    self._hold_thread = threading.Thread(target=self._hold_loop,
+                                                         name="arm-pub-hold", daemon=True)
+                    self._hold_thread.start()
+            else:
+                self._hold = None    # neuer Befehl beendet das Halten des vorherigen
+            self._cv.notify()
+        return rc
+
+    def _hold_loop(self):
+        with self._cv:
+            while not self._closed:
+                if self._hold is None:
+                    self._cv.wait()
+                    continue
+                line, remaining, period, deadline = self._hold
+                now = time.monotonic()
+                if deadline > now:
+                    self._cv.wait(deadline - now)   # kann durch neuen Befehl vorzeitig enden
+                    continue
+                self._write_line(line)
+                remaining -= 1
+                # feste Deadlines (kein Drift); nach einem Hänger nicht „nachfeuern“
+                deadline = max(deadline + period, now)
+                self._hold = [line, remaining, period, deadline] if remaining > 0 else None
+
+    def send_burst(self, payloads):
+        """Mehrere Payloads mit EINEM Pipe-Write senden (arm_pub publiziert sie direkt hintereinander)."""
+        with _TRACE.span("arm.encode"):
+            data = "".join(json.dumps(p) + "\n" for p in payloads)
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("ArmPublisher ist bereits geschlossen.")
+            self._hold = None
+            rc = self._write_line(data)
+            self._cv.notify()
+        return rc
+
+    def send_multi(self, angles_deg, mode=1, habr=20, ply=3):
+        """funcode-2-Kommando (7 Winkel in Grad) über diese Session senden."""
+        return self.send(_multi_payload(angles_deg, mode=mode, habr=habr, ply=ply))
+
+    def send_line(self, line):
+        """Bereits kodierte Kommandozeile (siehe encode_multi) senden – für vorab kodierte Tabellen."""
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("ArmPublisher ist bereits geschlossen.")
+            self._hold = None
+            rc = self._write_line(line)
+            self._cv.notify()
+        return rc
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # Abbruch (z. B. Ctrl-C): arm_pub sofort beenden, kein weiteres Halten
+            with self._cv:
+                p = self._proc
+            if p is not None and p.poll() is None:
+                p.terminate()
+        self.close(timeout=None)
+        return False
+
+    def close(self, timeout=1.0):
+        """Halten beenden, stdin schließen (EOF -> arm_pub beendet sich) und auf Ende warten."""
+        with self._cv:
+            self._closed = True
+            self._hold = None
+            self._cv.notify_all()
+            p, self._proc = self._proc, None
+        if p is None:
+            return
         try:
-            p.send_signal(signal.SIGINT)
-            time.sleep(0.1)
-            p.terminate()
+            p.stdin.close()
+            p.wait(timeout=timeout)
         except Exception:
-            pass
+            p.terminate()
 
-    if not last:
-        return None
-    vals = re.findall(r"servo\d+_data:([-+]?\d+(?:\.\d+)?)", last)
-    return [float(v) for v in vals] if len(vals) == 7 else None
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+def _session():
+    """Modulweite Publisher-Session (lazy, beim Interpreter-Ende geschlossen)."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = ArmPublisher()
+            atexit.register(_SESSION.close)
+        return _SESSION
+
+def _publish(payload, repeats=1, hz=10):
+    """Kommando über die persistente Session senden; gibt 0 bei Erfolg zurück."""
+    return _session().send(payload, repeats=repeats, hz=hz)
+
+def open_stream(hz, repeats=1):
+    """
+    Eigener arm_pub-Prozess im Taktmodus (--repeat/--hz) für ganze Trajektorien:
+    arm_pub publiziert mit 'hz' (steady_clock) immer die neueste gesendete Pose und hält sie
+    'repeats' Ticks (0 = bis zur nächsten Pose). Als Context-Manager benutzen:
+
+        with ac.open_stream(hz=100, repeats=2) as st:
+            for q in trajectory:
+                st.send_multi(q, mode=0, habr=0, ply=0)
+    """
+    return ArmPublisher(args=("--stdin", "--repeat", str(int(repeats)), "--hz", repr(float(hz))))
+
+def _multi_payload(angles_deg, mode=1, habr=20, ply=3):
+    """funcode 2 – Payload mit angle0..angle6 (Grad) plus mode/habr/plyLevel."""
+    assert len(angles_deg) == 7, "Erwarte 7 Gelenkwinkel (Grad)."
+    with _TRACE.span("arm.payload"):
+        data = {f"angle{i}": float(angles_deg[i]) for i in range(7)}
+        data.update({
+            "mode": int(mode),
+            "habr": [int(habr)]*7,
+            "plyLevel": [int(ply)]*7
+        })
+        return {"seq":4, "address":1, "funcode":2, "data": data}
+
+def encode_multi(angles_deg, mode=1, habr=20, ply=3):
+    """funcode-2-Kommando als fertige Zeile für ArmPublisher.send_line (Kodieren vor der Schleife)."""
+    return json.dumps(_multi_payload(angles_deg, mode=mode, habr=habr, ply=ply)) + "\n"
+
+
+# ---------- Gelenkwinkel-Monitor ----------
+_SERVO_RE = re.compile(r"servo\d+_data:([-+]?\d+(?:\.\d+)?)")
+
+class JointStateMonitor:
+    """
+    Dauerhafter Leser für current_servo_angle.
+    Startet get_arm_joint_angle EINMAL und parst jede Zeile im Hintergrund in einen
+    vorallokierten Ringpuffer (Zeitstempel time.monotonic() + 7 Winkel in Grad).
+
+    Lesen ist lock-frei (ein Schreiber, Zähler wird erst nach dem Zeilen-Write erhöht):
+      latest()                 -> (t, q) des neuesten Samples oder None       O(1)
+      wait_for_new(after_ts)   -> erstes Sample mit t > after_ts oder None     blockiert bis timeout
+      snapshot(n)              -> (ts[n], q[n,7]) der letzten n Samples, chronologisch
+    add_listener(fn) ruft fn() im Leser-Thread nach jedem Sample (und beim Prozessende) auf –
+    z. B. um eine asyncio-Loop per call_soon_threadsafe zu wecken (async_control).
+    """
+
+    def __init__(self, capacity=2048):
+        self.capacity = int(capacity)
+        self._ts = np.zeros(self.capacity, dtype=np.float64)
+        self._q = np.zeros((self.capacity, 7), dtype=np.float64)
+        self._count = 0                     # Anzahl bisher geschriebener Samples
+        self._cv = threading.Condition()
+        self._proc = None
+        self._thread = None
+        self._t_start = None
+        self._listeners = ()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return self
+        _assert_binaries()
+        self._t_start = time.monotonic()
+        self._proc = subprocess.Popen([os.path.join(BUILD_DIR, "get_arm_joint_angle")],
+                                      env=_env(), stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT, text=True, bufsize=1)
+        self._thread = threading.Thread(target=self._reader, args=(self._proc,),
+                                        name="joint-state-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def _reader(self, proc):
+        for line in proc.stdout:
+            t_line = time.monotonic()
+            vals = _SERVO_RE.findall(line)
+            if len(vals) != 7:
+                continue                    # z. B. armFeedback_data-Zeilen
+            i = self._count % self.capacity
+            self._q[i] = [float(v) for v in vals]
+            self._ts[i] = time.monotonic()
+            if _TRACE.enabled:
+                _TRACE.record("joint.parse", t_line, self._ts[i])
+                if self._count == 0:
+                    _TRACE.record("joint.first_sample", self._t_start, self._ts[i])
+                else:
+                    _TRACE.record("joint.interval", self._ts[(i - 1) % self.capacity], self._ts[i])
+            self._count += 1
+            with self._cv:
+                self._cv.notify_all()
+            for fn in self._listeners:
+                fn()
+        with self._cv:                      # Prozess beendet -> Wartende aufwecken
+            self._cv.notify_all()
+        for fn in self._listeners:
+            fn()
+
+    def add_listener(self, fn):
+        """fn() nach jedem neuen Sample aufrufen (im Leser-Thread – kurz halten, nicht blockieren)."""
+        with self._cv:
+            self._listeners = self._listeners + (fn,)
+
+    def remove_listener(self, fn):
+        with self._cv:
+            self._listeners = tuple(f for f in self._listeners if f is not fn)
+
+    def latest(self):
+        """Neuestes Sample als (t, q) oder None, wenn noch nichts empfangen wurde."""
+        n = self._count
+        if n == 0:
+            return None
+        i = (n - 1) % self.capacity
+        return float(self._ts[i]), self._q[i].copy()
+
+    def wait_for_new(self, after_ts=None, timeout=1.0):
+        """Wartet auf ein Sample mit t > after_ts (None = irgendein Sample)."""
+        deadline = time.monotonic() + float(timeout)
+        with self._cv:
+            while True:
+                s = self.latest()
+                if s is not None and (after_ts is None or s[0] > after_ts):
+                    return s
+                left = deadline - time.monotonic()
+                if left <= 0 or not self.running:
+                    return None
+                self._cv.wait(left)
+
+    def snapshot(self, n=None):
+        """Letzte n Samples (Default: ganzer Puffer) als Kopien (ts, q), älteste zuerst."""
+        count = self._count
+        n = min(count, self.capacity) if n is None else min(int(n), count, self.capacity)
+        idx = (np.arange(count - n, count) % self.capacity)
+        return self._ts[idx].copy(), self._q[idx].copy()
+
+    def stop(self):
+        """get_arm_joint_angle beenden und auf den Leser-Thread warten (danach running == False)."""
+        p, self._proc = self._proc, None
+        if p is not None:
+            try:
+                p.send_signal(signal.SIGINT)
+                p.wait(timeout=0.5)
+            except Exception:
+                p.terminate()
+        th = self._thread
+        if th is not None and th is not threading.current_thread():
+            th.join(timeout=1.0)
+
+_MONITOR = None
+_MONITOR_LOCK = threading.Lock()
+
+def joint_monitor():
+    """Modulweiter JointStateMonitor (lazy gestartet; ein beendeter Monitor wird durch einen neuen ersetzt)."""
+    global _MONITOR
+    with _MONITOR_LOCK:
+        if _MONITOR is None or not _MONITOR.running:
+            _MONITOR = JointStateMonitor()
+            atexit.register(_MONITOR.stop)
+            _MONITOR.start()
+        return _MONITOR
+
+def close_session():
+    """arm_pub-Session und JointStateMonitor beenden (z. B. beim Stopp des robot_daemon).
+    Der nächste Befehl bzw. joint_monitor() startet beide wieder."""
+    global _SESSION
+    with _SESSION_LOCK:
+        session, _SESSION = _SESSION, None
+    if session is not None:
+        session.close()
+    with _MONITOR_LOCK:
+        mon = _MONITOR
+    if mon is not None:
+        mon.stop()
+
+
+# ---------- I/O ----------
+def read_angles_once(timeout=1.0, max_age=0.2):
+    """
+    Gibt die aktuellen 7 Gelenkwinkel (Grad) als floats zurück oder None.
+    Liest aus dem JointStateMonitor: ist das neueste Sample jünger als max_age,
+    kostet der Aufruf nur Mikrosekunden; sonst wird bis 'timeout' auf ein neues gewartet.
+    """
+    mon = joint_monitor()
+    s = mon.latest()
+    if s is None or time.monotonic() - s[0] > max_age:
+        s = mon.wait_for_new(after_ts=s[0] if s else None, timeout=timeout)
+    return [float(v) for v in s[1]] if s else None
 
 
 def print_angles(seconds=2):
@@ -147,62 +484,62 @@ def torque_lock(level=60000):
     Hinweise der Doku: 0 voll weiches Auskuppeln, 80000 sehr hart.
     """
     payload = {"seq":4, "address":1, "funcode":5, "data":{"mode":int(level)}}
-    return subprocess.run([ARM_PUB, "--stdin"],
-                          input=json.dumps(payload), text=True, env=_env()).returncode
+    return _publish(payload)
 
 def torque_release():
     """funcode=5 – komplett entlasten (0). Achtung: Arm kann absinken/fallen."""
     payload = {"seq":4, "address":1, "funcode":5, "data":{"mode": 0}}
-    return subprocess.run([ARM_PUB, "--stdin"], input=json.dumps(payload),
-                          text=True, env=_env()).returncode
+    return _publish(payload)
 
 def move_single_joint(joint_id, angle_deg, delay_ms=0):
     """
     funcode 1: Einzelgelenk fahren.
     joint_id: laut Doku (0..6 oder 1..7 – je nach FW; bei dir: Beispiel id=5)
     """
-    payload = {"seq":4, "address":1, "funcode":1,
-               "data":{"id":int(joint_id), "angle":float(angle_deg), "delay_ms":int(delay_ms)}}
-    return subprocess.run([ARM_PUB, "--stdin"],
-                          input=json.dumps(payload), text=True, env=_env()).returncode
+    return _publish(_single_payload(joint_id, angle_deg, delay_ms))
 
-### Experimental Move Multi Function where joint angles are hit simultaneously ###
+def _single_payload(joint_id, angle_deg, delay_ms=0):
+    """funcode 1 – Einzelgelenk-Payload."""
+    with _TRACE.span("arm.payload"):
+        return {"seq":4, "address":1, "funcode":1,
+                "data":{"id":int(joint_id), "angle":float(angle_deg), "delay_ms":int(delay_ms)}}
 
-def move_multi_simultaneous(angles_deg, v = 5):
+def move_multi_simultaneous(angles_deg, v=5, current=None, torque=40000, lock_settle_s=0.2, min_ms=20):
     """
-    angles_deg: Liste von 7 Winkeln (Grad).
-    v: Geschwindigkeit in Grad/Sekunde (gemeinsam für alle Gelenke).
-    Alle Gelenke sollen gleichzeitig ihre Zielwinkel erreichen.
+    Alle Gelenke erreichen ihr Ziel GLEICHZEITIG.
+      angles_deg: Liste von 7 Winkeln (Grad).
+      v:          Höchstgeschwindigkeit in Grad/Sekunde – Skalar (alle Gelenke) oder 7 Werte.
+      current:    Ist-Winkel (Default: aus dem JointStateMonitor).
+
+    Die Fahrzeit T ergibt sich aus dem langsamsten Gelenk (max |Δ_j| / v_j); jedes Gelenk fährt
+    mit v_j' = |Δ_j| / T. Gesendet werden die 7 funcode-1-Kommandos mit demselben delay_ms = T
+    als EIN Burst über die persistente Session (ein Pipe-Write, ein DDS-Writer) – statt sieben
+    Threads mit je eigenem arm_pub.
+
+    Rückgabe: dict mit duration (s), delay_ms, arrival (time.monotonic() der erwarteten Ankunft),
+    velocities (Grad/s je Gelenk) und rc (0 = gesendet).
     """
-    threads = []
-    current_angles = np.array(read_angles_once()) #[90, -10, 30, 45, -34, -100, 0] #
-    angles_deg = np.array(angles_deg)
-    print(current_angles)
-    angles_delta = abs(angles_deg - current_angles)
-    print (angles_delta)
-    max_delta = max([abs(angle) for angle in angles_delta])
-    print(max_delta)
-    execution_time = np.round(max_delta / v  * 1000) # time in milliseconds to reach the target angles at speed v
-    print(execution_time)
-    angles_deg = angles_deg.tolist()
-    print(angles_deg)
-    joint_id = 0
-
-    torque_lock(40000)
-    time.sleep(0.2)
-
-    for angle in angles_deg:
-        print(joint_id, angle, execution_time)
-        thread_joint = threading.Thread(target=move_single_joint, args = (joint_id, angle, execution_time))
-        #time.sleep(0.1)
-        threads.append(thread_joint)
-        thread_joint.start()
-        joint_id = joint_id + 1
-
-    for thread in threads:
-        thread.join()
-
-### End ###
+    target = np.asarray(angles_deg, dtype=float)
+    assert target.shape == (7,), "Erwarte 7 Gelenkwinkel (Grad)."
+    if current is None:
+        current = read_angles_once()
+        if current is None:
+            raise RuntimeError("Keine aktuellen Winkel lesbar (get_arm_joint_angle läuft?).")
+    delta = np.abs(target - np.asarray(current, dtype=float))
+    vmax = np.broadcast_to(np.asarray(v, dtype=float), (7,))
+    if np.any(vmax <= 0):
+        raise ValueError("v muss > 0 sein.")
+
+    delay_ms = max(int(min_ms), int(np.ceil(np.max(delta / vmax) * 1000.0)))
+    duration = delay_ms / 1000.0
+
+    if torque is not None:
+        torque_lock(torque)
+        time.sleep(lock_settle_s)
+
+    rc = _session().send_burst([_single_payload(j, target[j], delay_ms) for j in range(7)])
+    return {"duration": duration, "delay_ms": delay_ms, "arrival": time.monotonic() + duration,
+            "velocities": [round(float(d / duration), 3) for d in delta], "rc": rc}
 
 def move_multi(angles_deg, mode=1, habr=20, ply=3):
     """
@@ -210,16 +547,7 @@ def move_multi(angles_deg, mode=1, habr=20, ply=3):
     angles_deg: Liste von 7 Winkeln (Grad).
     mode/habr/plyLevel werden mitgeschickt.
     """
-    assert len(angles_deg) == 7, "Erwarte 7 Gelenkwinkel (Grad)."
-    data = {f"angle{i}": float(angles_deg[i]) for i in range(7)}
-    data.update({
-        "mode": int(mode),
-        "habr": [int(habr)]*7,
-        "plyLevel": [int(ply)]*7
-    })
-    payload = {"seq":4, "address":1, "funcode":2, "data": data}
-    return subprocess.run([ARM_PUB, "--stdin"],
-                          input=json.dumps(payload), text=True, env=_env()).returncode
+    return _publish(_multi_payload(angles_deg, mode=mode, habr=habr, ply=ply))
 
 def go_home():
     """
@@ -260,18 +588,10 @@ def _near(a, b, tol=3.0):
 def move_multi_stream(angles_deg, repeats=30, hz=10, mode=1, habr=20, ply=3):
     """
     Wiederholt Multi-Joint-Command 'repeats' mal mit 'hz', damit der Befehl sicher ankommt/„hält“.
-    Nutzt arm_pub --stdin --repeat --hz.
+    Sendet sofort einmal über die persistente Session; die Wiederholungen laufen im Hintergrund
+    und enden, sobald ein neuer Befehl gesendet wird.
     """
-    assert len(angles_deg) == 7
-    data = {f"angle{i}": float(angles_deg[i]) for i in range(7)}
-    data.update({"mode": int(mode),
-                 "habr": [int(habr)]*7,
-                 "plyLevel": [int(ply)]*7})
-    payload = {"seq":4, "address":1, "funcode":2, "data": data}
-    return subprocess.run(
-        [ARM_PUB, "--stdin", "--repeat", str(int(repeats)), "--hz", str(int(hz))],
-        input=json.dumps(payload), text=True, env=_env()
-    ).returncode
+    return _publish(_multi_payload(angles_deg, mode=mode, habr=habr, ply=ply), repeats=repeats, hz=hz)
 
 def go_stow(torque=45000, verify=True):
     """
@@ -349,6 +669,120 @@ def compare_angles(target_angles, tol=2.0):
     # print("Diff:", diffs, "(OK)" if ok else "(außerhalb Toleranz)")
     return ok
 
+class ConvergenceTracker:
+    """
+    Konvergenzprüfung für einen Zielwinkel-Satz, Sample für Sample gefüttert (update(t, q)).
+    Erreicht = alle Gelenke in 'tol' UND in Ruhe (|v| <= settle_vel Grad/s über vel_window s).
+    needs_resend(now) meldet, wenn sich der größte Fehler 'stall_s' lang um weniger als
+    'progress_eps' Grad verbessert hat. Wird von move_and_wait und async_control benutzt.
+    """
+
+    def __init__(self, target_angles, t0, tol=2.0, settle_vel=3.0, vel_window=0.1,
+                 stall_s=0.5, progress_eps=0.2):
+        self.target = np.asarray(target_angles, dtype=float)
+        assert self.target.shape == (7,), "Erwarte 7 Gelenkwinkel (Grad)."
+        self.t0 = float(t0)
+        self.tol, self.settle_vel, self.vel_window = float(tol), float(settle_vel), float(vel_window)
+        self.stall_s, self.progress_eps = float(stall_s), float(progress_eps)
+        self.joint_times = [None] * 7
+        self.window = []                # (t, q) der letzten vel_window Sekunden
+        self.best_err = float("inf")
+        self.last_progress = self.t0
+        self.resends = 0
+        self.last_ts = None
+        self.q = None
+        self.reached = False
+
+    def update(self, t, q, now=None):
+        """Neues Sample einarbeiten; gibt True zurück, sobald konvergiert."""
+        self.last_ts, self.q = t, q
+        err = np.abs(q - self.target)
+        within = err <= self.tol
+        for j in range(7):
+            if not within[j]:
+                self.joint_times[j] = None
+            elif self.joint_times[j] is None:
+                self.joint_times[j] = t - self.t0
+
+        self.window.append((t, q))
+        while len(self.window) > 2 and t - self.window[1][0] >= self.vel_window:
+            self.window.pop(0)
+        dt = t - self.window[0][0]
+        settled = dt >= 0.5 * self.vel_window and \
+            float(np.max(np.abs(q - self.window[0][1]))) / dt <= self.settle_vel
+        if within.all() and settled:
+            self.reached = True
+        elif float(err.max()) < self.best_err - self.progress_eps:
+            self.best_err = float(err.max())
+            self.last_progress = t if now is None else now
+        return self.reached
+
+    def needs_resend(self, now):
+        """True (und Stall-Timer zurückgesetzt), wenn der Befehl nachgedrückt werden soll."""
+        if now - self.last_progress < self.stall_s:
+            return False
+        self.resends += 1
+        self.last_progress = now
+        return True
+
+    def result(self, now):
+        return {"reached": self.reached, "elapsed": now - self.t0,
+                "joint_times": [None if t is None else round(t, 4) for t in self.joint_times],
+                "resends": self.resends,
+                "final": None if self.q is None else [float(v) for v in self.q]}
+
+def move_and_wait(target_angles, tol=2.0, timeout=10.0, settle_vel=3.0, vel_window=0.1,
+                  stall_s=0.5, progress_eps=0.2, mode=1, habr=20, ply=3):
+    """
+    Fährt target_angles (7 Winkel, Grad) an und kehrt zurück, sobald alle Gelenke in 'tol'
+    liegen UND zur Ruhe gekommen sind (|v| <= settle_vel Grad/s, gemittelt über vel_window s).
+    Ereignisgesteuert über den JointStateMonitor – kein Polling, kein fester Sleep.
+    Der Befehl wird nur erneut gesendet, wenn sich der größte Fehler 'stall_s' lang um weniger
+    als 'progress_eps' Grad verbessert hat. timeout=None wartet unbegrenzt.
+    Endet get_arm_joint_angle unterwegs, gibt es RuntimeError (statt endlos ohne Samples zu warten).
+
+    Rückgabe: dict
+      reached      – True, wenn konvergiert
+      elapsed      – Sekunden bis Konvergenz bzw. Abbruch
+      joint_times  – pro Gelenk: Sekunden bis es (dauerhaft) in Toleranz war, sonst None
+      resends      – Anzahl erneut gesendeter Befehle
+      final        – letzte gemessene Winkel
+    """
+    mon = joint_monitor()
+    t0 = time.monotonic()
+    conv = ConvergenceTracker(target_angles, t0, tol=tol, settle_vel=settle_vel, vel_window=vel_window,
+                              stall_s=stall_s, progress_eps=progress_eps)
+    target = conv.target.tolist()
+    trace_motion = _TRACE.enabled                # arm.cmd_to_motion: erste Abweichung vom Ist beim Senden
+    s0 = mon.latest()
+    q_cmd = None if s0 is None else s0[1]        # noch kein Sample -> erstes Sample ist die Referenz
+    move_multi(target, mode=mode, habr=habr, ply=ply)
+
+    while True:
+        now = time.monotonic()
+        if timeout is not None and now - t0 >= timeout:
+            break
+        wait = stall_s if timeout is None else min(stall_s, t0 + timeout - now)
+        sample = mon.wait_for_new(after_ts=conv.last_ts, timeout=max(1e-3, wait))
+        if sample is None and not mon.running:
+            # wait_for_new kehrt dann sofort zurück -> ohne Abbruch Dauerschleife (timeout=None)
+            raise RuntimeError("get_arm_joint_angle ist beendet – keine Gelenkwinkel mehr.")
+        now = time.monotonic()
+        if trace_motion and sample is not None:
+            if q_cmd is None:
+                q_cmd = sample[1]
+            elif np.max(np.abs(sample[1] - q_cmd)) > progress_eps:
+                _TRACE.record("arm.cmd_to_motion", t0, sample[0])
+                trace_motion = False
+        if sample is not None and conv.update(*sample, now=now):
+            _TRACE.record("arm.cmd_to_settled", t0, now)
+            break
+        if conv.needs_resend(now):
+            # kein Fortschritt (oder keine Samples) -> Befehl nachdrücken
+            move_multi(target, mode=mode, habr=habr, ply=ply)
+
+    return conv.result(time.monotonic())
+
 # ---------- schneller Gesamttest ----------
 def quick_sanity():
     """
@@ -359,6 +793,8 @@ def quick_sanity():
     """
 
 
+startup_profile.mark("arm_control importiert")
+
 # ---------- direkter Start (zum Ausprobieren) ----------
 if __name__ == "__main__":
     quick_sanity()
@@ -1,9 +1,14 @@
 # arm_trajectory.py
 # Trajektorie aufzeichnen & 1:1 abspielen
+# Dateiformate: JSON (bisher) oder kompaktes .d1traj (siehe trajectory_file.py) – play* nimmt beide.
 
-import sys, os, json, time, pathlib, bisect, math
+import sys, os, json, time, pathlib, math, hashlib, contextlib
+import numpy as np
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))  # damit "import arm_control" lokal klappt
 import arm_control as ac
+import trajectory_file as tf
+import resample as rs
+from rate_scheduler import RateScheduler, format_stats
 
 # --- optionales Ruckig (für smooth playback) ---
 try:
@@ -33,8 +38,12 @@ def _best_existing_for_play(p: str) -> pathlib.Path:
     fallback = SCRIPT_DIR / pp.name
     return fallback if fallback.exists() else pp
 
+def _load_trajectory(p):
+    """Aufnahme (JSON oder .d1traj) laden -> (meta, ts, qs) als Arrays."""
+    return tf.load_any(p)
+
 def record(path, hz=15.0, warmup=0.2):
-    """Nimmt Gelenkwinkel mit ~hz auf und speichert als JSON.
+    """Nimmt Gelenkwinkel mit ~hz auf und speichert als JSON (bzw. binär bei Endung .d1traj).
        WICHTIG: setzt vorher torque_release(), damit der Arm weich bewegbar ist.
     """
     # Arm weich schalten – zwingend vor der Aufnahme
@@ -56,59 +65,33 @@ def record(path, hz=15.0, warmup=0.2):
     print(f"[REC] Läuft @ {hz:.1f} Hz – Stop mit Ctrl-C")
 
     samples = []
-    t0 = time.monotonic()
+    sched = RateScheduler(hz, late_policy="skip")
     try:
-        while True:
-            t = time.monotonic() - t0
+        for _ in sched.ticks():
+            t = sched.elapsed
             q = ac.read_angles_once(timeout=min(0.15, dt*0.9))
             if q and len(q) == 7:
                 samples.append({"t": round(t, 4), "q": [float(x) for x in q]})
-            time.sleep(max(0.0, dt - 0.005))
     except KeyboardInterrupt:
         pass
+    print(f"[REC] Takt: {sched.format_summary()}")
 
     if not samples:
         print("[REC] Keine Samples, Abbruch.")
         return
 
-    with open(path, "w") as f:
-        json.dump({"hz": hz, "samples": samples}, f, indent=2)
+    if path.suffix == tf.SUFFIX:
+        tf.save(path, [s["t"] for s in samples], [s["q"] for s in samples], hz=hz)
+    else:
+        with open(path, "w") as f:
+            json.dump({"hz": hz, "samples": samples}, f, indent=2)
     print(f"[REC] Gespeichert: {path} ({len(samples)} Samples, {samples[-1]['t']:.2f}s)")
 
-def _resample(samples, speed=1.0):
-    """Resample linear auf konstantes dt (durchschnittliches dt / speed), mit sauberem clamp am Ende."""
-    if len(samples) < 2:
-        raise ValueError("Zu wenige Samples in der Aufnahme (mind. 2).")
-
-    ts_raw = [s["t"] for s in samples]
-    qs_raw = [s["q"] for s in samples]
-
-    total_T = ts_raw[-1] - ts_raw[0]
-    avg_dt  = total_T / max(1, len(samples)-1)
-    dt_play = max(0.02, avg_dt / max(1e-6, float(speed)))  # mind. 50 Hz vermeiden — nimm 20–30ms
-
-    t_end = ts_raw[-1]
-    ts = []
-    t  = 0.0
-    while t < t_end:
-        ts.append(round(t, 5))
-        t += dt_play
-    ts.append(t_end)
-
-    resampled = []
-    for t in ts:
-        if t <= ts_raw[0]:
-            q = qs_raw[0]
-        elif t >= ts_raw[-1]:
-            q = qs_raw[-1]
-        else:
-            j = bisect.bisect_right(ts_raw, t) - 1
-            t0, t1 = ts_raw[j], ts_raw[j+1]
-            a = (t - t0) / max(1e-9, (t1 - t0))
-            q0, q1 = qs_raw[j], qs_raw[j+1]
-            q = [ (1-a)*q0[k] + a*q1[k] for k in range(7) ]
-        resampled.append({"t": t, "q": [float(x) for x in q]})
-    return resampled
+def _resample(ts_raw, qs_raw, speed=1.0, method="linear"):
+    """Resample auf konstantes dt (durchschnittliches dt / speed), mit sauberem clamp am Ende.
+       Vektorisiert über alle Gelenke (siehe resample.py) -> (ts (m,), qs (m, 7)) als Arrays.
+    """
+    return rs.resample(ts_raw, qs_raw, speed=speed, method=method)
 
 # ========= 1:1-Wiedergabe ohne Glättungs-/Resample-Verluste =========
 def play_exact(path, lock=50000, repeat_hz=15, repeats_per_point=3, mode=0, habr=0, ply=0):
@@ -119,15 +102,17 @@ def play_exact(path, lock=50000, repeat_hz=15, repeats_per_point=3, mode=0, habr
       - keinerlei Winkel-Rundung
       - Original-Zeitstempel exakt einhalten
       - pro Sample mehrere Wiederholungen @ repeat_hz, damit der Controller die Pose wirklich „hält“
+    Jedes Sample wird zu seiner Deadline t0 + (ts[i] - ts[0]) gesendet. arm_pub publiziert im Takt der
+    Aufnahme (höchstens 500 Hz, mindestens repeat_hz) und hält die Pose repeats_per_point Ticks @ repeat_hz
+    lang bzw. bis das nächste Sample kommt. Ist bei Verspätung schon das folgende Sample fällig, wird
+    das ältere ausgelassen (zeittreu).
     """
     p = _best_existing_for_play(path)
     if not p.exists():
         raise FileNotFoundError(f"Trajectory nicht gefunden: {path}\nAuch geprüft: {SCRIPT_DIR / pathlib.Path(path).name}")
 
-    with open(p, "r") as f:
-        data = json.load(f)
-    samples = data.get("samples", [])
-    if len(samples) < 2:
+    _, ts, qs = _load_trajectory(p)
+    if len(ts) < 2:
         print("[PLAY-EXACT] Aufnahme zu kurz.")
         return
 
@@ -135,32 +120,37 @@ def play_exact(path, lock=50000, repeat_hz=15, repeats_per_point=3, mode=0, habr
     ac.torque_lock(int(lock))
     time.sleep(0.2)
 
-    # Zeitplan relativ zu jetzt: t_schedule[i] = t0 + samples[i]["t"]
-    t0 = time.monotonic()
-
-    for i, s in enumerate(samples):
-        target_time = t0 + float(s["t"])
-
-        # Pose s["q"] mehrfach streamen, damit sie stabil anliegt
-        ac.move_multi_stream(s["q"], repeats=int(repeats_per_point), hz=int(repeat_hz),
-                             mode=int(mode), habr=int(habr), ply=int(ply))
-
-        # Bis zur nächsten Original-Zeitmarke warten (falls noch Zeit)
-        now = time.monotonic()
-        sleep_left = target_time - now
-        if i + 1 < len(samples):
-            next_target = t0 + float(samples[i+1]["t"])
-            sleep_left = max(0.0, next_target - time.monotonic())
-            if sleep_left > 0:
-                time.sleep(sleep_left)
+    # Zeitplan relativ zum Start: Sample i ist bei ts[i] - ts[0] fällig (Original-Zeitstempel)
+    t_rel = np.asarray(ts, dtype=np.float64) - float(ts[0])
+    steps = np.diff(t_rel)
+    steps = steps[steps > 0]
+    rec_hz = 1.0 / float(np.median(steps)) if steps.size else float(repeat_hz)
+    stream_hz = min(500.0, max(float(repeat_hz), rec_hz))
+    hold = int(math.ceil(int(repeats_per_point) * stream_hz / float(repeat_hz)))
+    deadlines_ns = (t_rel * 1e9).astype(np.int64)
+    n = len(t_rel)
+    sched = RateScheduler(stream_hz, late_policy="skip")
+
+    with ac.open_stream(hz=stream_hz, repeats=hold) as st:
+        st.start()                              # Prozessstart nicht im Zeitplan
+        t0_ns = sched.start().t0_ns
+        for i in range(n):
+            if i + 1 < n and time.monotonic_ns() >= t0_ns + deadlines_ns[i + 1]:
+                sched.missed += 1               # folgendes Sample schon fällig -> dieses auslassen
+                continue
+            sched.wait_until(t0_ns + deadlines_ns[i])
+            # Pose qs[i] an arm_pub geben – der Prozess hält sie im Takt, bis die nächste kommt
+            st.send_multi(qs[i].tolist(), mode=int(mode), habr=int(habr), ply=int(ply))
+    print(f"[PLAY-EXACT] Takt: {sched.format_summary()}")
 
     time.sleep(0.3)
     print(f"[PLAY-EXACT] Ende-Ist:", [round(x,1) for x in (ac.read_angles_once() or [])])
 
 # ========= „normale“ Wiedergabe (resampled) – kann glätten =========
-def play(path, speed=1.0, lock=45000, hold_each=0.0):
+def play(path, speed=1.0, lock=45000, hold_each=0.0, method="linear"):
     """
     Resampled Wiedergabe (für glatte, aber nicht 1:1) – lasse für 1:1 besser play_exact laufen.
+    method: "linear" | "pchip" (monoton, ohne Überschwingen) | "cubic" (Spline, braucht scipy)
     """
     p = _best_existing_for_play(path)
     if not p.exists():
@@ -169,35 +159,39 @@ def play(path, speed=1.0, lock=45000, hold_each=0.0):
             f"Auch geprüft: {SCRIPT_DIR / pathlib.Path(path).name}"
         )
 
-    with open(p, "r") as f:
-        data = json.load(f)
+    _, ts_raw, qs_raw = _load_trajectory(p)
     print(f"[PLAY] Quelle: {p}")
 
-    samples = data["samples"]
-    if len(samples) < 2:
+    if len(ts_raw) < 2:
         print("[PLAY] Aufnahme zu kurz.")
         return
 
     ac.torque_lock(int(lock))
     time.sleep(0.2)
 
-    resampled = _resample(samples, speed=speed)
+    ts, qs = _resample(ts_raw, qs_raw, speed=speed, method=method)
 
-    ts = [s["t"] for s in resampled]
     if len(ts) >= 2:
         step_dt = max(0.02, (ts[-1] - ts[0]) / max(1, len(ts)-1))
     else:
         step_dt = 0.05
 
     t_print = time.monotonic()
-    for s in resampled:
-        q = s["q"]                 # NICHT runden
-        ac.move_multi_stream(q, repeats=5, hz=15, mode=0, habr=0, ply=0)  # direkter & gehalten
-        now = time.monotonic()
-        if now - t_print > 0.5:
-            print(f"[PLAY] t={s['t']:.2f}s  q={[round(x,1) for x in q]}")
-            t_print = now
-        time.sleep(step_dt + max(0.0, hold_each))
+    end_hold = 5                       # Ticks, die die letzte Pose am Ende noch gehalten wird
+    # Ein arm_pub im Resample-Takt; repeats=0 -> jede Pose wird bis zur nächsten gehalten (auch über hold_each)
+    sched = RateScheduler(1.0 / (step_dt + max(0.0, hold_each)), late_policy="merge")
+    with ac.open_stream(hz=1.0 / step_dt, repeats=0) as st:
+        for k in sched.ticks(n=len(ts)):
+            q = qs[k].tolist()         # NICHT runden
+            st.send_multi(q, mode=0, habr=0, ply=0)  # direkter & gehalten
+            now = time.monotonic()
+            if now - t_print > 0.5:
+                print(f"[PLAY] t={ts[k]:.2f}s  q={[round(x,1) for x in q]}")
+                t_print = now
+        # letzte Pose halten: Stream end_hold Ticks offen lassen, arm_pub publiziert sie weiter
+        for _ in sched.ticks(n=len(ts) + end_hold):
+            pass
+    print(f"[PLAY] Takt: {sched.format_summary()}")
 
     time.sleep(0.3)
     print(f"[PLAY] Ende-Ist:", [round(x,1) for x in (ac.read_angles_once() or [])])
@@ -213,30 +207,31 @@ def _default_limits(dofs=7):
     j = [20.0] * dofs     # rad/s^3
     return v, a, j
 
-def _decimate_waypoints(samples, min_dt=0.04, min_delta=0.01):
+def _decimate_waypoints(ts, qs, min_dt=0.04, min_delta=0.01):
     """
-    Aus der Aufnahme schlanke Wegpunkte extrahieren:
+    Aus der Aufnahme (ts (n,), qs (n, 7)) schlanke Wegpunkte extrahieren:
       - min_dt: mind. Zeitabstand zum letzten gewählten Punkt
       - min_delta: mind. Änderung (max-norm über 7 Gelenke) in rad
     Dadurch vermeiden wir "Stop-and-Go" zwischen dicht beieinanderliegenden Punkten.
+    Rückgabe: Liste von {"t", "q"} (nur die gewählten Punkte werden kopiert).
     """
-    if not samples:
+    if len(ts) == 0:
         return []
-    keep = [samples[0]]
-    last_t = samples[0]["t"]
-    last_q = samples[0]["q"]
-    for s in samples[1:]:
-        if (s["t"] - last_t) < float(min_dt):
+    keep = [0]
+    last_t = float(ts[0])
+    last_q = qs[0]
+    for i in range(1, len(ts)):
+        if (float(ts[i]) - last_t) < float(min_dt):
             # nur nehmen, wenn wirklich nennenswerte Änderung
-            dq = max(abs(sq - lq) for sq, lq in zip(s["q"], last_q))
+            dq = float(np.max(np.abs(qs[i] - last_q)))
             if dq < float(min_delta):
                 continue
-        keep.append(s)
-        last_t = s["t"]
-        last_q = s["q"]
-    if keep[-1] is not samples[-1]:
-        keep.append(samples[-1])
-    return keep
+        keep.append(i)
+        last_t = float(ts[i])
+        last_q = qs[i]
+    if keep[-1] != len(ts) - 1:
+        keep.append(len(ts) - 1)
+    return [{"t": float(ts[i]), "q": [float(x) for x in qs[i]]} for i in keep]
 
 def _detect_units_and_limits(q0, dofs=7):
     """
@@ -257,13 +252,47 @@ def _detect_units_and_limits(q0, dofs=7):
         jmax = [30.0] * dofs      # rad/s^3
     return unit, vmax, amax, jmax
 
-
-def play_smooth(path, speed=1.0, lock=45000, control_hz=100, vmax=None, amax=None, jmax=None, mode=0, habr=0, ply=0):
+def joint_limits_deg(vmax=None, amax=None, jmax=None, gripper=None):
     """
-    Jerk-limitierte, stetige Wiedergabe via Ruckig (Online-OTG).
-    - speed: skaliert die Limits (v * speed, a * speed^2, j * speed^3) -> schneller/langsamer
-    - control_hz: Controller-Updatefrequenz (empfohlen 80–200 Hz)
-    - vmax/amax/jmax: optionale Listen mit 7 Einträgen (pro Gelenk). Sonst Default.
+    v/a/j-Grenzen in Grad für die 7 Achsen (Listen für Ruckig): Grad-Defaults aus
+    _detect_units_and_limits, gripper=(v, a, j) ersetzt die Defaults der Greiferachse.
+    vmax/amax/jmax (Skalar oder 7 Werte) überschreiben die Defaults komplett.
+    """
+    _, v, a, j = _detect_units_and_limits([90.0] * 7)
+    if gripper is not None:
+        v[6], a[6], j[6] = gripper
+    pick = lambda user, dflt: [float(x) for x in (dflt if user is None else np.broadcast_to(user, (7,)))]
+    return pick(vmax, v), pick(amax, a), pick(jmax, j)
+
+
+# --- Cache für vorgeplante Setpoint-Tabellen ---
+CACHE_DIR = SCRIPT_DIR / "cache"
+_PLAN_VERSION = 1
+
+def _file_digest(p, chunk=1 << 20):
+    """sha256 über den Dateiinhalt (Aufnahme-Hash für den Cache-Key)."""
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _plan_cache_path(p, key):
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return CACHE_DIR / f"{pathlib.Path(p).stem}-smooth-{digest}{tf.SUFFIX}"
+
+def _ruckig_finished(res):
+    """Version-kompatibles Finish-Handling."""
+    finished_enum = getattr(Result, 'Finished', None)
+    goal_enum = getattr(Result, 'GoalReached', None)
+    return (finished_enum is not None and res == finished_enum) or (goal_enum is not None and res == goal_enum)
+
+def plan_smooth(path, speed=1.0, control_hz=100, vmax=None, amax=None, jmax=None, use_cache=True):
+    """
+    Offline-Planung für play_smooth: Ruckig läuft VOR der Wiedergabe über alle dezimierten
+    Wegpunkte und erzeugt eine dichte Setpoint-Tabelle im control_hz-Raster.
+    Ergebnis wird als .d1traj in CACHE_DIR abgelegt; Key = Aufnahme-Hash + Limits + speed + control_hz.
+    Rückgabe: (ts (m,), qs (m, 7), info) – ts[i] = i / control_hz.
     """
     if not _RUCKIG_OK:
         raise RuntimeError("Ruckig ist nicht installiert. Bitte `pip install ruckig` ausführen.")
@@ -275,15 +304,12 @@ def play_smooth(path, speed=1.0, lock=45000, control_hz=100, vmax=None, amax=Non
             f"Auch geprüft: {SCRIPT_DIR / pathlib.Path(path).name}"
         )
 
-    with open(p, "r") as f:
-        data = json.load(f)
-    samples = data.get("samples", [])
-    if len(samples) < 2:
-        print("[PLAY-SMOOTH] Aufnahme zu kurz.")
-        return
+    _, ts, qs = _load_trajectory(p)
+    if len(ts) < 2:
+        raise ValueError("Zu wenige Samples in der Aufnahme (mind. 2).")
 
     dofs = 7
-    q0_recorded = samples[0]["q"]
+    q0_recorded = [float(x) for x in qs[0]]
 
     # Einheiten & Limits (autodetect, falls nicht vorgegeben)
     unit, vmax_auto, amax_auto, jmax_auto = _detect_units_and_limits(q0_recorded, dofs)
@@ -293,17 +319,22 @@ def play_smooth(path, speed=1.0, lock=45000, control_hz=100, vmax=None, amax=Non
 
     # speed-Skalierung (Zeit ~ 1/speed)
     s = float(max(1e-3, speed))
-    vmax_s = [v * s for v in vmax]
-    amax_s = [a * (s ** 2) for a in amax]
-    jmax_s = [j * (s ** 3) for j in jmax]
-
-    waypoints = _decimate_waypoints(samples, min_dt=1.0 / float(control_hz) * 3.0, min_delta=0.01)
-
-    print(
-        f"[PLAY-SMOOTH] Quelle: {p}  |  Wegpunkte: {len(waypoints)}  |  control_hz={control_hz}  |  speed={speed:.2f}  |  units={unit}")
-
-    ac.torque_lock(int(lock))
-    time.sleep(0.2)
+    vmax_s = [float(v) * s for v in vmax]
+    amax_s = [float(a) * (s ** 2) for a in amax]
+    jmax_s = [float(j) * (s ** 3) for j in jmax]
+
+    min_dt = 1.0 / float(control_hz) * 3.0
+    key = {"v": _PLAN_VERSION, "recording": _file_digest(p), "control_hz": float(control_hz),
+           "vmax": vmax_s, "amax": amax_s, "jmax": jmax_s, "min_dt": min_dt, "min_delta": 0.01}
+    cache = _plan_cache_path(p, key)
+    info = {"source": p, "unit": unit, "cache": cache, "cached": False, "waypoints": None}
+    if use_cache and cache.exists():
+        _, t_tab, q_tab = tf.load(cache)
+        info["cached"] = True
+        return t_tab, q_tab, info
+
+    waypoints = _decimate_waypoints(ts, qs, min_dt=min_dt, min_delta=0.01)
+    info["waypoints"] = len(waypoints)
 
     control_dt = 1.0 / float(control_hz)
     otg = Ruckig(dofs, control_dt)
@@ -318,11 +349,7 @@ def play_smooth(path, speed=1.0, lock=45000, control_hz=100, vmax=None, amax=Non
     inp.max_acceleration = amax_s
     inp.max_jerk = jmax_s
 
-    # Sauberes Streaming (Repeats leicht >1; Hz deckungsgleich mit control_hz)
-    stream_hz = int(max(20, min(500, control_hz)))
-    stream_repeats = 2
-
-    t_print = time.monotonic()
+    table = [waypoints[0]["q"][:]]
     for idx in range(1, len(waypoints)):
         inp.target_position = waypoints[idx]["q"][:]
         inp.target_velocity = [0.0] * dofs
@@ -330,38 +357,127 @@ def play_smooth(path, speed=1.0, lock=45000, control_hz=100, vmax=None, amax=Non
 
         while True:
             res = otg.update(inp, out)
-
-            # Pose streamen
-            ac.move_multi_stream(out.new_position, repeats=stream_repeats, hz=stream_hz,
-                                 mode=int(mode), habr=int(habr), ply=int(ply))
+            table.append(list(out.new_position))
 
             # Nächsten Schritt vorbereiten
             inp.current_position = out.new_position
             inp.current_velocity = out.new_velocity
             inp.current_acceleration = out.new_acceleration
 
-            # === Echtzeit-Takt ===
-            time.sleep(control_dt)
-
-            # Version-kompatibles Finish-Handling
-            finished_enum = getattr(Result, 'Finished', None)
-            goal_enum = getattr(Result, 'GoalReached', None)
-            if (finished_enum is not None and res == finished_enum) or (goal_enum is not None and res == goal_enum):
+            if _ruckig_finished(res):
                 break
             if res not in (getattr(Result, 'Working', res), getattr(Result, 'Busy', res)):
-                print(f"[PLAY-SMOOTH] OTG-Status unerwartet: {res} – Segment wird beendet.")
+                print(f"[PLAN-SMOOTH] OTG-Status unerwartet: {res} – Segment wird beendet.")
                 break
 
-            # Log-Throttle
-            now = time.monotonic()
-            if now - t_print > 0.5:
-                dbg = [round(x, 2) for x in out.new_position]
-                print(f"[PLAY-SMOOTH] Seg {idx}/{len(waypoints) - 1}  q≈{dbg}")
-                t_print = now
+    q_tab = np.asarray(table, dtype=np.float64)
+    t_tab = np.arange(q_tab.shape[0], dtype=np.float64) * control_dt
+    if use_cache:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tf.save(cache, t_tab, q_tab, hz=float(control_hz), units=unit)
+    return t_tab, q_tab, info
+
+def play_smooth(path, speed=1.0, lock=45000, control_hz=100, vmax=None, amax=None, jmax=None, mode=0, habr=0, ply=0,
+                use_cache=True, isolated=False, realtime=False):
+    """
+    Jerk-limitierte, stetige Wiedergabe via Ruckig.
+    Die Trajektorie wird vorab komplett geplant (plan_smooth, gecacht); während der Wiedergabe
+    wird nur noch zeitbasiert in die Setpoint-Tabelle indiziert – Python-Jitter verschiebt
+    damit einzelne Setpoints, dehnt aber nie die gesamte Bewegung.
+    - speed: skaliert die Limits (v * speed, a * speed^2, j * speed^3) -> schneller/langsamer
+    - control_hz: Controller-Updatefrequenz (empfohlen 80–200 Hz)
+    - vmax/amax/jmax: optionale Listen mit 7 Einträgen (pro Gelenk). Sonst Default.
+    - isolated: Setpoints in einem eigenen Kindprozess streamen (control_process.py) –
+      GC/GIL dieses Interpreters stören den Takt dann nicht mehr
+    - realtime: Echtzeit-Modus für die Schleife (realtime.py) – True oder dict mit
+      RealtimeSection-Argumenten (cpu, priority, lock_memory, freeze_gc)
+    """
+    try:
+        ts, qs, info = plan_smooth(path, speed=speed, control_hz=control_hz,
+                                   vmax=vmax, amax=amax, jmax=jmax, use_cache=use_cache)
+    except ValueError:
+        print("[PLAY-SMOOTH] Aufnahme zu kurz.")
+        return
+
+    n = len(ts)
+    src = "Cache" if info["cached"] else f"Wegpunkte: {info['waypoints']}"
+    print(
+        f"[PLAY-SMOOTH] Quelle: {info['source']}  |  {src}  |  Setpoints: {n}  |  control_hz={control_hz}  |  speed={speed:.2f}  |  units={info['unit']}")
+
+    if isolated:
+        from control_process import ControlProcess
+        with ControlProcess(arm_hz=control_hz, go2_hz=0, realtime=realtime) as ctl:
+            ac.torque_lock(int(lock))
+            time.sleep(0.2)
+            ctl.summary(reset=True)
+            ctl.stream_arm_table(ts, qs, mode=mode, habr=habr, ply=ply)
+            ctl.wait_idle(which=("arm",))
+            stats = ctl.summary()["arm"]
+        print(f"[PLAY-SMOOTH] Takt (Kindprozess): {format_stats(stats)}")
+        if stats.get("realtime"):
+            print(f"[PLAY-SMOOTH] Echtzeit: {stats['realtime']}")
+    else:
+        ac.torque_lock(int(lock))
+        time.sleep(0.2)
+        sched = stream_table(ts, qs, control_hz=control_hz, mode=mode, habr=habr, ply=ply, tag="PLAY-SMOOTH",
+                             realtime=realtime)
+        print(f"[PLAY-SMOOTH] Takt: {sched.format_summary()}")
+        if realtime:
+            print(f"[PLAY-SMOOTH] Echtzeit: {sched.realtime}")
 
     time.sleep(0.3)
     print(f"[PLAY-SMOOTH] Ende-Ist:", [round(x, 1) for x in (ac.read_angles_once() or [])])
 
+def stream_table(ts, qs, control_hz=100, mode=0, habr=0, ply=0, tag="STREAM", realtime=False, stream=None):
+    """
+    Vorgeplante Setpoint-Tabelle (ts[i] = i / control_hz) zeitbasiert streamen.
+    Setpoint k gehört zur Deadline t0 + k*dt; verspätete Ticks springen direkt zum aktuellen Index,
+    die Zielpose wird nie übersprungen. Gibt den RateScheduler (Takt-Statistik) zurück.
+    realtime: Schleife im Echtzeit-Modus (realtime.RealtimeSection); alle Kommandozeilen werden vorab
+    kodiert, pro Tick bleibt nur der Pipe-Write (keine Allokation, keine Fortschrittsausgabe).
+    Der Status steht danach in sched.realtime. stream: eigener Publisher statt ac.open_stream
+    (bleibt offen, der Aufrufer schließt ihn).
+    """
+    n = len(ts)
+    # Sauberes Streaming über EINEN arm_pub (Repeats leicht >1; Hz deckungsgleich mit control_hz)
+    stream_hz = int(max(20, min(500, control_hz)))
+    stream_repeats = 2
+    rt = None
+    if realtime:
+        from realtime import RealtimeSection
+        rt = RealtimeSection.from_option(realtime)
+        lines = [ac.encode_multi(q, mode=int(mode), habr=int(habr), ply=int(ply)) for q in qs.tolist()]
+
+    with contextlib.ExitStack() as stack:
+        # nur einen selbst geöffneten Publisher schließen; ein übergebener 'stream' bleibt offen
+        st = stream if stream is not None else stack.enter_context(
+            ac.open_stream(hz=stream_hz, repeats=stream_repeats))
+        sched = RateScheduler(control_hz, late_policy="skip")
+        k = -1
+        if rt is not None:
+            st.start()                          # Prozessstart nicht im ersten Tick
+            with rt:
+                for k in sched.ticks(n=n):
+                    st.send_line(lines[k])
+                if k != n - 1:
+                    st.send_line(lines[n - 1])
+            sched.realtime = rt.describe()
+            return sched
+
+        t_print = time.monotonic()
+        for k in sched.ticks(n=n):
+            q = qs[k].tolist()
+            st.send_multi(q, mode=int(mode), habr=int(habr), ply=int(ply))
+
+            now = time.monotonic()
+            if now - t_print > 0.5:
+                print(f"[{tag}] t={ts[k]:.2f}s  q≈{[round(x, 2) for x in q]}")
+                t_print = now
+        if k != n - 1:
+            # Zielpose nie überspringen, auch wenn der letzte Tick verspätet war
+            st.send_multi(qs[n - 1].tolist(), mode=int(mode), habr=int(habr), ply=int(ply))
+    return sched
+
 # ========= CLI =========
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -369,9 +485,17 @@ if __name__ == "__main__":
               f"  python {sys.argv[0]} record <out.json> [hz]\n"
               f"  python {sys.argv[0]} play <in.json> [speed] [lock]\n"
               f"  python {sys.argv[0]} play_exact <in.json> [lock] [repeat_hz] [repeats_per_point]\n"
-              f"  python {sys.argv[0]} play_smooth <in.json> [speed] [lock] [control_hz]")
+              f"  python {sys.argv[0]} play_smooth <in.json> [speed] [lock] [control_hz] [--isolated] [--realtime]\n"
+              f"  python {sys.argv[0]} plan_smooth <in.json> [speed] [control_hz]\n"
+              f"  python {sys.argv[0]} convert <in.json|in.d1traj> [out]")
         sys.exit(1)
 
+    isolated = "--isolated" in sys.argv     # play_smooth: Streaming im Kindprozess (control_process.py)
+    realtime = "--realtime" in sys.argv     # play_smooth: Echtzeit-Modus der Schleife (realtime.py)
+    for flag in ("--isolated", "--realtime"):
+        if flag in sys.argv:
+            sys.argv.remove(flag)
+
     cmd = sys.argv[1]
     if cmd == "record":
         if len(sys.argv) < 3:
@@ -408,10 +532,30 @@ if __name__ == "__main__":
         speed = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
         lock  = int(sys.argv[4])   if len(sys.argv) > 4 else 45000
         chz   = int(sys.argv[5])   if len(sys.argv) > 5 else 100
-        play_smooth(path, speed=speed, lock=lock, control_hz=chz)
+        play_smooth(path, speed=speed, lock=lock, control_hz=chz, isolated=isolated, realtime=realtime)
+
+    elif cmd == "plan_smooth":
+        if len(sys.argv) < 3:
+            print("plan_smooth: Pfad fehlt")
+            sys.exit(1)
+        path  = sys.argv[2]
+        speed = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+        chz   = int(sys.argv[4])   if len(sys.argv) > 4 else 100
+        t_tab, _, info = plan_smooth(path, speed=speed, control_hz=chz)
+        state = "aus Cache" if info["cached"] else "neu geplant"
+        print(f"[PLAN-SMOOTH] {len(t_tab)} Setpoints ({t_tab[-1]:.2f}s) {state}: {info['cache']}")
+
+    elif cmd == "convert":
+        if len(sys.argv) < 3:
+            print("convert: Pfad fehlt")
+            sys.exit(1)
+        src = _best_existing_for_play(sys.argv[2])
+        dst = sys.argv[3] if len(sys.argv) > 3 else None
+        out = tf.binary_to_json(src, dst) if tf.is_binary(src) else tf.json_to_binary(src, dst)
+        print(f"[CONVERT] {src} -> {out}")
 
     else:
-        print("Unbekannter Befehl (record|play|play_exact|play_smooth).")
+        print("Unbekannter Befehl (record|play|play_exact|play_smooth|plan_smooth|convert).")
         sys.exit(1)
 
 # Ausführen Beispiele:
@@ -419,3 +563,7 @@ if __name__ == "__main__":
 #   python3 arm_trajectory.py play_exact pick_and_place.json
 #   python3 arm_trajectory.py play pick_and_place.json 1.0 45000
 #   python3 arm_trajectory.py play_smooth pick_and_place.json 1.0 45000 120
+#   python3 arm_trajectory.py play_smooth pick_and_place.json 1.0 45000 120 --isolated   # Takt im Kindprozess
+#   python3 arm_trajectory.py play_smooth pick_and_place.json 1.0 45000 200 --realtime   # CPU-Pinning, SCHED_FIFO, ...
+#   python3 arm_trajectory.py plan_smooth pick_and_place.json 1.0 120   # vorab planen/cachen
+#   python3 arm_trajectory.py convert pick_and_place.json          # -> pick_and_place.d1traj
@@ -0,0 +1,265 @@
+# async_control.py
+# asyncio-Fassade für D1-Arm und Go2 auf EINER Event-Loop – ohne Thread/Prozess pro Bewegung.
+#
+#   AsyncArm  – Kommandos über die persistente arm_pub-Session von arm_control (Pipe-Writes),
+#               Gelenkwinkel aus dem JointStateMonitor; neue Samples wecken die Loop direkt.
+#   AsyncGo2  – SportClient-Aufrufe (blockierende RPCs) laufen in EINEM festen Worker-Thread,
+#               der Takt der Move-Schleife liegt auf der Event-Loop (RateScheduler.aticks).
+#
+# Primitive (alle awaitable):
+#   arm.move(q)                 – funcode-2-Kommando senden
+#   arm.wait_reached(q, tol)    – bis alle Gelenke in Toleranz und in Ruhe sind (wie ac.move_and_wait)
+#   arm.stream(setpoints, hz)   – Setpoint-Folge im festen Takt senden
+#   go2.velocity(vx, vy, vyaw, duration)  – Move() im Takt, danach StopMove()
+#   go2.move(dx, dy, dyaw)      – Strecke mit Geschwindigkeitsgrenzen wie in den Sequenz-Skripten
+#   go2.stream(velocities, hz)  – Geschwindigkeits-Tabelle (vx, vy, vyaw) im festen Takt
+#
+# Benutzung (Beispiel):
+#   from d1_servo_arm.async_control import AsyncArm, AsyncGo2
+#   async def main():
+#       go2 = AsyncGo2.connect("eno1")
+#       async with AsyncArm() as arm:
+#           await go2.prepare()
+#           await asyncio.gather(go2.move(dx=1.0), arm.move_and_wait(STAND_ANGLES))
+#       await go2.rest()
+#   asyncio.run(main())
+
+import sys
+import time
+import asyncio
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))  # damit "import arm_control" lokal klappt
+import arm_control as ac
+from rate_scheduler import RateScheduler
+
+class AsyncArm:
+    """
+    D1-Arm auf der Event-Loop, aufgesetzt auf arm_control: Kommandos gehen über die modulweite
+    arm_pub-Session, Gelenkwinkel kommen aus ac.joint_monitor(). start()/close() bzw. 'async with'
+    melden nur den Listener an/ab, der die Loop bei neuen Samples weckt – Session und Monitor
+    gehören arm_control und laufen bis zum Prozessende weiter.
+    """
+
+    def __init__(self):
+        self._pub = None
+        self._mon = None
+        self._loop = None
+        self._new = None
+        self.sched = None           # RateScheduler des letzten stream() (Takt-Statistik)
+
+    # ----- Lebenszyklus -----
+    async def start(self):
+        if self._mon is not None:
+            return self
+        self._loop = asyncio.get_running_loop()
+        self._new = asyncio.Event()
+        self._pub = ac._session().start()
+        self._mon = ac.joint_monitor()
+        self._mon.add_listener(self._on_sample)
+        return self
+
+    def _on_sample(self):
+        """Leser-Thread des Monitors: wartende Coroutinen auf der Loop wecken."""
+        try:
+            self._loop.call_soon_threadsafe(self._new.set)
+        except RuntimeError:
+            pass                        # Loop schon geschlossen
+
+    async def close(self):
+        mon, self._mon = self._mon, None
+        if mon is not None:
+            mon.remove_listener(self._on_sample)
+        self._pub = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+
+    # ----- Kommandos -----
+    async def publish(self, payload):
+        """Payload (dict) über die arm_pub-Session senden (ein Pipe-Write); 0 = OK."""
+        if self._pub is None:
+            await self.start()
+        return self._pub.send(payload)
+
+    async def move(self, angles_deg, mode=1, habr=20, ply=3):
+        """funcode 2: alle 7 Winkel (Grad) in einem Kommando."""
+        if self._pub is None:
+            await self.start()
+        return self._pub.send_multi(angles_deg, mode=mode, habr=habr, ply=ply)
+
+    async def stream(self, setpoints, hz=50, mode=0, habr=0, ply=0):
+        """
+        Setpoints ((n, 7) Grad) im RateScheduler-Takt senden; verspätete Ticks werden
+        übersprungen (zeittreu), der letzte Setpoint wird immer gesendet.
+        Gibt die Anzahl gesendeter Setpoints zurück (Takt-Statistik in self.sched).
+        """
+        q = np.asarray(setpoints, dtype=float).tolist()
+        n = len(q)
+        self.sched = sched = RateScheduler(hz, late_policy="skip")
+        k = -1
+        sent = 0
+        async for k in sched.aticks(n=n):
+            await self.move(q[k], mode=mode, habr=habr, ply=ply)
+            sent += 1
+        if n and k != n - 1:
+            await self.move(q[n - 1], mode=mode, habr=habr, ply=ply)
+            sent += 1
+        return sent
+
+    # ----- Zustand -----
+    def latest(self):
+        """Neuestes Sample als (t, q) oder None."""
+        return None if self._mon is None else self._mon.latest()
+
+    async def wait_for_new(self, after_ts=None, timeout=1.0):
+        """
+        Erstes Sample mit t > after_ts oder None nach 'timeout'.
+        Ist get_arm_joint_angle beendet, gibt es RuntimeError – sonst würden Warteschleifen
+        (wait_reached) ohne await weiterlaufen und die Event-Loop blockieren.
+        """
+        if self._mon is None:
+            await self.start()
+        deadline = self._loop.time() + float(timeout)
+        while True:
+            self._new.clear()
+            s = self._mon.latest()
+            if s is not None and (after_ts is None or s[0] > after_ts):
+                return s
+            if not self._mon.running:
+                raise RuntimeError("get_arm_joint_angle ist beendet – keine Gelenkwinkel mehr.")
+            left = deadline - self._loop.time()
+            if left <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._new.wait(), left)
+            except asyncio.TimeoutError:
+                pass
+
+    async def wait_reached(self, target_angles, tol=2.0, timeout=10.0, settle_vel=3.0, vel_window=0.1,
+                           stall_s=0.5, progress_eps=0.2, resend=True, mode=1, habr=20, ply=3):
+        """
+        Wartet, bis alle Gelenke in 'tol' und in Ruhe sind (siehe ac.ConvergenceTracker).
+        Mit resend=True wird das Kommando bei ausbleibendem Fortschritt erneut gesendet.
+        Rückgabe wie ac.move_and_wait (RuntimeError, wenn get_arm_joint_angle unterwegs endet).
+        """
+        t0 = time.monotonic()
+        conv = ac.ConvergenceTracker(target_angles, t0, tol=tol, settle_vel=settle_vel,
+                                     vel_window=vel_window, stall_s=stall_s, progress_eps=progress_eps)
+        while True:
+            now = time.monotonic()
+            if timeout is not None and now - t0 >= timeout:
+                break
+            wait = stall_s if timeout is None else min(stall_s, t0 + timeout - now)
+            sample = await self.wait_for_new(after_ts=conv.last_ts, timeout=max(1e-3, wait))
+            now = time.monotonic()
+            if sample is not None and conv.update(*sample, now=now):
+                break
+            if conv.needs_resend(now) and resend:
+                await self.move(conv.target, mode=mode, habr=habr, ply=ply)
+        return conv.result(time.monotonic())
+
+    async def move_and_wait(self, target_angles, tol=2.0, timeout=10.0, mode=1, habr=20, ply=3, **kwargs):
+        """move() + wait_reached() – asynchrones Gegenstück zu ac.move_and_wait."""
+        await self.move(target_angles, mode=mode, habr=habr, ply=ply)
+        return await self.wait_reached(target_angles, tol=tol, timeout=timeout,
+                                       mode=mode, habr=habr, ply=ply, **kwargs)
+
+
+class AsyncGo2:
+    """
+    Go2-SportClient auf der Event-Loop. Alle SDK-Aufrufe laufen nacheinander in einem einzigen,
+    dauerhaften Worker-Thread (die RPCs blockieren), damit die Loop frei bleibt.
+    """
+
+    def __init__(self, sport_client):
+        self.sport = ac.traced_sport(sport_client)      # Spans "sport.<Methode>" (im Worker-Thread)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="go2-sport")
+
+    @classmethod
+    def connect(cls, interface="eno1", timeout=10.0, init_channel=True):
+        """ChannelFactoryInitialize + SportClient.Init() wie in den Skripten."""
+        from unitree_sdk2py.core.channel import ChannelFactoryInitialize
+        from unitree_sdk2py.go2.sport.sport_client import SportClient
+        if init_channel:
+            ChannelFactoryInitialize(0, interface)
+        sport = SportClient()
+        sport.SetTimeout(timeout)
+        sport.Init()
+        return cls(sport)
+
+    async def call(self, name, *args):
+        """SportClient-Methode 'name' im Worker-Thread ausführen."""
+        fn = getattr(self.sport, name)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def stop(self):
+        try:
+            await self.call("StopMove")
+        except Exception:
+            pass
+
+    async def velocity(self, vx, vy=0.0, vyaw=0.0, duration=1.0, hz=10):
+        """Move(vx, vy, vyaw) im RateScheduler-Takt für 'duration' s, danach StopMove()."""
+        sched = RateScheduler(hz, late_policy="skip")           # verpasste Ticks auslassen
+        try:
+            async for _ in sched.aticks(duration=duration):
+                await self.call("Move", float(vx), float(vy), float(vyaw))
+        finally:
+            await self.stop()
+        return sched.elapsed
+
+    async def stream(self, velocities, hz=20):
+        """
+        Geschwindigkeits-Tabelle ((n, 3): vx, vy, vyaw) im RateScheduler-Takt senden,
+        verspätete Ticks überspringen, danach StopMove(). Gibt die tatsächliche Dauer zurück.
+        """
+        v = np.asarray(velocities, dtype=float).tolist()
+        sched = RateScheduler(hz, late_policy="skip")
+        try:
+            async for k in sched.aticks(n=len(v)):
+                await self.call("Move", *v[k])
+        finally:
+            await self.stop()
+        return sched.elapsed
+
+    async def move(self, dx=0.0, dy=0.0, dyaw=0.0, speed_x=0.35, speed_y=0.5, speed_yaw=2.5, hz=10):
+        """
+        Strecke dx/dy (m) bzw. Drehung dyaw (rad) fahren: Dauer aus der langsamsten Achse,
+        Geschwindigkeiten so skaliert, dass alle Achsen gleichzeitig fertig sind (wie move_go2).
+        """
+        move_time = max(abs(dx / speed_x), abs(dy / speed_y), abs(dyaw / speed_yaw))
+        if move_time <= 0:
+            return 0.0
+        return await self.velocity(dx / move_time, dy / move_time, dyaw / move_time,
+                                   duration=move_time, hz=hz)
+
+    async def prepare(self, settle_s=0.8):
+        """StopMove + RecoveryStand, dann 'settle_s' warten (wie prepare_for_motion)."""
+        await self.stop()
+        await self.call("RecoveryStand")
+        await asyncio.sleep(settle_s)
+
+    async def rest(self, settle_s=0.8):
+        """Stoppen, hinlegen, Dämpfung (wie safe_rest)."""
+        await self.stop()
+        await asyncio.sleep(0.1)
+        try:
+            await self.call("StandDown")
+            await asyncio.sleep(1.0)
+        except Exception:
+            pass
+        await asyncio.sleep(settle_s)
+        try:
+            await self.call("Damp")
+        except Exception:
+            pass
+
+    def close(self):
+        self._pool.shutdown(wait=False)
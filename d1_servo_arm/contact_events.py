@@ -0,0 +1,185 @@
+# contact_events.py
+# Kontakt-/Lastereignisse aus dem foot_force-Strom (rt/lowstate) – statt fester time.sleep-Pausen.
+#
+# Ausgewertet wird die Gesamtlast (Summe der 4 Fußkräfte, Rohwerte des Go2) je Sample im
+# Subscriber-Thread des Go2StateHub:
+#   "load_increase"  – Last dauerhaft (hold_s) um mehr als delta_on über der Referenz (z. B. Objekt gehoben)
+#   "load_decrease"  – Last dauerhaft um mehr als delta_on unter der Referenz (z. B. Objekt abgelegt)
+#   "settled"        – Streuung der Last über settle_s unter settle_std (z. B. nach RecoveryStand)
+# Hysterese: ein Kandidat verfällt, sobald die Abweichung unter delta_off fällt; nach einem Ereignis
+# wird erst wieder ausgelöst, wenn die Last zur Ruhe gekommen ist (neue Referenz = Ruhe-Mittelwert).
+#
+# Benutzung (Beispiel):
+#   from d1_servo_arm.contact_events import contact_detector
+#   det = contact_detector()
+#   det.on("load_increase", lambda ev: print("gehoben", ev["delta"]))
+#   sport_client.RecoveryStand()
+#   det.wait_settled(timeout=3.0)                     # sofort weiter, sobald der Roboter ruhig steht
+#   ev = await det.wait_async("load_decrease", 5.0)   # awaitable aus asyncio heraus
+
+import sys
+import time
+import asyncio
+import pathlib
+import threading
+from collections import deque
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))  # damit "import go2_state" lokal klappt
+from go2_state import state_hub
+
+EVENTS = ("load_increase", "load_decrease", "settled")
+
+class ContactEventDetector:
+    """
+    Zustandsautomat auf der Gesamt-Fußlast.
+      delta_on / delta_off – Schwelle zum Auslösen bzw. Verwerfen (Hysterese), Rohwert-Einheiten
+      hold_s               – so lange muss die Abweichung anliegen, bevor ein Lastereignis feuert
+      settle_std, settle_s – Ruhekriterium (Standardabweichung über das Fenster)
+    feed(t, foot_force) ist die eigentliche Auswertung und lässt sich auch ohne DDS füttern.
+    """
+
+    def __init__(self, delta_on=20.0, delta_off=10.0, hold_s=0.05, settle_std=4.0, settle_s=0.3):
+        self.delta_on, self.delta_off = float(delta_on), float(delta_off)
+        self.hold_s = float(hold_s)
+        self.settle_std, self.settle_s = float(settle_std), float(settle_s)
+        self._win = deque()              # (t, Gesamtlast) der letzten settle_s
+        self._callbacks = {e: [] for e in EVENTS}
+        self._cv = threading.Condition()
+        self._events = deque(maxlen=1024)   # letzte Ereignisse (chronologisch)
+        self.reference = None            # Ruhe-Mittelwert
+        self._candidate = None           # (Typ, seit t)
+        self._settled = False
+        self._ring = None
+
+    # ----- Anbindung an den Go2StateHub -----
+    def attach(self, hub):
+        """Als Listener auf hub.rings["low"] registrieren (ein Aufruf pro lowstate-Sample)."""
+        self._ring = hub.rings["low"]
+        self._ring.listeners.append(self._on_sample)
+        return self
+
+    def detach(self):
+        if self._ring is not None and self._on_sample in self._ring.listeners:
+            self._ring.listeners.remove(self._on_sample)
+        self._ring = None
+
+    def _on_sample(self, t, ring, i):
+        self.feed(t, ring.data["foot_force"][i])
+
+    # ----- Auswertung -----
+    def feed(self, t, foot_force):
+        ff = np.asarray(foot_force, dtype=float)
+        with self._cv:
+            fired = self._update(t, ff)
+            self._events.extend(fired)
+            self._cv.notify_all()           # auch ohne Ereignis: wait_settled prüft pro Sample
+        for ev in fired:
+            for fn in list(self._callbacks[ev["type"]]):
+                fn(ev)
+
+    def _update(self, t, ff):
+        total = float(ff.sum())
+        self._win.append((t, total))
+        while self._win and self._win[0][0] < t - self.settle_s:
+            self._win.popleft()
+
+        fired = []
+        vals = np.fromiter((v for _, v in self._win), dtype=float, count=len(self._win))
+        std = float(vals.std())
+        quiet = t - self._win[0][0] >= 0.9 * self.settle_s and std <= self.settle_std
+        if quiet and not self._settled:
+            self._settled = True
+            self.reference = float(vals.mean())
+            self._candidate = None
+            fired.append(self._event("settled", t, total, ff, std=std))
+        elif not quiet and std > 2.0 * self.settle_std:
+            self._settled = False
+
+        if self.reference is None:
+            return fired
+        delta = total - self.reference
+        kind = "load_increase" if delta > 0 else "load_decrease"
+        if abs(delta) >= self.delta_on:
+            if self._candidate is None or self._candidate[0] != kind:
+                self._candidate = (kind, t)
+            elif t - self._candidate[1] >= self.hold_s:
+                fired.append(self._event(kind, t, total, ff, delta=delta))
+                self.reference = None            # erst nach erneuter Ruhe wieder auslösen
+                self._candidate = None
+                self._settled = False
+        elif abs(delta) < self.delta_off:
+            self._candidate = None
+        return fired
+
+    def _event(self, kind, t, total, ff, **extra):
+        ev = {"type": kind, "t": t, "total": total, "feet": ff.copy(), "reference": self.reference}
+        ev.update(extra)
+        return ev
+
+    # ----- Benachrichtigung -----
+    def on(self, kind, callback):
+        """callback(ev) bei jedem Ereignis 'kind' (läuft im Subscriber-Thread – kurz halten)."""
+        if kind not in EVENTS:
+            raise ValueError(f"Unbekanntes Ereignis '{kind}' (erlaubt: {', '.join(EVENTS)}).")
+        self._callbacks[kind].append(callback)
+        return callback
+
+    def off(self, kind, callback):
+        if callback in self._callbacks[kind]:
+            self._callbacks[kind].remove(callback)
+
+    def wait_for(self, kind, timeout=None, since=None):
+        """Nächstes Ereignis 'kind' mit t >= since (Default: jetzt) oder None nach 'timeout'."""
+        since = time.monotonic() if since is None else since
+        match = lambda: next((e for e in self._events if e["type"] == kind and e["t"] >= since), None)
+        with self._cv:
+            self._cv.wait_for(lambda: match() is not None, timeout)
+            return match()
+
+    def wait_settled(self, timeout=None, min_wait_s=0.2):
+        """
+        Wartet, bis die Last über ein volles settle_s-Fenster NACH dem Aufruf (+ min_wait_s) ruhig ist –
+        unabhängig davon, ob vorher schon "settled" gemeldet wurde. Gibt die Streuung oder None zurück.
+        """
+        since = time.monotonic() + float(min_wait_s)
+
+        def quiet():                # unter self._cv aufgerufen -> Fenster wird nicht parallel verändert
+            w = [v for t, v in self._win if t >= since]
+            if len(w) < 2 or self._win[-1][0] - since < 0.9 * self.settle_s:
+                return None
+            std = float(np.std(w))
+            return std if std <= self.settle_std else None
+
+        with self._cv:
+            self._cv.wait_for(lambda: quiet() is not None, timeout)
+            return quiet()
+
+    async def wait_async(self, kind, timeout=None):
+        """Awaitable-Variante von wait_for (Ereignis kommt aus dem Subscriber-Thread)."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+
+        def cb(ev):
+            loop.call_soon_threadsafe(lambda: fut.done() or fut.set_result(ev))
+        self.on(kind, cb)
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.off(kind, cb)
+
+    def events(self, kind=None):
+        return [e for e in self._events if kind is None or e["type"] == kind]
+
+_DETECTOR = None
+_DETECTOR_LOCK = threading.Lock()
+
+def contact_detector(**kwargs):
+    """Modulweiter Detektor am gemeinsamen Go2StateHub (kwargs nur beim ersten Aufruf)."""
+    global _DETECTOR
+    with _DETECTOR_LOCK:
+        if _DETECTOR is None:
+            _DETECTOR = ContactEventDetector(**kwargs).attach(state_hub())
+        return _DETECTOR
@@ -0,0 +1,511 @@
+# control_process.py
+# Streaming-Schleifen (Arm-Setpoints, Go2-Move) in einem eigenen Kindprozess.
+# Im Hauptprozess laufen Plotten, IK, Logging und GC weiter, ohne den Takt zu stören: der
+# Kindprozess hat seinen eigenen GIL, seinen eigenen Heap und tut pro Tick nur "Setpoint holen, senden".
+#
+# Austausch ausschließlich über multiprocessing.shared_memory (pro Tick kein Pickling, keine Pipe):
+#   ShmRing "arm"        Haupt -> Kind   (t_fällig, 7 Winkel, mode, habr, ply)   SPSC-Warteschlange
+#   ShmRing "go2"        Haupt -> Kind   (t_fällig, vx, vy, vyaw)                SPSC-Warteschlange
+#   ShmRing "joint"      Kind -> Haupt   (t, 7 Winkel)                           neuester Zustand
+#   ShmRing "foot_force" Kind -> Haupt   (t, 4 Fußkräfte)  – nur mit echtem Go2 (rt/lowstate)
+#   ShmRing "odometry"   Kind -> Haupt   (t, x, y, yaw)
+#   ShmRing "go2_cmd"    Kind -> Haupt   (t, vx, vy, vyaw) tatsächlich gesendete Move()-Kommandos
+# Warteschlangen: Schreib- und Lesezähler im Kopf des Segments; das Kind nimmt pro Tick den neuesten
+# fälligen Setpoint (ältere werden übersprungen, wie late_policy="skip"). Zustandsringe: Sequenzzähler
+# pro Slot (vor dem Schreiben ungültig, danach = Sample-Nummer) -> Leser erkennen halb geschriebene Zeilen.
+# Über die Pipe laufen nur Start, Statistik und Stopp.
+#
+# Benutzung (Beispiel):
+#   from d1_servo_arm.control_process import ControlProcess
+#   with ControlProcess(arm_hz=100, interface="eno1") as ctl:     # Go2 mit eigenem SportClient im Kind
+#       ctl.stream_arm_table(ts, qs)                               # vorgeplante Tabelle (arm_trajectory)
+#       ctl.go2_move(0.2)                                          # Profil planen, Kind streamt Move()
+#       ctl.wait_idle()
+#       print(ctl.joint_latest(), ctl.foot_force_latest())
+#       print(ctl.summary())                                       # Takt-Statistik aus dem Kindprozess
+
+import os
+import sys
+import json
+import time
+import pathlib
+import threading
+import contextlib
+import subprocess
+from multiprocessing import shared_memory
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))  # damit "import rate_scheduler" lokal klappt
+from rate_scheduler import RateScheduler
+
+ARM_WIDTH = 11          # t, q0..q6, mode, habr, ply
+GO2_WIDTH = 4           # t, vx, vy, vyaw
+RINGS = {"arm": ARM_WIDTH, "go2": GO2_WIDTH, "joint": 8, "foot_force": 5, "odometry": 4, "go2_cmd": 4}
+
+class ShmRing:
+    """
+    Ringpuffer aus float64-Zeilen (Spalte 0 = Zeit, time.monotonic) in einem SharedMemory-Segment.
+    Kopf: int64 [Schreibzähler, Lesezähler, Breite, Kapazität], dann ein Sequenzzähler pro Slot, dann die Daten.
+      put(t, values)        – Warteschlange (ein Schreiber): False, wenn voll
+      pop_due(now, out)     – Warteschlange (ein Leser): neueste fällige Zeile nach out, ältere verwerfen
+      write(t, values)      – Zustandsring: überschreibt die älteste Zeile
+      latest(out)           – Zustandsring: neueste vollständige Zeile (Sequenzzähler geprüft)
+    name=None legt ein neues Segment an, sonst wird das bestehende angehängt (Kindprozess).
+    """
+
+    def __init__(self, width=None, capacity=4096, name=None):
+        self.owner = name is None
+        if self.owner:
+            size = 8 * (4 + capacity + capacity * width)
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            _untrack(self.shm)          # Aufräumen ist Sache des Besitzers
+        buf = self.shm.buf
+        self._hdr = np.ndarray(4, dtype=np.int64, buffer=buf)
+        if self.owner:
+            self._hdr[:] = (0, 0, width, capacity)
+        self.width, self.capacity = int(self._hdr[2]), int(self._hdr[3])
+        self._seq = np.ndarray(self.capacity, dtype=np.int64, buffer=buf, offset=32)
+        self.data = np.ndarray((self.capacity, self.width), dtype=np.float64, buffer=buf,
+                               offset=32 + 8 * self.capacity)
+        if self.owner:
+            self._seq[:] = -1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def written(self):
+        return int(self._hdr[0])
+
+    def pending(self):
+        """Noch nicht abgeholte Zeilen (Warteschlange)."""
+        return int(self._hdr[0]) - int(self._hdr[1])
+
+    def _store(self, n, t, values):
+        i = n % self.capacity
+        self._seq[i] = -1
+        self.data[i, 0] = t
+        self.data[i, 1:] = values
+        self._seq[i] = n
+        self._hdr[0] = n + 1            # erst jetzt sichtbar
+
+    # ----- Warteschlange -----
+    def put(self, t, values):
+        n = int(self._hdr[0])
+        if n - int(self._hdr[1]) >= self.capacity:
+            return False
+        self._store(n, t, values)
+        return True
+
+    def pop_due(self, now, out):
+        """Neueste Zeile mit t <= now nach out kopieren (True) und alle älteren verwerfen."""
+        w, r = int(self._hdr[0]), int(self._hdr[1])
+        last = -1
+        while r < w:
+            i = r % self.capacity
+            if self.data[i, 0] > now:
+                break
+            last = i
+            r += 1
+        if last < 0:
+            return False
+        out[:] = self.data[last]
+        self._hdr[1] = r
+        return True
+
+    def clear(self):
+        """Alle offenen Zeilen verwerfen (vom Schreiber aus: Lesezähler nachziehen)."""
+        self._hdr[1] = self._hdr[0]
+
+    # ----- Zustandsring -----
+    def write(self, t, values):
+        self._store(int(self._hdr[0]), t, values)
+
+    def latest(self, out=None):
+        """Neueste vollständige Zeile (Kopie bzw. in out) oder None."""
+        for _ in range(8):
+            n = int(self._hdr[0]) - 1
+            if n < 0:
+                return None
+            i = n % self.capacity
+            if out is None:
+                out = np.empty(self.width)
+            out[:] = self.data[i]
+            if self._seq[i] == n:
+                return out
+        return None
+
+    def since(self, after_n):
+        """Alle noch vorhandenen Zeilen mit Sample-Nummer >= after_n -> ((k, width)-Array, nächste Nummer)."""
+        w = int(self._hdr[0])
+        start = max(int(after_n), w - self.capacity)
+        idx = np.arange(start, w) % self.capacity
+        return self.data[idx].copy(), w
+
+    def close(self):
+        self._hdr = self._seq = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def _untrack(shm):
+    """Angehängtes Segment beim eigenen resource_tracker abmelden (Python < 3.13 löscht es sonst beim Prozessende)."""
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+# ---------- Kindprozess ----------
+def _child_main(cfg, names, cmd_in, reply_out):
+    """Kindprozess: Schleifen starten, dann Steuerzeilen (JSON) von cmd_in beantworten; EOF = Stopp."""
+    rings = {k: ShmRing(name=v) for k, v in names.items()}
+    stop = threading.Event()
+
+    def reply(status, data):
+        reply_out.write(json.dumps([status, data]) + "\n")
+        reply_out.flush()
+
+    loops, errors = {}, []
+    threads = []
+    st = None
+    ready = False
+    try:
+        import arm_control as ac
+        sport, odo = None, None
+        if cfg["sim_sport"] is not None:
+            from sim_robot import SimSportClient
+            sport = SimSportClient(**cfg["sim_sport"])
+        elif cfg["interface"]:
+            from unitree_sdk2py.core.channel import ChannelFactoryInitialize
+            from unitree_sdk2py.go2.sport.sport_client import SportClient
+            ChannelFactoryInitialize(0, cfg["interface"])
+            sport = SportClient()
+            sport.SetTimeout(10.0)
+            sport.Init()
+        if sport is not None:
+            odo = getattr(sport, "odometry", None)
+            if odo is None:
+                from go2_state import state_hub
+                hub = state_hub()
+                odo = hub.odometry
+                foot = rings["foot_force"]
+                hub.rings["low"].listeners.append(lambda t, ring, i: foot.write(t, ring.data["foot_force"][i]))
+
+        def run(name, fn, *args):
+            try:
+                fn(*args)
+            except Exception as e:
+                errors.append(f"{name}: {type(e).__name__}: {e}")
+                stop.set()
+
+        if cfg["arm_hz"]:
+            mon = ac.joint_monitor()
+            st = ac.open_stream(hz=int(max(20, min(500, cfg["arm_hz"]))), repeats=2)
+            st.start()
+            if mon.wait_for_new(timeout=cfg["start_timeout"]) is None:
+                raise RuntimeError("Keine Gelenkwinkel von get_arm_joint_angle.")
+            loops["arm"] = RateScheduler(cfg["arm_hz"], late_policy="skip", use_timerfd=cfg["use_timerfd"])
+            threads += [threading.Thread(target=run, name="ctl-arm",
+                                         args=("arm", _arm_loop, loops["arm"], st, rings, stop,
+                                               _realtime(cfg, "arm", loops))),
+                        threading.Thread(target=run, args=("joint", _joint_pump, mon, rings["joint"], stop),
+                                         name="ctl-joint")]
+        if sport is not None and cfg["go2_hz"]:
+            loops["go2"] = RateScheduler(cfg["go2_hz"], late_policy="skip", use_timerfd=cfg["use_timerfd"])
+            threads.append(threading.Thread(target=run, name="ctl-go2",
+                                            args=("go2", _go2_loop, loops["go2"], sport, odo, rings, stop,
+                                                  _realtime(cfg, "go2", loops))))
+        for th in threads:
+            th.start()
+        reply("ready", {"pid": os.getpid(), "loops": list(loops), "go2": sport is not None})
+        ready = True
+
+        for line in cmd_in:
+            req = json.loads(line)
+            if req["cmd"] == "summary":
+                reply("ok", _summaries(loops, errors, reset=req.get("reset", False)))
+            elif req["cmd"] == "stop":
+                break
+    except Exception as e:
+        errors.append(f"{type(e).__name__}: {e}")
+    finally:
+        stop.set()
+        for th in threads:
+            if th.ident is not None:        # nur gestartete Threads (Fehler beim Start -> Rest nie gestartet)
+                th.join(timeout=2.0)
+        try:
+            reply(*(("done", _summaries(loops, errors)) if ready else ("error", "; ".join(errors))))
+        except (BrokenPipeError, OSError):
+            pass
+        if st is not None:
+            st.close()
+        for r in rings.values():
+            r.close()
+
+def _summaries(loops, errors, reset=False):
+    out = {name: s.summary() for name, s in loops.items()}
+    if errors:
+        out["errors"] = list(errors)
+    if reset:
+        for s in loops.values():
+            s.reset_stats()
+    return out
+
+def _realtime(cfg, name, loops):
+    """
+    RealtimeSection für die Schleife 'name' im Kind (oder None); der Status landet in sched.realtime.
+    Getrennte CPUs je Schleife: "cpu" als Liste [arm, go2], sonst realtime.default_cpu(Position in loops).
+    """
+    if cfg["realtime"] is None:
+        return None
+    from realtime import RealtimeSection, default_cpu
+    kwargs = dict(cfg["realtime"])
+    cpu = kwargs.get("cpu")
+    if isinstance(cpu, (list, tuple)):
+        kwargs["cpu"] = cpu[("arm", "go2").index(name)]
+    elif cpu is None:
+        kwargs["cpu"] = default_cpu(list(loops).index(name))
+    return RealtimeSection(**kwargs)
+
+def _arm_loop(sched, st, rings, stop, rt=None):
+    q_in = rings["arm"]
+    row = np.zeros(ARM_WIDTH)
+    try:
+        with contextlib.ExitStack() as stack:
+            if rt is not None:
+                sched.realtime = stack.enter_context(rt).describe()
+            for _ in sched.ticks():
+                if stop.is_set():
+                    break
+                if q_in.pop_due(time.monotonic(), row):
+                    st.send_multi(row[1:8].tolist(), mode=int(row[8]), habr=int(row[9]), ply=int(row[10]))
+    finally:
+        sched.close()
+
+def _joint_pump(mon, ring, stop):
+    t_last = None
+    while not stop.is_set():
+        s = mon.wait_for_new(after_ts=t_last, timeout=0.1)
+        if s is not None:
+            t_last = s[0]
+            ring.write(s[0], s[1])
+
+def _go2_loop(sched, sport, odo, rings, stop, rt=None):
+    q_in, echo, odo_ring = rings["go2"], rings["go2_cmd"], rings["odometry"]
+    row = np.zeros(GO2_WIDTH)
+    hold_s = 1.5 / sched.hz             # kein neuer Setpoint innerhalb 1,5 Perioden -> StopMove
+    active, last_due = False, 0.0
+    try:
+        with contextlib.ExitStack() as stack:
+            if rt is not None:
+                sched.realtime = stack.enter_context(rt).describe()
+            for _ in sched.ticks():
+                if stop.is_set():
+                    break
+                now = time.monotonic()
+                if q_in.pop_due(now, row):
+                    sport.Move(float(row[1]), float(row[2]), float(row[3]))
+                    echo.write(time.monotonic(), row[1:])
+                    active, last_due = True, row[0]
+                elif active and now - last_due >= hold_s:
+                    sport.StopMove()
+                    echo.write(time.monotonic(), (0.0, 0.0, 0.0))
+                    active = False
+                if odo is not None:
+                    o = odo.latest()
+                    if o is not None:
+                        odo_ring.write(o[0], o[1:])
+    finally:
+        if active:
+            sport.StopMove()
+            echo.write(time.monotonic(), (0.0, 0.0, 0.0))
+        sched.close()
+
+# ---------- Hauptprozess ----------
+class ControlProcess:
+    """
+    Kindprozess mit Arm- und Go2-Streaming-Schleife (jeweils RateScheduler, late_policy="skip").
+      arm_hz        – Takt der Arm-Schleife (0 = kein Arm)
+      go2_hz        – Takt der Go2-Schleife (nur mit interface bzw. sim_sport)
+      interface     – Netzwerk-Interface: das Kind initialisiert DDS und einen eigenen SportClient
+      sim_sport     – dict mit Simulator-Parametern (sim_robot.SIM_DEFAULTS) -> SimSportClient statt Go2
+      capacity      – Zeilen je Ring (arm: 4096 bei 100 Hz = 40 s Vorlauf)
+      realtime      – beide Schleifen im Echtzeit-Modus (realtime.RealtimeSection: True oder dict mit Argumenten);
+                      jede Schleife bekommt eine eigene CPU: ohne "cpu" Arm die letzte, Go2 die vorletzte
+                      erlaubte CPU (realtime.default_cpu), sonst "cpu": [arm, go2]
+    Das Kind ist ein frischer Interpreter ("python3 control_process.py child ..."): keine geerbten Threads
+    oder DDS-Teilnehmer, und Skripte ohne __main__-Schutz werden nicht erneut ausgeführt.
+    """
+
+    def __init__(self, arm_hz=100, go2_hz=50, interface=None, sim_sport=None, capacity=4096,
+                 use_timerfd=False, start_timeout=10.0, realtime=False):
+        self.cfg = {"arm_hz": float(arm_hz or 0), "go2_hz": float(go2_hz or 0), "interface": interface,
+                    "sim_sport": sim_sport, "use_timerfd": bool(use_timerfd),
+                    "start_timeout": float(start_timeout),
+                    "realtime": (dict(realtime) if isinstance(realtime, dict) else {}) if realtime else None}
+        self.capacity = int(capacity)
+        self.rings = {}
+        self.info = None
+        self._proc = None
+        self._replies = None
+        self._lock = threading.Lock()
+        self._arm_row = np.zeros(ARM_WIDTH - 1)
+        self._last_due = {"arm": 0.0, "go2": 0.0}
+        self.final = None
+
+    def start(self):
+        if self._proc is not None:
+            return self
+        self.rings = {k: ShmRing(w, self.capacity) for k, w in RINGS.items()}
+        names = {k: r.name for k, r in self.rings.items()}
+        r_fd, w_fd = os.pipe()                  # Antworten; stdout des Kindes bleibt für print()
+        self._proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "child", str(w_fd),
+                                       json.dumps(self.cfg), json.dumps(names)],
+                                      stdin=subprocess.PIPE, text=True, bufsize=1, pass_fds=(w_fd,))
+        os.close(w_fd)
+        self._replies = os.fdopen(r_fd, "r")
+        try:
+            status, info = self._recv(self.cfg["start_timeout"] + 5.0)
+        except (TimeoutError, EOFError) as e:
+            self.close()
+            raise RuntimeError(f"Kontrollprozess meldet sich nicht: {e}") from None
+        if status != "ready":
+            self.close()
+            raise RuntimeError(f"Kontrollprozess konnte nicht starten: {info}")
+        self.info = info
+        return self
+
+    def _recv(self, timeout):
+        import select
+        if not select.select([self._replies], [], [], timeout)[0]:
+            raise TimeoutError(f"keine Antwort nach {timeout:.1f} s")
+        line = self._replies.readline()
+        if not line:
+            raise EOFError("Kontrollprozess beendet")
+        return json.loads(line)
+
+    def _alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    # ----- Setpoints -----
+    def _put(self, ring, t, values, timeout):
+        r = self.rings[ring]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not r.put(t, values):
+            if not self._alive():
+                raise RuntimeError("Kontrollprozess ist beendet.")
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Ring '{ring}' voll.")
+            time.sleep(0.002)
+        self._last_due[ring] = max(self._last_due[ring], t)
+
+    def push_arm(self, angles_deg, t_due=None, mode=1, habr=20, ply=3, timeout=None):
+        """Einen Arm-Setpoint (7 Winkel) für t_due (time.monotonic, None = sofort) einreihen."""
+        row = self._arm_row
+        row[:7] = angles_deg
+        row[7:] = (mode, habr, ply)
+        self._put("arm", time.monotonic() if t_due is None else float(t_due), row, timeout)
+
+    def push_go2(self, vx, vy, vyaw, t_due=None, timeout=None):
+        self._put("go2", time.monotonic() if t_due is None else float(t_due), (vx, vy, vyaw), timeout)
+
+    def stream_arm_table(self, ts, qs, mode=0, habr=0, ply=0, lead_s=0.05):
+        """
+        Vorgeplante Tabelle (ts ab 0 s, qs (n, 7)) ab jetzt + lead_s einreihen. Passt sie nicht in den Ring,
+        wird nachgeschoben, sobald Platz ist (blockiert dann bis kurz vor Ende). Gibt die Endzeit zurück.
+        """
+        t0 = time.monotonic() + float(lead_s)
+        for t, q in zip(ts, qs):
+            self.push_arm(q, t0 + float(t), mode=mode, habr=habr, ply=ply)
+        return t0 + float(ts[-1])
+
+    def go2_move(self, dx=0.0, dy=0.0, dyaw=0.0, profile="trapezoid", lead_s=0.02):
+        """Profil wie Go2VelocityStreamer planen und als Go2-Setpoints einreihen. Gibt die Endzeit zurück."""
+        from go2_motion import Go2VelocityStreamer
+        hz = self.cfg["go2_hz"]
+        v = Go2VelocityStreamer(None, hz=hz, profile=profile).plan(dx, dy, dyaw)
+        t0 = time.monotonic() + float(lead_s)
+        for k, vk in enumerate(v):
+            self.push_go2(*vk, t_due=t0 + k / hz)
+        return t0 + len(v) / hz
+
+    def clear(self):
+        """Offene Setpoints verwerfen (Arm hält die letzte Pose, Go2 stoppt nach 1,5 Perioden)."""
+        for ring in ("arm", "go2"):
+            self.rings[ring].clear()
+
+    def wait_idle(self, timeout=None, which=("arm", "go2")):
+        """Warten, bis alle eingereihten Setpoints fällig und abgeholt sind (False bei Timeout)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(self.rings[w].pending() or time.monotonic() < self._last_due[w] for w in which):
+            if not self._alive() or (deadline is not None and time.monotonic() > deadline):
+                return False
+            time.sleep(0.002)
+        return True
+
+    # ----- Zustand -----
+    def joint_latest(self):
+        """(t, [7 Winkel]) oder None."""
+        row = self.rings["joint"].latest()
+        return None if row is None else (float(row[0]), row[1:].tolist())
+
+    def foot_force_latest(self):
+        row = self.rings["foot_force"].latest()
+        return None if row is None else (float(row[0]), row[1:].tolist())
+
+    def odometry_latest(self):
+        """(t, x, y, yaw) wie go2_state.OdometryView.latest() oder None."""
+        row = self.rings["odometry"].latest()
+        return None if row is None else tuple(float(v) for v in row)
+
+    def go2_commands(self, after_n=0):
+        """Gesendete Move()-Kommandos (t, vx, vy, vyaw) ab Sample-Nummer after_n -> (Array, nächste Nummer)."""
+        return self.rings["go2_cmd"].since(after_n)
+
+    # ----- Steuerung -----
+    def summary(self, reset=False):
+        """Takt-Statistik (RateScheduler.summary) je Schleife aus dem Kindprozess."""
+        with self._lock:
+            self._proc.stdin.write(json.dumps({"cmd": "summary", "reset": bool(reset)}) + "\n")
+            status, out = self._recv(5.0)
+        if status != "ok":
+            raise RuntimeError(f"Kontrollprozess: {out}")
+        return out
+
+    def close(self, timeout=3.0):
+        """Schleifen stoppen (Go2: StopMove), Kindprozess beenden, Segmente freigeben. Gibt die letzte Statistik zurück."""
+        if self._proc is not None:
+            with self._lock:
+                try:
+                    self._proc.stdin.write(json.dumps({"cmd": "stop"}) + "\n")
+                    self._proc.stdin.close()
+                    status, out = self._recv(timeout)
+                    self.final = out if status == "done" else {"errors": [out]}
+                except (BrokenPipeError, OSError, TimeoutError, EOFError, ValueError):
+                    pass
+            try:
+                self._proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self._proc.terminate()
+                self._proc.wait()
+            self._replies.close()
+            self._proc = None
+        for r in self.rings.values():
+            r.close()
+        self.rings = {}
+        return self.final
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+if __name__ == "__main__" and len(sys.argv) == 5 and sys.argv[1] == "child":
+    with os.fdopen(int(sys.argv[2]), "w") as replies:
+        _child_main(json.loads(sys.argv[3]), json.loads(sys.argv[4]), sys.stdin, replies)
@@ -0,0 +1,287 @@
+# go2_motion.py
+# Profilgeführte Go2-Bewegungen über SportClient.Move() statt "10 Hz konstante Geschwindigkeit".
+#
+#   trapezoid(d, vmax, amax, dt)           – zeitoptimales Trapez-/Dreieckprofil (Integral exakt = d)
+#   scurve(d, vmax, amax, jmax, dt)        – ruckbegrenzt: Trapez geglättet mit Rechteck der Breite amax/jmax
+#   Go2VelocityStreamer                    – streamt ein Profil mit 'hz' auf dem RateScheduler,
+#                                            integriert die tatsächlich kommandierte Strecke
+#                                            (echte Sendezeitpunkte) und regelt Jitter/verpasste Ticks
+#                                            nach, sodass exakt auf der Zielstrecke gestoppt wird.
+#   sport_state()                          – Odometrie (t, x, y, yaw) aus go2_state.Go2StateHub
+#   move_distance(sport, dx, dy, dyaw)     – geschlossener Regelkreis auf der Go2-Odometrie:
+#                                            fährt bis zur Ankunft statt "Zeit = Strecke / Geschwindigkeit"
+#
+# Benutzung (Beispiel):
+#   from d1_servo_arm.go2_motion import Go2VelocityStreamer
+#   st = Go2VelocityStreamer(sport_client, hz=50, profile="scurve")
+#   report = st.move(dx=1.0)
+#   print(st.format_report(report))
+#   r = move_distance(sport_client, dx=1.0)        # Odometrie-geregelt, Ende bei Ankunft
+
+import sys
+import math
+import time
+import contextlib
+import pathlib
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))  # damit "import rate_scheduler" lokal klappt
+from rate_scheduler import RateScheduler
+from go2_state import state_hub
+
+# Grenzen (vx m/s, vy m/s, vyaw rad/s) – Geschwindigkeiten wie in den Skripten, Rest konservativ
+GO2_VMAX = (0.35, 0.5, 2.5)
+GO2_AMAX = (0.5, 0.5, 2.0)
+GO2_JMAX = (2.0, 2.0, 8.0)
+PROFILES = ("trapezoid", "scurve")
+
+def trapezoid(distance, vmax, amax, dt):
+    """Zeitoptimales Trapez-(bzw. Dreieck-)Profil über 'distance' -> Geschwindigkeiten im dt-Raster."""
+    d = abs(float(distance))
+    if d <= 0:
+        return np.zeros(0)
+    t_acc = vmax / amax
+    if amax * t_acc * t_acc > d:            # Dreieck: vmax wird nicht erreicht
+        t_acc = np.sqrt(d / amax)
+        vmax = amax * t_acc
+    t_flat = max(0.0, (d - amax * t_acc * t_acc) / vmax)
+    T = 2 * t_acc + t_flat
+    t = (np.arange(int(np.ceil(T / dt))) + 0.5) * dt
+    v = np.minimum.reduce([amax * t, np.full_like(t, vmax), amax * (T - t)]).clip(0.0)
+    return v * (d / (v.sum() * dt))          # Diskretisierung: Integral exakt = distance
+
+def scurve(distance, vmax, amax, jmax, dt):
+    """
+    Ruckbegrenztes Profil: Trapez gefaltet mit einem Rechteck der Breite amax/jmax
+    (Beschleunigung wird trapezförmig, Integral und vmax bleiben erhalten, Dauer + amax/jmax).
+    """
+    v = trapezoid(distance, vmax, amax, dt)
+    n = max(1, int(round(amax / jmax / dt)))
+    if len(v) == 0 or n == 1:
+        return v
+    return np.convolve(v, np.ones(n) / n)
+
+class Go2VelocityStreamer:
+    """
+    Go2-Strecken (dx, dy in m, dyaw in rad, Körperkoordinaten wie Move()) mit Geschwindigkeitsprofil.
+    Alle Achsen werden auf dieselbe Dauer synchronisiert (langsamste Achse bestimmt das Profil).
+      hz           – Senderate von Move() (Deadline-Scheduler)
+      profile      – "trapezoid" | "scurve"
+      gain         – Anteil des Strecken-Rückstands, der pro Tick nachgeregelt wird
+      realtime     – Schleife im Echtzeit-Modus (realtime.RealtimeSection: True oder dict mit Argumenten)
+    """
+
+    def __init__(self, sport_client, hz=50, profile="trapezoid", vmax=GO2_VMAX, amax=GO2_AMAX,
+                 jmax=GO2_JMAX, gain=0.5, tol=1e-3, max_extra_s=1.0, late_policy="skip", use_timerfd=False,
+                 realtime=False):
+        if profile not in PROFILES:
+            raise ValueError(f"Unbekanntes Profil '{profile}' (erlaubt: {', '.join(PROFILES)}).")
+        self.sport = sport_client
+        self.hz = float(hz)
+        self.profile = profile
+        self.vmax = np.asarray(vmax, dtype=float)
+        self.amax = np.asarray(amax, dtype=float)
+        self.jmax = np.asarray(jmax, dtype=float)
+        self.gain = float(gain)
+        self.tol = float(tol)
+        self.max_extra_s = float(max_extra_s)
+        self.late_policy = late_policy
+        self.use_timerfd = use_timerfd
+        self.realtime = realtime
+
+    def plan(self, dx=0.0, dy=0.0, dyaw=0.0):
+        """Geschwindigkeits-Tabelle (n, 3) im 1/hz-Raster; Integral je Achse = (dx, dy, dyaw)."""
+        d = np.array([dx, dy, dyaw], dtype=float)
+        mask = np.abs(d) > 0
+        if not mask.any():
+            return np.zeros((0, 3))
+        # Pfadparameter s in [0, 1]: Grenzen je Achse auf s umrechnen, engste gewinnt
+        vs = float(np.min(self.vmax[mask] / np.abs(d[mask])))
+        as_ = float(np.min(self.amax[mask] / np.abs(d[mask])))
+        dt = 1.0 / self.hz
+        if self.profile == "scurve":
+            js = float(np.min(self.jmax[mask] / np.abs(d[mask])))
+            s_dot = scurve(1.0, vs, as_, js, dt)
+        else:
+            s_dot = trapezoid(1.0, vs, as_, dt)
+        return s_dot[:, None] * d[None, :]
+
+    def move(self, dx=0.0, dy=0.0, dyaw=0.0):
+        """Strecke fahren (plan + stream) -> Bericht (siehe stream)."""
+        v = self.plan(dx, dy, dyaw)
+        return self.stream(v, target=(dx, dy, dyaw))
+
+    def stream(self, velocities, target=None):
+        """
+        Tabelle streamen. Tick k sendet velocities[k] plus Nachregelung des Rückstands zwischen
+        geplanter und tatsächlich kommandierter Strecke (Move() gilt bis zum nächsten Aufruf,
+        verspätete Ticks verlängern also die alte Geschwindigkeit). Nach dem Profil wird bis zu
+        max_extra_s nachgefahren, bis der Rest < tol ist, dann StopMove().
+
+        Bericht: target, commanded (integriert), error, planned_s, achieved_s, extra_ticks, sched.
+        """
+        v = np.asarray(velocities, dtype=float)
+        n = len(v)
+        dt = 1.0 / self.hz
+        plan_pos = np.cumsum(v, axis=0) * dt
+        goal = plan_pos[-1] if n else np.zeros(3)
+        if target is not None:
+            goal = np.asarray(target, dtype=float)
+        vlim = self.vmax
+        # Sollposition am Tick-Anfang und Regelanteil vorab; pro Tick nur In-place-Rechnungen
+        base = plan_pos - v * dt
+        gain_dt = self.gain / dt
+        rt = None
+        if self.realtime:
+            from realtime import RealtimeSection
+            rt = RealtimeSection.from_option(self.realtime)
+
+        sched = RateScheduler(self.hz, late_policy=self.late_policy, use_timerfd=self.use_timerfd)
+        commanded = np.zeros(3)
+        cmd = np.zeros(3)
+        v_prev = np.zeros(3)
+        tmp = np.zeros(3)
+        t_prev = None
+        extra = 0
+        max_extra = int(self.max_extra_s * self.hz)
+        try:
+            with contextlib.ExitStack() as stack:
+                if rt is not None:
+                    stack.enter_context(rt)
+                for k in sched.ticks():
+                    now = time.monotonic()
+                    if t_prev is not None:
+                        np.multiply(v_prev, now - t_prev, out=tmp)
+                        commanded += tmp
+                    t_prev = now
+                    if k < n:
+                        np.subtract(base[k], commanded, out=cmd)
+                        cmd *= gain_dt
+                        cmd += v[k]
+                    else:
+                        np.subtract(goal, commanded, out=cmd)
+                        np.abs(cmd, out=tmp)
+                        if (tmp <= self.tol).all() or extra >= max_extra:
+                            break
+                        cmd /= dt               # Rest innerhalb eines Ticks, begrenzt auf vmax
+                        extra += 1
+                    np.clip(cmd, -vlim, vlim, out=cmd)
+                    self.sport.Move(float(cmd[0]), float(cmd[1]), float(cmd[2]))
+                    v_prev[:] = cmd
+        finally:
+            if rt is not None:
+                sched.realtime = rt.describe()
+            self.sport.StopMove()
+            if t_prev is not None:
+                commanded += v_prev * (time.monotonic() - t_prev)
+            sched.close()
+
+        return {"target": goal.tolist(), "commanded": commanded.round(5).tolist(),
+                "error": (commanded - goal).round(5).tolist(), "planned_s": round(n * dt, 4),
+                "achieved_s": round(sched.elapsed, 4), "extra_ticks": extra, "sched": sched.summary()}
+
+    @staticmethod
+    def format_report(r):
+        s = r["sched"]
+        late = f", Verspätung p95={s['late_p95_us']:.0f}µs" if s.get("ticks") else ""
+        return (f"Ziel {r['target']}  kommandiert {r['commanded']}  Fehler {r['error']}  |  "
+                f"Dauer geplant {r['planned_s']:.2f}s, erreicht {r['achieved_s']:.2f}s "
+                f"(+{r['extra_ticks']} Ticks), verpasst {s['missed']}{late}")
+
+
+# ========= Odometrie-geregelte Strecken =========
+def sport_state():
+    """Odometrie (t, x, y, yaw) aus dem gemeinsamen Go2StateHub (ein Subscriber pro Prozess)."""
+    return state_hub().odometry
+
+def _wrap(a):
+    return (a + math.pi) % (2 * math.pi) - math.pi
+
+def move_distance(sport_client, dx=0.0, dy=0.0, dyaw=0.0, state=None, hz=50, kp=(1.5, 1.5, 2.0),
+                  vmax=GO2_VMAX, amax=GO2_AMAX, pos_tol=0.02, yaw_tol=0.03, settle_ticks=3,
+                  timeout=None, stale_s=0.25, realtime=False):
+    """
+    Strecke dx/dy (m, Körper-Frame beim Start) und Drehung dyaw (rad) auf der Odometrie fahren.
+    Regler je Achse: v = min(kp * e, sqrt(2 * amax * |e|), vmax) – proportional nahe am Ziel,
+    zeitoptimales Bremsen davor – plus Rampe (amax) auf dem Kommando. Fertig, sobald Position und
+    Yaw 'settle_ticks' Ticks lang in Toleranz sind; bei veralteter Odometrie (> stale_s) Abbruch.
+    realtime: Schleife im Echtzeit-Modus (realtime.RealtimeSection: True oder dict mit Argumenten).
+
+    Rückgabe: dict mit reached, duration, error_pos (m), error_yaw (rad), final (x, y, yaw),
+    trace (t, x, y, yaw, vx, vy, vyaw) als (n, 7)-Array und sched (Takt-Statistik).
+    """
+    state = state if state is not None else sport_state()
+    s0 = state.latest() or state.wait_for_new(timeout=1.0)
+    if s0 is None:
+        raise RuntimeError("Keine Daten auf rt/sportmodestate (Go2 verbunden?).")
+    _, x0, y0, yaw0 = s0
+    c, s = math.cos(yaw0), math.sin(yaw0)
+    goal = np.array([x0 + c * dx - s * dy, y0 + s * dx + c * dy])
+    yaw_goal = _wrap(yaw0 + dyaw)
+
+    kp, vmax, amax = (np.asarray(a, dtype=float) for a in (kp, vmax, amax))
+    if timeout is None:
+        nominal = max(abs(dx) / vmax[0], abs(dy) / vmax[1], abs(dyaw) / vmax[2])
+        timeout = 3.0 * nominal + 3.0
+    dt = 1.0 / float(hz)
+    rt = None
+    if realtime:
+        from realtime import RealtimeSection
+        rt = RealtimeSection.from_option(realtime)
+    sched = RateScheduler(hz, late_policy="skip")
+    # alle Puffer vorab: pro Tick nur In-place-Rechnungen und eine Zeile in 'trace'
+    trace = np.zeros((int(math.ceil(timeout * hz)) + 2, 7))
+    cmd, e, want, a, b = (np.zeros(3) for _ in range(5))
+    two_amax, step = 2 * amax, amax * dt
+    n = 0
+    settled = 0
+    reached = False
+    try:
+        with contextlib.ExitStack() as stack:
+            if rt is not None:
+                stack.enter_context(rt)
+            for _ in sched.ticks(duration=timeout):
+                t, x, y, yaw = state.latest()
+                if time.monotonic() - t > stale_s:
+                    print("[MOVE-DIST] Odometrie veraltet – Abbruch.")
+                    break
+                ex, ey = goal[0] - x, goal[1] - y
+                c, s = math.cos(yaw), math.sin(yaw)
+                e[0], e[1], e[2] = c * ex + s * ey, -s * ex + c * ey, _wrap(yaw_goal - yaw)   # Körper-Frame
+                if math.hypot(ex, ey) <= pos_tol and abs(e[2]) <= yaw_tol:
+                    settled += 1
+                    if settled >= settle_ticks:
+                        reached = True
+                        break
+                    want[:] = 0.0
+                else:
+                    settled = 0
+                    # want = sign(e) * min(kp * |e|, sqrt(2 * amax * |e|), vmax)
+                    np.abs(e, out=a)
+                    np.multiply(two_amax, a, out=b)
+                    np.sqrt(b, out=b)
+                    a *= kp
+                    np.minimum(a, b, out=a)
+                    np.minimum(a, vmax, out=a)
+                    np.sign(e, out=want)
+                    want *= a
+                np.subtract(want, cmd, out=a)
+                np.clip(a, -step, step, out=a)
+                cmd += a
+                sport_client.Move(float(cmd[0]), float(cmd[1]), float(cmd[2]))
+                if n < len(trace):
+                    row = trace[n]
+                    row[0], row[1], row[2], row[3] = t, x, y, yaw
+                    row[4:] = cmd
+                    n += 1
+    finally:
+        if rt is not None:
+            sched.realtime = rt.describe()
+        sport_client.StopMove()
+        sched.close()
+
+    t, x, y, yaw = state.latest()
+    return {"reached": reached, "duration": round(sched.elapsed, 4),
+            "error_pos": round(float(np.hypot(*(goal - (x, y)))), 4),
+            "error_yaw": round(_wrap(yaw_goal - yaw), 4), "final": (x, y, yaw),
+            "trace": trace[:n].copy(), "sched": sched.summary()}
@@ -0,0 +1,189 @@
+# go2_state.py
+# Gemeinsamer Zustands-Cache für den Go2: EIN Subscriber je Topic (rt/lowstate, rt/sportmodestate),
+# die benötigten Felder landen mit Zeitstempel (time.monotonic()) in vorallokierten NumPy-Ringpuffern.
+# Beliebig viele Leser teilen sich die Daten – ohne eigene Subscriber und ohne Polling.
+#
+#   lowstate    : foot_force (4), rpy/gyro/accel (3), Gelenke q/dq/tau (12), soc, power_v, power_a
+#   sportstate  : position (3), velocity (3), yaw_speed, rpy (3), body_height, foot_force (4)
+#
+# Benutzung (Beispiel):
+#   from d1_servo_arm.go2_state import state_hub
+#   hub = state_hub()                                   # startet die Subscriber einmal pro Prozess
+#   hub.latest("low")["foot_force"]
+#   w = hub.window(0.5, "low", fields=("foot_force",))  # letzte 0,5 s als Arrays
+#   hub.wait_until(lambda s: s["foot_force"].min() > 20, "low", timeout=2.0)
+
+import time
+import atexit
+import threading
+import numpy as np
+
+# Feldname -> Form eines Samples
+LOW_FIELDS = {"foot_force": (4,), "rpy": (3,), "gyro": (3,), "accel": (3,),
+              "q": (12,), "dq": (12,), "tau": (12,), "soc": (), "power_v": (), "power_a": ()}
+SPORT_FIELDS = {"position": (3,), "velocity": (3,), "yaw_speed": (), "rpy": (3,),
+                "body_height": (), "foot_force": (4,)}
+
+class StateRing:
+    """
+    Ringpuffer über mehrere Felder mit gemeinsamem Zeitstempel. Ein Schreiber (DDS-Callback),
+    Leser lock-frei; der Zähler wird erst nach dem Schreiben der Zeile erhöht.
+    Wartende werden über die Condition 'cv' geweckt, Listener (z. B. contact_events) direkt aufgerufen.
+    """
+
+    def __init__(self, fields, capacity=4096):
+        self.capacity = int(capacity)
+        self.fields = dict(fields)
+        self.ts = np.zeros(self.capacity, dtype=np.float64)
+        self.data = {k: np.zeros((self.capacity,) + tuple(shape), dtype=np.float64)
+                     for k, shape in self.fields.items()}
+        self.count = 0
+        self.cv = threading.Condition()
+        self.listeners = []             # fn(t, ring, index) – im Subscriber-Thread, pro Sample
+
+    def push(self, t, values):
+        i = self.count % self.capacity
+        for k, v in values.items():
+            self.data[k][i] = v
+        self.ts[i] = t
+        self.count += 1
+        with self.cv:
+            self.cv.notify_all()
+        for fn in self.listeners:
+            fn(t, self, i)
+
+    def latest(self, fields=None):
+        """Neuestes Sample als dict (inkl. "t") mit Kopien, oder None."""
+        n = self.count
+        if n == 0:
+            return None
+        i = (n - 1) % self.capacity
+        out = {k: self.data[k][i].copy() for k in (fields or self.fields)}
+        out["t"] = float(self.ts[i])
+        return out
+
+    def last(self, n, fields=None):
+        """Letzte n Samples (chronologisch) als dict von Arrays inkl. "t"."""
+        count = self.count
+        n = min(int(n), count, self.capacity)
+        idx = np.arange(count - n, count) % self.capacity
+        out = {k: self.data[k][idx] for k in (fields or self.fields)}
+        out["t"] = self.ts[idx]
+        return out
+
+    def window(self, seconds, fields=None, now=None):
+        """Alle Samples der letzten 'seconds' Sekunden als dict von Arrays inkl. "t"."""
+        now = time.monotonic() if now is None else now
+        count = self.count
+        n = min(count, self.capacity)
+        idx = np.arange(count - n, count) % self.capacity
+        keep = idx[self.ts[idx] >= now - float(seconds)]
+        out = {k: self.data[k][keep] for k in (fields or self.fields)}
+        out["t"] = self.ts[keep]
+        return out
+
+    def wait_for_new(self, after_ts=None, timeout=1.0):
+        """Neuestes Sample, sobald eines mit t > after_ts vorliegt; None nach 'timeout'."""
+        def fresh():
+            n = self.count
+            return n > 0 and (after_ts is None or self.ts[(n - 1) % self.capacity] > after_ts)
+        with self.cv:
+            if not self.cv.wait_for(fresh, timeout):
+                return None
+        return self.latest()
+
+    def wait_until(self, predicate, timeout=None):
+        """Bei jedem neuen Sample predicate(latest()) prüfen; erstes passendes Sample oder None."""
+        deadline = None if timeout is None else time.monotonic() + float(timeout)
+        seen = None
+        while True:
+            left = None if deadline is None else deadline - time.monotonic()
+            if left is not None and left <= 0:
+                return None
+            s = self.wait_for_new(after_ts=seen, timeout=left)
+            if s is None:
+                return None
+            if predicate(s):
+                return s
+            seen = s["t"]
+
+class OdometryView:
+    """(t, x, y, yaw)-Sicht auf den sportstate-Ring – Schnittstelle für go2_motion.move_distance."""
+
+    def __init__(self, ring):
+        self._ring = ring
+
+    def latest(self):
+        s = self._ring.latest(("position", "rpy"))
+        return None if s is None else (s["t"], float(s["position"][0]), float(s["position"][1]),
+                                       float(s["rpy"][2]))
+
+    def wait_for_new(self, after_ts=None, timeout=1.0):
+        return self.latest() if self._ring.wait_for_new(after_ts, timeout) is not None else None
+
+class Go2StateHub:
+    """Subscriber auf rt/lowstate und rt/sportmodestate mit je einem StateRing ("low", "sport")."""
+
+    def __init__(self, capacity=4096, low_topic="rt/lowstate", sport_topic="rt/sportmodestate"):
+        self.low_topic, self.sport_topic = low_topic, sport_topic
+        self.rings = {"low": StateRing(LOW_FIELDS, capacity), "sport": StateRing(SPORT_FIELDS, capacity)}
+        self.odometry = OdometryView(self.rings["sport"])
+        self._subs = []
+
+    def start(self):
+        if self._subs:
+            return self
+        from unitree_sdk2py.core.channel import ChannelSubscriber
+        from unitree_sdk2py.idl.unitree_go.msg.dds_ import LowState_, SportModeState_
+        low = ChannelSubscriber(self.low_topic, LowState_)
+        low.Init(self._on_low, 10)
+        sport = ChannelSubscriber(self.sport_topic, SportModeState_)
+        sport.Init(self._on_sport, 10)
+        self._subs = [low, sport]
+        return self
+
+    def _on_low(self, msg):
+        motors = msg.motor_state[:12]
+        imu = msg.imu_state
+        self.rings["low"].push(time.monotonic(), {
+            "foot_force": msg.foot_force, "rpy": imu.rpy, "gyro": imu.gyroscope, "accel": imu.accelerometer,
+            "q": [m.q for m in motors], "dq": [m.dq for m in motors], "tau": [m.tau_est for m in motors],
+            "soc": msg.bms_state.soc, "power_v": msg.power_v, "power_a": msg.power_a})
+
+    def _on_sport(self, msg):
+        self.rings["sport"].push(time.monotonic(), {
+            "position": msg.position, "velocity": msg.velocity, "yaw_speed": msg.yaw_speed,
+            "rpy": msg.imu_state.rpy, "body_height": msg.body_height, "foot_force": msg.foot_force})
+
+    # ----- Lesen -----
+    def latest(self, topic="low", fields=None):
+        return self.rings[topic].latest(fields)
+
+    def window(self, seconds, topic="low", fields=None):
+        return self.rings[topic].window(seconds, fields)
+
+    def wait_for_new(self, topic="low", after_ts=None, timeout=1.0):
+        return self.rings[topic].wait_for_new(after_ts, timeout)
+
+    def wait_until(self, predicate, topic="low", timeout=None):
+        return self.rings[topic].wait_until(predicate, timeout)
+
+    def close(self):
+        for sub in self._subs:
+            try:
+                sub.Close()
+            except Exception:
+                pass
+        self._subs = []
+
+_HUB = None
+_HUB_LOCK = threading.Lock()
+
+def state_hub():
+    """Modulweiter Go2StateHub (lazy gestartet, ein Satz Subscriber pro Prozess)."""
+    global _HUB
+    with _HUB_LOCK:
+        if _HUB is None:
+            _HUB = Go2StateHub().start()
+            atexit.register(_HUB.close)
+        return _HUB
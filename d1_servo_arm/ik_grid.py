@@ -0,0 +1,180 @@
+# ik_grid.py
+# Vorberechnetes IK-Gitter über den erreichbaren Arbeitsraum des D1 (feste Orientierung,
+# Standard: Greifer nach unten [0, 0, -1], Modus "Y" wie in den Sequenz-Skripten).
+#
+# Build-Schritt (einmalig, dauert einige Minuten):
+#   python3 ik_grid.py build [step_m]          -> cache/ik_grid_Y.npz
+# Laufzeit:
+#   grid = IKGrid.load()
+#   q = grid.lookup([0.3, 0.0, -0.2])          # trilinear interpoliert bzw. nächster Gitterpunkt (µs)
+#   q = grid.solve([0.3, 0.0, -0.2], chain=chain)   # per FK geprüft, sonst ikpy ("refine-on-miss")
+#
+# Gespeichert wird ein dichtes Gitter (nx, ny, nz, n_links) float32, NaN = nicht erreichbar.
+# Nächste-Nachbar-Suche über einen KD-Baum (scipy, optional) bzw. NumPy-Brute-Force.
+
+import sys
+import time
+import pathlib
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))  # damit "import kinematics" lokal klappt
+import kinematics as kin
+
+# --- optionales scipy (KD-Baum für die Nachbarsuche) ---
+try:
+    from scipy.spatial import cKDTree
+    _SCIPY_OK = True
+except Exception:
+    _SCIPY_OK = False
+
+SCRIPT_DIR = pathlib.Path(__file__).resolve().parent
+DEFAULT_PATH = SCRIPT_DIR / "cache" / "ik_grid_Y.npz"
+
+# Pick-and-Place-Bereich vor dem Arm (m, Arm-Koordinaten): x, y, z jeweils [min, max]
+DEFAULT_BOUNDS = ((0.10, 0.45), (-0.30, 0.30), (-0.30, 0.30))
+
+def _reached(chain, q, target, orientation, pos_tol, axis_tol, orientation_mode="Y"):
+    """Position (und bei Modus "X"/"Y"/"Z" die jeweilige Achse) nach FK innerhalb der Toleranz?"""
+    T = chain.forward_kinematics(q)
+    if np.linalg.norm(T[:3, 3] - target) > pos_tol:
+        return False
+    if orientation is not None and orientation_mode in ("X", "Y", "Z"):
+        axis = np.asarray(orientation, dtype=float)
+        col = "XYZ".index(orientation_mode)
+        return float(np.dot(T[:3, col], axis / np.linalg.norm(axis))) >= 1.0 - axis_tol
+    return True
+
+class IKGrid:
+    """Gitter aus IK-Lösungen mit O(1)-Zellzugriff und Nachbarsuche für Randbereiche."""
+
+    def __init__(self, origin, step, solutions, orientation=(0, 0, -1), orientation_mode="Y"):
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.step = float(step)
+        self.solutions = np.asarray(solutions, dtype=np.float32)
+        self.shape = np.array(self.solutions.shape[:3])
+        self.orientation = None if orientation is None else np.asarray(orientation, dtype=float)
+        self.orientation_mode = orientation_mode
+        self._valid = ~np.isnan(self.solutions[..., 0])
+        idx = np.argwhere(self._valid)
+        self._points = self.origin + idx * self.step
+        self._point_sol = self.solutions[self._valid]
+        self._tree = cKDTree(self._points) if (_SCIPY_OK and len(idx)) else None
+        self._chain = None                  # kin.load_chain() beim ersten solve() ohne chain
+
+    # ----- Build/IO -----
+    @classmethod
+    def build(cls, chain=None, bounds=DEFAULT_BOUNDS, step=0.025, orientation=(0, 0, -1),
+              orientation_mode="Y", pos_tol=1e-3, axis_tol=1e-3, verbose=True):
+        """IK auf allen Voxeln lösen (Schlangenlinien-Reihenfolge, Warmstart vom Nachbarn)."""
+        chain = chain if chain is not None else kin.load_chain()
+        axes = [np.arange(lo, hi + step / 2, step) for lo, hi in bounds]
+        n_links = len(chain.links)
+        sol = np.full((len(axes[0]), len(axes[1]), len(axes[2]), n_links), np.nan, dtype=np.float32)
+
+        seed = None
+        t0 = time.monotonic()
+        row = 0
+        for i in range(len(axes[0])):
+            js = range(len(axes[1])) if i % 2 == 0 else reversed(range(len(axes[1])))
+            for j in js:
+                ks = range(len(axes[2])) if row % 2 == 0 else reversed(range(len(axes[2])))
+                row += 1
+                for k in ks:
+                    target = np.array([axes[0][i], axes[1][j], axes[2][k]])
+                    kwargs = {} if seed is None else {"initial_position": seed}
+                    q = chain.inverse_kinematics(target, orientation, orientation_mode=orientation_mode, **kwargs)
+                    if _reached(chain, q, target, orientation, pos_tol, axis_tol, orientation_mode):
+                        sol[i, j, k] = q
+                        seed = q
+            if verbose:
+                done = (i + 1) / len(axes[0])
+                print(f"[IK-GRID] {done * 100:5.1f}%  ({time.monotonic() - t0:.0f}s)")
+        origin = [a[0] for a in axes]
+        return cls(origin, step, sol, orientation=orientation, orientation_mode=orientation_mode)
+
+    def save(self, path=DEFAULT_PATH):
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, origin=self.origin, step=self.step, solutions=self.solutions,
+                 orientation=np.array([]) if self.orientation is None else self.orientation,
+                 orientation_mode=np.array(self.orientation_mode or ""))
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        with np.load(path) as d:
+            ori = d["orientation"]
+            return cls(d["origin"], float(d["step"]), d["solutions"],
+                       orientation=ori if ori.size else None,
+                       orientation_mode=str(d["orientation_mode"]) or None)
+
+    # ----- Laufzeit -----
+    @property
+    def coverage(self):
+        """Anteil erreichbarer Voxel."""
+        return float(self._valid.mean())
+
+    def nearest(self, target):
+        """Lösung des nächstgelegenen erreichbaren Gitterpunkts -> (q, Abstand_m) oder (None, inf)."""
+        if not len(self._points):
+            return None, float("inf")
+        target = np.asarray(target, dtype=float)
+        if self._tree is not None:
+            dist, i = self._tree.query(target)
+        else:
+            d2 = np.sum((self._points - target) ** 2, axis=1)
+            i = int(np.argmin(d2))
+            dist = float(np.sqrt(d2[i]))
+        return self._point_sol[i].astype(np.float64), float(dist)
+
+    def lookup(self, target, max_dist=None):
+        """
+        Trilinear interpolierte Lösung, wenn alle 8 Eckpunkte der Zelle erreichbar sind,
+        sonst die Lösung des nächsten Gitterpunkts (None, wenn weiter als max_dist entfernt).
+        max_dist=None -> eine Zellendiagonale (step * sqrt(3)); np.inf = immer den nächsten Punkt.
+        """
+        if max_dist is None:
+            max_dist = self.step * np.sqrt(3.0)
+        target = np.asarray(target, dtype=float)
+        f = (target - self.origin) / self.step
+        c = np.floor(f).astype(int)
+        if np.all(c >= 0) and np.all(c + 1 < self.shape):
+            cell = self.solutions[c[0]:c[0] + 2, c[1]:c[1] + 2, c[2]:c[2] + 2]
+            if not np.isnan(cell[..., 0]).any():
+                u = f - c
+                cx = cell[0] * (1 - u[0]) + cell[1] * u[0]
+                cy = cx[0] * (1 - u[1]) + cx[1] * u[1]
+                return (cy[0] * (1 - u[2]) + cy[1] * u[2]).astype(np.float64)
+        q, dist = self.nearest(target)
+        if q is None or dist > max_dist:
+            return None
+        return q
+
+    def solve(self, target, refine=False, chain=None, max_dist=None, pos_tol=2e-3, axis_tol=1e-3):
+        """
+        Gitterlösung, per FK gegen das Ziel geprüft (pos_tol in m, axis_tol wie beim Build).
+        Liefert das Gitter nichts, verfehlt die Lösung das Ziel oder ist refine=True, wird ikpy
+        aufgerufen – mit der Gitterlösung als Startwert, falls vorhanden ("refine-on-miss").
+        """
+        target = np.asarray(target, dtype=float)
+        if chain is None:
+            if self._chain is None:
+                self._chain = kin.load_chain()
+            chain = self._chain
+        q = self.lookup(target, max_dist=max_dist)
+        if q is not None and not refine and _reached(chain, q, target, self.orientation, pos_tol, axis_tol,
+                                                     self.orientation_mode):
+            return q
+        kwargs = {} if q is None else {"initial_position": q}
+        return np.asarray(chain.inverse_kinematics(target, self.orientation,
+                                                   orientation_mode=self.orientation_mode, **kwargs), dtype=float)
+
+# ========= CLI =========
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print(f"Usage:\n  python {sys.argv[0]} build [step_m] [out.npz]")
+        sys.exit(1)
+    step = float(sys.argv[2]) if len(sys.argv) > 2 else 0.025
+    out = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_PATH
+    grid = IKGrid.build(step=step)
+    print(f"[IK-GRID] Gespeichert: {grid.save(out)}  (Abdeckung {grid.coverage * 100:.1f}%)")
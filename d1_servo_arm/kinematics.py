@@ -0,0 +1,308 @@
+# kinematics.py
+# Kinematik-Helfer für den D1-Arm auf Basis der ikpy-Kette aus urdf/d1.urdf.
+#
+#   load_chain()            – ikpy-Chain laden (Maske wie in den Sequenz-Skripten); vorgeparst aus
+#                             cache/chain-*.pkl, Schlüssel = mtime + SHA-256 der URDF
+#   preload_chain()         – dasselbe im Hintergrund-Thread (ikpy-Import ~1 s überlappt mit dem Start)
+#   IKSolver                – gepufferte/gebatchte IK: LRU-Cache auf quantisierte Ziele,
+#                             Warmstart aus IK-Gitter (ik_grid.py), letzter Lösung bzw. nächstem Nachbarn
+#   to_servo_angles(q, g)   – ikpy-Lösung (rad, 8 Werte) -> 7 Servo-Winkel in Grad (+ Greifer)
+#   ForwardKinematics       – FK direkt aus der URDF, vektorisiert über ganze (N, 8)-Gelenkarrays
+#
+# Benutzung (Beispiel):
+#   import d1_servo_arm.kinematics as kin
+#   ik = kin.IKSolver(orientation=[0, 0, -1], orientation_mode="Y")
+#   sols = ik.solve_many([[0.3, 0, -0.23], [0.3, 0, 0.2]])    # vor dem Timer
+#   ac.move_multi(kin.to_servo_angles(sols[0], gripper=20))
+
+import os
+import pickle
+import hashlib
+import threading
+import pathlib
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+URDF_PATH = os.environ.get("D1_URDF", str(PROJECT_ROOT / "urdf" / "d1.urdf"))
+
+# Basis (fix) + joint_0..joint_5 aktiv, joint_end (Greiferspitze) inaktiv – wie in den Skripten
+ACTIVE_LINKS_MASK = [True, True, True, True, True, True, True, False]
+
+CHAIN_CACHE_DIR = pathlib.Path(__file__).resolve().parent / "cache"
+_CHAIN_FORMAT = 1
+
+class _LinkFrame:
+    """
+    Numerische, picklebare Gelenk-Transformation für ikpy-URDFLinks – ersetzt die per sympy.lambdify
+    erzeugte Funktion (die ~20 ms pro Glied kostet und sich nicht serialisieren lässt).
+    Rotation um Achse k (Rodrigues): T(theta) = O + sin(theta) O K + (1 - cos(theta)) O K^2,
+    O (Ursprung) und die Produkte werden einmal vorberechnet.
+    """
+
+    def __init__(self, link):
+        from ikpy.utils import geometry
+        O = geometry.homogeneous_translation_matrix(*link.origin_translation) @ \
+            geometry.cartesian_to_homogeneous(geometry.rpy_matrix(*link.origin_orientation))
+        self.O, self.OK, self.OKK, self.shift = O, None, None, None
+        if link.has_rotation:
+            x, y, z = np.asarray(link.rotation, dtype=float) / np.linalg.norm(link.rotation)
+            K = np.zeros((4, 4))
+            K[:3, :3] = [[0, -z, y], [z, 0, -x], [-y, x, 0]]
+            self.OK, self.OKK = O @ K, O @ K @ K
+        if link.has_translation:
+            self.shift = O[:, :3] @ np.asarray(link.translation, dtype=float)
+
+    def __call__(self, theta, mu):
+        if self.OK is not None:
+            return self.O + np.sin(theta) * self.OK + (1.0 - np.cos(theta)) * self.OKK
+        T = self.O.copy()
+        if self.shift is not None:
+            T[:, 3] += self.shift * mu
+        return T
+
+def _chain_cache_path(urdf_path):
+    p = pathlib.Path(urdf_path)
+    h = hashlib.sha256(p.read_bytes())
+    h.update(repr((p.stat().st_mtime_ns, ACTIVE_LINKS_MASK, _CHAIN_FORMAT)).encode())
+    return CHAIN_CACHE_DIR / f"chain-{h.hexdigest()[:16]}.pkl"
+
+def load_chain(urdf_path=URDF_PATH, use_cache=True):
+    """
+    ikpy-Chain des D1 laden. Die URDF wird ohne sympy geparst (Gelenk-Transformationen über
+    _LinkFrame, Ergebnis identisch) und als Pickle in cache/ abgelegt; beim nächsten Start genügt
+    pickle.load. Geänderte URDF (mtime oder Inhalt) -> neuer Schlüssel -> neu parsen.
+    """
+    path = _chain_cache_path(urdf_path) if use_cache else None
+    if path is not None and path.exists():
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            pass                            # defekt oder andere ikpy-Version -> neu erzeugen
+    from ikpy.chain import Chain
+    chain = Chain.from_urdf_file(str(urdf_path), active_links_mask=ACTIVE_LINKS_MASK, symbolic=False)
+    for link in chain.links:
+        if hasattr(link, "use_symbolic_matrix"):
+            link.symbolic_transformation_matrix = _LinkFrame(link)
+            link.use_symbolic_matrix = True
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(chain, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    return chain
+
+def preload_chain(urdf_path=URDF_PATH):
+    """load_chain im Hintergrund starten; .result() liefert die Chain (wartet ggf. auf den Rest)."""
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chain-preload")
+    fut = pool.submit(load_chain, urdf_path)
+    pool.shutdown(wait=False)
+    return fut
+
+def from_servo_angles(angles_deg):
+    """
+    Servo-Winkel in Grad ((7,) bzw. (N, 7), Greifer an letzter Stelle) -> ikpy-Gelenkvektoren
+    in rad ((8,) bzw. (N, 8)): Basis und Endglied = 0, Greifer entfällt.
+    """
+    a = np.radians(np.asarray(angles_deg, dtype=float))
+    single = a.ndim == 1
+    a = np.atleast_2d(a)
+    q = np.zeros((a.shape[0], len(ACTIVE_LINKS_MASK)))
+    q[:, 1:7] = a[:, :6]
+    return q[0] if single else q
+
+def to_servo_angles(joint_angles, gripper):
+    """
+    ikpy-Gelenkvektor (rad, inkl. Basis und Endglied) -> 7 Servo-Winkel in Grad:
+    Basis/Endglied weg, auf 2 Stellen runden, Greiferwert anhängen.
+    """
+    deg = [float(round(w, 2)) for w in np.degrees(joint_angles)]
+    return deg[1:-1] + [gripper]
+
+class IKSolver:
+    """
+    IK-Service für die D1-Kette.
+      - solve(): LRU-Cache auf (quantisierte Position, quantisierte Orientierung, Modus);
+        Wiederholte Posen kosten nur einen Dict-Lookup.
+      - Warmstart: explizites seed, sonst Gitterlösung (optionales IKGrid, siehe ik_grid.py),
+        sonst die Lösung des nächstgelegenen gecachten Ziels, sonst die zuletzt berechnete Lösung.
+      - solve_many(): Batch in Reihenfolge, jede Lösung startet von der vorherigen.
+      - prefetch(): Batch im Hintergrund lösen (Future), damit der erste Solve die Bewegung nicht aufhält.
+    """
+
+    def __init__(self, chain=None, orientation=(0, 0, -1), orientation_mode="Y",
+                 quant_m=1e-4, quant_orient=1e-3, cache_size=1024, grid=None):
+        self.chain = chain if chain is not None else load_chain()
+        self.grid = grid
+        self.orientation = orientation
+        self.orientation_mode = orientation_mode
+        self.quant_m = float(quant_m)
+        self.quant_orient = float(quant_orient)
+        self.cache_size = int(cache_size)
+        self._cache = OrderedDict()     # key -> (position (3,), Lösung (n_links,))
+        self._last = None
+        self._lock = threading.Lock()
+        self._pool = None
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, position, orientation, mode):
+        pk = tuple(np.round(np.asarray(position, dtype=float) / self.quant_m).astype(np.int64).tolist())
+        if orientation is None:
+            ok = None
+        else:
+            ok = tuple(np.round(np.asarray(orientation, dtype=float).ravel() / self.quant_orient)
+                       .astype(np.int64).tolist())
+        return pk, ok, mode
+
+    def _grid_seed(self, position, orientation, mode):
+        """Gitterlösung als Startwert, falls das Gitter für diese Orientierung gebaut wurde."""
+        g = self.grid
+        if g is None or mode != g.orientation_mode or g.orientation is None or orientation is None:
+            return None
+        if np.shape(orientation) != g.orientation.shape or not np.allclose(orientation, g.orientation):
+            return None
+        return g.lookup(position)
+
+    def _nearest_seed(self, position):
+        if not self._cache:
+            return self._last
+        entries = list(self._cache.values())
+        pts = np.array([e[0] for e in entries])
+        i = int(np.argmin(np.sum((pts - position) ** 2, axis=1)))
+        return entries[i][1]
+
+    def solve(self, position, orientation=None, orientation_mode=None, seed=None):
+        """IK für ein Ziel -> Gelenkvektor (rad, Länge = Anzahl Links)."""
+        orientation = self.orientation if orientation is None else orientation
+        mode = self.orientation_mode if orientation_mode is None else orientation_mode
+        position = np.asarray(position, dtype=float)
+        key = self._key(position, orientation, mode)
+
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                self._last = hit[1]
+                return hit[1].copy()
+            if seed is None:
+                seed = self._grid_seed(position, orientation, mode)
+            if seed is None:
+                seed = self._nearest_seed(position)
+
+        kwargs = {}
+        if seed is not None:
+            kwargs["initial_position"] = np.asarray(seed, dtype=float)
+        sol = np.asarray(self.chain.inverse_kinematics(
+            position, orientation, orientation_mode=mode, **kwargs), dtype=float)
+
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = (position.copy(), sol)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self._last = sol
+        return sol.copy()
+
+    def solve_many(self, positions, orientations=None, orientation_mode=None):
+        """Batch in Reihenfolge lösen (Warmstart von der jeweils vorherigen Lösung) -> (n, n_links)."""
+        out = []
+        prev = None
+        for i, pos in enumerate(positions):
+            ori = None if orientations is None else orientations[i]
+            sol = self.solve(pos, ori, orientation_mode, seed=prev)
+            out.append(sol)
+            prev = sol
+        return np.array(out)
+
+    def prefetch(self, positions, orientations=None, orientation_mode=None):
+        """solve_many im Hintergrund starten; gibt ein Future zurück (Ergebnis landet auch im Cache)."""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ik-prefetch")
+        return self._pool.submit(self.solve_many, list(positions), orientations, orientation_mode)
+
+    def cache_info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache),
+                "max_size": self.cache_size}
+
+
+# ========= Vorwärtskinematik (analytisch, vektorisiert) =========
+def _rpy_matrix(r, p, y):
+    """URDF-rpy -> Rotationsmatrix Rz(y) @ Ry(p) @ Rx(r)."""
+    cr, sr, cp, sp, cy, sy = np.cos(r), np.sin(r), np.cos(p), np.sin(p), np.cos(y), np.sin(y)
+    return np.array([[cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+                     [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+                     [-sp, cp * sr, cp * cr]])
+
+def _urdf_joints(urdf_path):
+    """Gelenke der seriellen Kette ab der Wurzel: Liste (name, typ, origin 4x4, achse (3,))."""
+    root = ET.parse(str(urdf_path)).getroot()
+    joints = root.findall("joint")
+    by_parent = {j.find("parent").get("link"): j for j in joints}
+    children = {j.find("child").get("link") for j in joints}
+    link = next(l.get("name") for l in root.findall("link") if l.get("name") not in children)
+
+    chain = []
+    while link in by_parent:
+        j = by_parent[link]
+        origin = j.find("origin")
+        xyz = [float(v) for v in (origin.get("xyz", "0 0 0") if origin is not None else "0 0 0").split()]
+        rpy = [float(v) for v in (origin.get("rpy", "0 0 0") if origin is not None else "0 0 0").split()]
+        axis_el = j.find("axis")
+        axis = np.array([float(v) for v in (axis_el.get("xyz") if axis_el is not None else "1 0 0").split()])
+        T = np.eye(4)
+        T[:3, :3] = _rpy_matrix(*rpy)
+        T[:3, 3] = xyz
+        chain.append((j.get("name"), j.get("type"), T, axis / np.linalg.norm(axis)))
+        link = j.find("child").get("link")
+    return chain
+
+class ForwardKinematics:
+    """
+    FK der D1-Kette ohne ikpy: die festen Gelenk-Ursprünge werden einmal aus der URDF gelesen,
+    danach wird ein ganzes Array von Gelenkvektoren in einem NumPy-Durchlauf ausgewertet.
+    Gelenkvektoren im ikpy-Format (rad, Länge 8: Basis, joint_0..joint_5, joint_end) –
+    Ergebnis identisch zu chain.forward_kinematics (Abweichung < 1e-9).
+    """
+
+    def __init__(self, urdf_path=URDF_PATH):
+        self.joints = _urdf_joints(urdf_path)
+        self.n_links = len(self.joints) + 1          # + fixe Basis (ikpy: "Base link")
+
+    def __call__(self, joints):
+        """(8,) -> (4, 4) bzw. (N, 8) -> (N, 4, 4) homogene Endeffektor-Transformationen."""
+        q = np.asarray(joints, dtype=float)
+        single = q.ndim == 1
+        q = np.atleast_2d(q)
+        if q.shape[1] != self.n_links:
+            raise ValueError(f"Erwarte {self.n_links} Werte pro Gelenkvektor (ikpy-Format), nicht {q.shape[1]}.")
+        n = q.shape[0]
+        T = np.broadcast_to(np.eye(4), (n, 4, 4)).copy()
+        for i, (_, jtype, origin, axis) in enumerate(self.joints):
+            T = T @ origin
+            if jtype in ("revolute", "continuous"):
+                T[:, :3, :3] = T[:, :3, :3] @ _axis_rotations(axis, q[:, i + 1])
+            elif jtype == "prismatic":
+                T[:, :3, 3] += (T[:, :3, :3] @ axis) * q[:, i + 1, None]
+        return T[0] if single else T
+
+    def positions(self, joints):
+        """Nur die Endeffektor-Positionen: (N, 8) -> (N, 3)."""
+        return self(np.atleast_2d(joints))[:, :3, 3]
+
+    def servo_positions(self, angles_deg):
+        """Positionen direkt aus Servo-Winkeln in Grad ((N, 7), z. B. eine Aufnahme) -> (N, 3)."""
+        return self.positions(from_servo_angles(np.atleast_2d(angles_deg)))
+
+def _axis_rotations(axis, theta):
+    """Rodrigues für viele Winkel um dieselbe Achse -> (N, 3, 3)."""
+    x, y, z = axis
+    K = np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+    s = np.sin(theta)[:, None, None]
+    c = np.cos(theta)[:, None, None]
+    return np.eye(3) + s * K + (1.0 - c) * (K @ K)
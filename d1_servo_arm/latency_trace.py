@@ -0,0 +1,276 @@
+# latency_trace.py
+# Latenz-Messung entlang Kommando -> Bewegung -> Rückmeldung.
+# Spans (Stufe, t0, t1 in time.monotonic()) landen in einem vorallokierten NumPy-Ringpuffer
+# (kein Lock, kein dict pro Span); ausgewertet wird erst beim Export.
+#
+# Gemessene Stufen (sobald aktiviert):
+#   arm.payload         – Payload-Dict bauen (_multi_payload / _single_payload)
+#   arm.encode          – json.dumps der Kommandozeile(n)
+#   arm.spawn           – arm_pub-Prozess starten (Popen)
+#   arm.publish         – Pipe-Write zu arm_pub (inkl. Halte-Wiederholungen)
+#   arm.cmd_to_motion   – move_and_wait: Senden bis erste messbare Bewegung (Controller-Reaktion)
+#   arm.cmd_to_settled  – move_and_wait: Senden bis in Toleranz und in Ruhe
+#   joint.first_sample  – get_arm_joint_angle starten bis erstes Sample (Prozess + DDS-Discovery)
+#   joint.parse         – eine Feedback-Zeile parsen und in den Ringpuffer schreiben
+#   joint.interval      – Abstand zweier Feedback-Samples
+#   sport.<Methode>     – SportClient-Aufrufe über traced_sport() (Move, StopMove, RecoveryStand, ...)
+#
+# Aktivieren per Umgebung (Skripte bleiben unverändert):
+#   D1_TRACE=1 D1_TRACE_OUT=trace.json python3 "Robot movements/Efficiency Measurement/sequence_1_arm_and_go2.py"
+#   (Endung .csv -> Zusammenfassung als CSV; Export beim Prozessende)
+#
+# Benutzung (Beispiel):
+#   from d1_servo_arm.latency_trace import tracer, traced_sport
+#   tr = tracer().enable()
+#   sport_client = traced_sport(SportClient())
+#   with tr.span("ik.solve"):
+#       q = ik.solve(p)
+#   print(tr.format_report())
+#   tr.export_json("trace.json"); tr.export_csv("trace.csv")
+#   python3 latency_trace.py trace.json              # gespeicherte Zusammenfassung anzeigen
+
+import os
+import csv
+import sys
+import json
+import time
+import atexit
+import itertools
+import threading
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("_tracer", "_sid", "t0")
+
+    def __init__(self, tracer, sid):
+        self._tracer, self._sid = tracer, sid
+
+    def __enter__(self):
+        self.t0 = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._tracer._write(self._sid, self.t0, time.monotonic())
+        return False
+
+class Tracer:
+    """
+    Span-Puffer mit fester Kapazität (älteste Spans werden überschrieben).
+      span(stage)           – Context-Manager; deaktiviert ein gemeinsames No-op-Objekt
+      record(stage, t0, t1) – Span mit bereits gemessenen Zeitpunkten eintragen (t1 = jetzt)
+      traced(stage)         – Decorator
+      summary()             – pro Stufe n, mean, p50/p95/p99, max (ms)
+      histogram(stage)      – (counts, edges_ms)
+    Mehrere Schreib-Threads sind erlaubt: der Slot kommt aus itertools.count (atomar unter dem GIL).
+    """
+
+    def __init__(self, capacity=65536, enabled=False):
+        self.capacity = int(capacity)
+        self.enabled = bool(enabled)
+        self._sid = np.zeros(self.capacity, dtype=np.int32)
+        self._t = np.zeros((self.capacity, 2), dtype=np.float64)
+        self._counter = itertools.count()
+        self._count = 0
+        self._names = []                 # Stufen-ID -> Name
+        self._ids = {}                   # Name -> Stufen-ID
+        self._lock = threading.Lock()    # nur für neue Stufennamen
+
+    def enable(self, on=True):
+        self.enabled = bool(on)
+        return self
+
+    def reset(self):
+        with self._lock:
+            self._counter = itertools.count()
+            self._count = 0
+
+    def _stage(self, name):
+        sid = self._ids.get(name)
+        if sid is None:
+            with self._lock:
+                sid = self._ids.setdefault(name, len(self._names))
+                if sid == len(self._names):
+                    self._names.append(name)
+        return sid
+
+    def _write(self, sid, t0, t1):
+        n = next(self._counter)
+        i = n % self.capacity
+        self._sid[i] = sid
+        self._t[i, 0] = t0
+        self._t[i, 1] = t1
+        self._count = max(self._count, n + 1)
+
+    # ----- Aufzeichnen -----
+    def span(self, stage):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, self._stage(stage))
+
+    def record(self, stage, t0, t1=None):
+        if self.enabled:
+            self._write(self._stage(stage), t0, time.monotonic() if t1 is None else t1)
+
+    def traced(self, stage):
+        def deco(fn):
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                t0 = time.monotonic()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(stage, t0)
+            wrapper.__name__, wrapper.__doc__ = fn.__name__, fn.__doc__
+            return wrapper
+        return deco
+
+    # ----- Auswerten -----
+    def spans(self, stage=None):
+        """Gespeicherte Spans chronologisch (nach Schreibreihenfolge): (names, t0, t1)."""
+        count = self._count
+        n = min(count, self.capacity)
+        idx = np.arange(count - n, count) % self.capacity
+        sid, t = self._sid[idx], self._t[idx]
+        if stage is not None:
+            keep = sid == self._ids.get(stage, -1)
+            sid, t = sid[keep], t[keep]
+        names = [self._names[s] for s in sid]
+        return names, t[:, 0].copy(), t[:, 1].copy()
+
+    def durations_ms(self, stage):
+        _, t0, t1 = self.spans(stage)
+        return (t1 - t0) * 1000.0
+
+    def stages(self):
+        return list(self._names)
+
+    def summary(self):
+        """{stage: {n, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}} für alle Stufen mit Spans."""
+        out = {}
+        for name in self.stages():
+            d = self.durations_ms(name)
+            if len(d):
+                out[name] = _stats(d)
+        return out
+
+    def histogram(self, stage, bins=20):
+        """Histogramm der Dauern einer Stufe (ms): (counts, edges)."""
+        counts, edges = np.histogram(self.durations_ms(stage), bins=bins)
+        return counts, edges
+
+    # ----- Export -----
+    def export_json(self, path, bins=20, raw=False):
+        """Zusammenfassung + Histogramme (+ optional alle Spans) als JSON."""
+        hist = {}
+        for name in self.summary():
+            counts, edges = self.histogram(name, bins)
+            hist[name] = {"counts": counts.tolist(), "edges_ms": np.round(edges, 4).tolist()}
+        doc = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "capacity": self.capacity,
+               "recorded": self._count, "summary": self.summary(), "histograms": hist}
+        if raw:
+            names, t0, t1 = self.spans()
+            doc["spans"] = [[s, float(a), float(b)] for s, a, b in zip(names, t0, t1)]
+        with open(path, "w") as f:
+            json.dump(doc, f, indent=2)
+        return path
+
+    def export_csv(self, path, raw=False):
+        """Zusammenfassung je Stufe als CSV – oder mit raw=True jeden Span (stage, t0, t1, ms)."""
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            if raw:
+                w.writerow(["stage", "t0", "t1", "duration_ms"])
+                names, t0, t1 = self.spans()
+                for s, a, b in zip(names, t0, t1):
+                    w.writerow([s, f"{a:.6f}", f"{b:.6f}", f"{(b - a) * 1000.0:.4f}"])
+            else:
+                w.writerow(["stage", "n", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+                for name, st in self.summary().items():
+                    w.writerow([name] + [st[k] for k in ("n", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")])
+        return path
+
+    def export(self, path):
+        """Nach Dateiendung: .csv -> export_csv, sonst export_json."""
+        return self.export_csv(path) if str(path).endswith(".csv") else self.export_json(path)
+
+    def format_report(self):
+        return format_summary(self.summary())
+
+def _stats(d):
+    p = np.percentile(d, PERCENTILES)
+    return {"n": int(len(d)), "mean_ms": round(float(d.mean()), 4),
+            **{f"p{q}_ms": round(float(v), 4) for q, v in zip(PERCENTILES, p)},
+            "max_ms": round(float(d.max()), 4)}
+
+def format_summary(summary):
+    lines = [f"{'stage':<22} {'n':>7} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)"]
+    for name, st in summary.items():
+        lines.append(f"{name:<22} {st['n']:>7d} {st['mean_ms']:>9.3f} {st['p50_ms']:>9.3f} "
+                     f"{st['p95_ms']:>9.3f} {st['p99_ms']:>9.3f} {st['max_ms']:>9.3f}")
+    return "\n".join(lines)
+
+class TracedSportClient:
+    """Hülle um einen SportClient: jeder Methodenaufruf wird als Span 'sport.<Methode>' gemessen."""
+
+    def __init__(self, sport_client, tracer=None):
+        self._sport = sport_client
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        attr = getattr(self._sport, name)
+        if not callable(attr):
+            return attr
+        tr = self._tracer or tracer()
+        stage = "sport." + name
+
+        def call(*args, **kwargs):
+            if not tr.enabled:
+                return attr(*args, **kwargs)
+            t0 = time.monotonic()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                tr.record(stage, t0)
+        return call
+
+def traced_sport(sport_client, tracer=None):
+    """SportClient für die Latenz-Messung umhüllen (mehrfaches Umhüllen wird vermieden)."""
+    if isinstance(sport_client, TracedSportClient):
+        return sport_client
+    return TracedSportClient(sport_client, tracer)
+
+_TRACER = None
+_TRACER_LOCK = threading.Lock()
+
+def tracer():
+    """
+    Modulweiter Tracer. D1_TRACE=1 aktiviert ihn beim Erzeugen, D1_TRACE_OUT=<pfad>
+    schreibt beim Prozessende die Zusammenfassung (.json oder .csv).
+    """
+    global _TRACER
+    with _TRACER_LOCK:
+        if _TRACER is None:
+            _TRACER = Tracer(enabled=os.environ.get("D1_TRACE", "0") not in ("", "0"))
+            out = os.environ.get("D1_TRACE_OUT")
+            if out:
+                atexit.register(_TRACER.export, out)
+        return _TRACER
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Benutzung: python3 latency_trace.py <trace.json>")
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        print(format_summary(json.load(f)["summary"]))
@@ -0,0 +1,247 @@
+# rate_scheduler.py
+# Deadline-basierter Taktgeber für Streaming-Schleifen (Arm-Setpoints, Go2-Move).
+#
+# Statt "Arbeit + time.sleep(dt)" (Periode = Arbeitszeit + dt, driftet) läuft jeder Tick auf
+# einer absoluten Deadline t0 + k * period (time.monotonic_ns). Wie verspätete Ticks behandelt
+# werden, bestimmt late_policy:
+#   "skip"     – verpasste Ticks auslassen, Index springt auf den aktuellen Slot (zeittreu)
+#   "merge"    – verpasste Ticks zu EINEM Tick zusammenfassen, Raster ab jetzt neu ausrichten
+#   "catchup"  – alle verpassten Ticks sofort nacheinander ausführen (jeder Tick zählt)
+# Optional wird über timerfd (CLOCK_MONOTONIC, absolut) statt time.sleep geschlafen.
+# Pro Tick wird die Verspätung aufgezeichnet (Histogramm + Perzentile über summary()).
+#
+# Benutzung (Beispiel):
+#   from rate_scheduler import RateScheduler
+#   sched = RateScheduler(100, late_policy="skip")
+#   for k in sched.ticks(duration=2.0):
+#       send(setpoints[k])
+#   print(sched.format_summary())
+#
+#   async for k in RateScheduler(50).aticks(n=len(setpoints)):   # gleiche Deadlines auf einer asyncio-Loop
+#       await arm.move(setpoints[k])
+
+import os
+import time
+import ctypes
+import numpy as np
+
+# --- optionales timerfd: Python >= 3.13 direkt, sonst über das Unitree-SDK ---
+_TFD = None
+if not hasattr(os, "timerfd_create"):
+    try:
+        import unitree_sdk2py.utils.timerfd as _TFD
+    except Exception:
+        _TFD = None
+
+LATE_POLICIES = ("skip", "merge", "catchup")
+
+# Histogramm-Grenzen der Verspätung in Mikrosekunden (letzter Bin: alles darüber)
+HIST_EDGES_US = (0, 50, 100, 250, 500, 1000, 2000, 5000, 10000, 20000, 50000)
+
+def timerfd_available():
+    return hasattr(os, "timerfd_create") or _TFD is not None
+
+class _TimerFd:
+    """Einmal-Timer auf absolute CLOCK_MONOTONIC-Zeitpunkte (gleiche Uhr wie time.monotonic_ns)."""
+
+    def __init__(self):
+        if hasattr(os, "timerfd_create"):
+            self._fd = os.timerfd_create(time.CLOCK_MONOTONIC)
+        elif _TFD is not None:
+            self._fd = _TFD.timerfd_create(_TFD.CLOCK_MONOTONIC, 0)
+        else:
+            raise RuntimeError("timerfd nicht verfügbar (Python >= 3.13 oder unitree_sdk2py nötig).")
+
+    def sleep_until(self, deadline_ns):
+        if hasattr(os, "timerfd_settime_ns"):
+            os.timerfd_settime_ns(self._fd, flags=os.TFD_TIMER_ABSTIME, initial=int(deadline_ns))
+        else:
+            spec = _TFD.itimerspec.from_seconds(0, deadline_ns / 1e9)
+            _TFD.timerfd_settime(self._fd, getattr(_TFD, "TFD_TIMER_ABSTIME", 1), ctypes.byref(spec), None)
+        os.read(self._fd, 8)    # blockiert bis zum Ablauf
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+class RateScheduler:
+    """
+    Taktgeber mit absoluten Deadlines.
+      hz           – Tickrate
+      late_policy  – "skip" | "merge" | "catchup" (siehe Modulkopf)
+      use_timerfd  – über timerfd statt time.sleep schlafen (falls verfügbar)
+      spin_us      – letzte Mikrosekunden vor der Deadline aktiv warten (nur ohne timerfd)
+      history      – Anzahl gespeicherter Verspätungen für die Perzentile (Ringpuffer)
+    """
+
+    def __init__(self, hz, late_policy="skip", use_timerfd=False, spin_us=200, history=65536):
+        if late_policy not in LATE_POLICIES:
+            raise ValueError(f"Unbekannte late_policy '{late_policy}' (erlaubt: {', '.join(LATE_POLICIES)}).")
+        if float(hz) <= 0:
+            raise ValueError("hz muss > 0 sein.")
+        self.hz = float(hz)
+        self.period_ns = int(round(1e9 / self.hz))
+        self.late_policy = late_policy
+        self.spin_ns = int(spin_us * 1000)
+        self._timer = _TimerFd() if (use_timerfd and timerfd_available()) else None
+
+        self._late_ns = np.zeros(int(history), dtype=np.int64)
+        self._hist = np.zeros(len(HIST_EDGES_US), dtype=np.int64)
+        self._edges_ns = np.array(HIST_EDGES_US, dtype=np.int64) * 1000
+        self.t0_ns = None
+        self.index = -1          # Index des zuletzt ausgelösten Ticks
+        self.ticks_run = 0       # tatsächlich ausgeführte Ticks
+        self.missed = 0          # ausgelassene/zusammengefasste Ticks
+        self.realtime = None     # Beschreibung des Echtzeit-Modus, falls die Schleife darin lief (realtime.py)
+        self._next_ns = None
+
+    # ----- Takt -----
+    def start(self, t0_ns=None):
+        """Raster bei t0_ns (Default: jetzt) verankern; der erste Tick ist sofort fällig."""
+        self.t0_ns = time.monotonic_ns() if t0_ns is None else int(t0_ns)
+        self._next_ns = self.t0_ns
+        self.index = -1
+        return self
+
+    @property
+    def elapsed(self):
+        """Sekunden seit start()."""
+        return 0.0 if self.t0_ns is None else (time.monotonic_ns() - self.t0_ns) / 1e9
+
+    def sleep_until(self, deadline_ns):
+        """Präzise bis deadline_ns (monotonic_ns) schlafen."""
+        if self._timer is not None:
+            if deadline_ns > time.monotonic_ns():
+                self._timer.sleep_until(deadline_ns)
+            return
+        left = deadline_ns - time.monotonic_ns() - self.spin_ns
+        if left > 0:
+            time.sleep(left / 1e9)
+        while time.monotonic_ns() < deadline_ns:
+            pass
+
+    def wait(self):
+        """Bis zur nächsten Deadline warten; gibt den Index des fälligen Ticks zurück."""
+        if self._next_ns is None:
+            self.start()
+        deadline = self._next_ns
+        if time.monotonic_ns() < deadline:
+            self.sleep_until(deadline)
+        now = time.monotonic_ns()
+        late = now - deadline
+        behind = late // self.period_ns         # ganze verpasste Perioden
+
+        step = 1
+        if behind > 0 and self.late_policy == "skip":
+            step += behind
+            deadline += behind * self.period_ns
+            self.missed += behind
+        elif behind > 0 and self.late_policy == "merge":
+            self.missed += behind
+            deadline = now                      # Raster ab jetzt neu ausrichten
+
+        self.index += step
+        self._next_ns = deadline + self.period_ns
+        self._record(late)
+        return self.index
+
+    def wait_until(self, deadline_ns):
+        """
+        Bis zu einer beliebigen Deadline (monotonic_ns) warten – für Zeitpläne mit eigenen Zeitstempeln
+        statt festem Raster (z. B. Aufnahmen). Zählt als Tick, die Verspätung geht in die Statistik ein.
+        """
+        if self._next_ns is None:
+            self.start()
+        if time.monotonic_ns() < deadline_ns:
+            self.sleep_until(deadline_ns)
+        late = time.monotonic_ns() - deadline_ns
+        self.index += 1
+        self._record(late)
+        return late
+
+    def ticks(self, n=None, duration=None):
+        """Generator über Tick-Indizes; endet nach n Ticks (Index >= n) bzw. nach 'duration' s."""
+        if self._next_ns is None:
+            self.start()
+        end_ns = None if duration is None else self.t0_ns + int(float(duration) * 1e9)
+        while True:
+            if end_ns is not None and self._next_ns >= end_ns:
+                return
+            if n is not None and self.index + 1 >= n:
+                return
+            k = self.wait()
+            if n is not None and k >= n:
+                return
+            yield k
+
+    async def aticks(self, n=None, duration=None):
+        """
+        Wie ticks(), aber für asyncio: bis zur Deadline wird mit asyncio.sleep gewartet,
+        die Event-Loop bleibt also frei (kein timerfd/Spin; Genauigkeit ~ Loop-Timer).
+        """
+        import asyncio
+        if self._next_ns is None:
+            self.start()
+        end_ns = None if duration is None else self.t0_ns + int(float(duration) * 1e9)
+        while True:
+            if end_ns is not None and self._next_ns >= end_ns:
+                return
+            if n is not None and self.index + 1 >= n:
+                return
+            left = self._next_ns - time.monotonic_ns()
+            if left > 0:
+                await asyncio.sleep(left / 1e9)
+            k = self.wait()
+            if n is not None and k >= n:
+                return
+            yield k
+
+    # ----- Statistik -----
+    def _record(self, late_ns):
+        self._late_ns[self.ticks_run % self._late_ns.shape[0]] = late_ns
+        self._hist[max(0, np.searchsorted(self._edges_ns, late_ns, side="right") - 1)] += 1
+        self.ticks_run += 1
+
+    def reset_stats(self):
+        """Statistik leeren (Raster und Tick-Index laufen weiter)."""
+        self._hist[:] = 0
+        self.ticks_run = 0
+        self.missed = 0
+
+    def lateness_us(self):
+        """Gespeicherte Verspätungen (µs) der letzten Ticks."""
+        n = min(self.ticks_run, self._late_ns.shape[0])
+        return self._late_ns[:n] / 1000.0
+
+    def histogram(self):
+        """Liste (von_us, bis_us, anzahl); bis_us = None für den offenen letzten Bin."""
+        edges = list(HIST_EDGES_US) + [None]
+        return [(edges[i], edges[i + 1], int(self._hist[i])) for i in range(len(HIST_EDGES_US))]
+
+    def summary(self):
+        """Kennzahlen der Verspätung in µs (p50/p95/p99/max) plus Tick-Zähler."""
+        lat = self.lateness_us()
+        if lat.size == 0:
+            return {"ticks": 0, "missed": self.missed, "hz": self.hz}
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        return {"ticks": self.ticks_run, "missed": self.missed, "hz": self.hz,
+                "late_p50_us": float(p50), "late_p95_us": float(p95), "late_p99_us": float(p99),
+                "late_max_us": float(lat.max()), "timerfd": self._timer is not None,
+                **({"realtime": self.realtime} if self.realtime else {})}
+
+    def format_summary(self):
+        return format_stats(self.summary())
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.close()
+            self._timer = None
+
+def format_stats(s):
+    """Einzeiler zu einem summary()-dict (auch aus einem anderen Prozess)."""
+    if not s["ticks"]:
+        return f"{s['hz']:.0f} Hz: keine Ticks"
+    return (f"{s['ticks']} Ticks @ {s['hz']:.0f} Hz, verpasst {s['missed']}, Verspätung µs "
+            f"p50={s['late_p50_us']:.0f} p95={s['late_p95_us']:.0f} "
+            f"p99={s['late_p99_us']:.0f} max={s['late_max_us']:.0f}")
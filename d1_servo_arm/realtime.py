@@ -0,0 +1,309 @@
+# realtime.py
+# Opt-in Echtzeit-Modus für Streaming-Schleifen (arm_trajectory-Wiedergabe, Go2-Geschwindigkeitsschleifen).
+# Während eines RealtimeSection-Blocks:
+#   - CPU-Pinning        os.sched_setaffinity für den aufrufenden Thread (Default: letzte erlaubte CPU)
+#   - SCHED_FIFO         os.sched_setscheduler, falls erlaubt (root bzw. CAP_SYS_NICE / rtprio-Limit)
+#   - mlockall           MCL_CURRENT | MCL_FUTURE über libc (keine Page-Faults im Takt), falls erlaubt
+#   - GC                 gc.collect() + gc.freeze() vor der Schleife, gc.disable() während der Schleife
+# Beim Verlassen wird alles zurückgesetzt. Was nicht erlaubt ist, wird übersprungen und in status vermerkt –
+# der Modus funktioniert also auch ohne Rechte (dann nur Pinning + GC).
+# GC und mlockall gelten prozessweit und werden gezählt: mehrere Schleifen-Threads (control_process)
+# können gleichzeitig im Echtzeit-Modus sein, erst der letzte gibt frei.
+# Ohne GC wachsen zyklische Abfälle während der Schleife an – für Wiedergaben von Sekunden bis Minuten gedacht.
+#
+# Rechte für SCHED_FIFO/mlockall ohne root (einmalig):
+#   sudo setcap cap_sys_nice,cap_ipc_lock+ep "$(readlink -f "$(which python3)")"
+#   oder in /etc/security/limits.conf:  <user> - rtprio 90   und   <user> - memlock unlimited
+#
+# Benutzung (Beispiel):
+#   from realtime import RealtimeSection
+#   with RealtimeSection(cpu=3, priority=80) as rt:
+#       for k in sched.ticks(n=n):
+#           st.send_line(lines[k])
+#   print(rt.describe())
+#
+#   python3 realtime.py --hz 200 --seconds 5 --load 2     # Takt-Jitter normal vs. Echtzeit vergleichen
+#   python3 realtime.py --loop trajectory --trajectory demo.json --hz 200 --load 2
+#   python3 realtime.py --loop go2 --hz 50 --distance 1.0
+
+import os
+import gc
+import sys
+import json
+import time
+import ctypes
+import ctypes.util
+import contextlib
+import pathlib
+import argparse
+import threading
+import subprocess
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))  # damit "import rate_scheduler" lokal klappt
+from rate_scheduler import RateScheduler, format_stats
+
+MCL_CURRENT, MCL_FUTURE = 1, 2
+DEFAULT_PRIORITY = 80
+
+_LIBC = None
+_LOCK = threading.Lock()
+_gc_users = 0
+_gc_was_enabled = True
+_mlock_users = 0
+
+def _libc():
+    global _LIBC
+    if _LIBC is None:
+        _LIBC = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    return _LIBC
+
+def default_cpu(index=0):
+    """
+    Letzte erlaubte CPU (CPU 0 bekommt meist die meisten Interrupts); index=1 die vorletzte usw.,
+    damit mehrere Schleifen-Threads getrennte CPUs bekommen (bei zu wenigen CPUs von hinten wiederholt).
+    """
+    cpus = sorted(os.sched_getaffinity(0))
+    return cpus[-1 - index % len(cpus)]
+
+def capabilities():
+    """Was in diesem Prozess möglich ist: {"cpus", "sched_fifo", "max_priority", "mlock"}."""
+    caps = {"cpus": sorted(os.sched_getaffinity(0)), "sched_fifo": False, "max_priority": 0, "mlock": False}
+    try:
+        before = os.sched_getscheduler(0), os.sched_getparam(0)
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(1))
+        os.sched_setscheduler(0, before[0], before[1])
+        caps["sched_fifo"] = True
+        caps["max_priority"] = os.sched_get_priority_max(os.SCHED_FIFO)
+    except (PermissionError, OSError, AttributeError):
+        pass
+    with _LOCK:
+        if _mlock_users:
+            caps["mlock"] = True
+        elif _libc().mlockall(MCL_CURRENT | MCL_FUTURE) == 0:
+            _libc().munlockall()
+            caps["mlock"] = True
+    return caps
+
+class RealtimeSection:
+    """
+    Context-Manager für den Thread, der die Schleife ausführt.
+      cpu          – CPU-Nummer für das Pinning (None = default_cpu(), False = kein Pinning)
+      priority     – SCHED_FIFO-Priorität 1..99 (None = Scheduler nicht ändern)
+      lock_memory  – mlockall versuchen
+      freeze_gc    – gc.collect() + gc.freeze() + gc.disable()
+    status (nach __enter__): cpu, sched, mlock, gc_frozen – was tatsächlich aktiv ist, plus skipped (Gründe).
+    """
+
+    def __init__(self, cpu=None, priority=DEFAULT_PRIORITY, lock_memory=True, freeze_gc=True):
+        self.cpu = cpu
+        self.priority = priority
+        self.lock_memory = bool(lock_memory)
+        self.freeze_gc = bool(freeze_gc)
+        self.status = {}
+        self._saved = {}
+
+    @classmethod
+    def from_option(cls, option):
+        """True / dict mit Konstruktor-Argumenten / RealtimeSection -> RealtimeSection; False/None -> None."""
+        if not option:
+            return None
+        if isinstance(option, cls):
+            return option
+        return cls(**option) if isinstance(option, dict) else cls()
+
+    def __enter__(self):
+        global _gc_users, _gc_was_enabled, _mlock_users
+        st = self.status = {"cpu": None, "sched": "SCHED_OTHER", "mlock": False, "gc_frozen": 0, "skipped": []}
+
+        if self.cpu is not False:
+            cpu = default_cpu() if self.cpu is None else int(self.cpu)
+            try:
+                self._saved["affinity"] = os.sched_getaffinity(0)
+                os.sched_setaffinity(0, {cpu})          # pid 0 = aufrufender Thread
+                st["cpu"] = cpu
+            except OSError as e:
+                st["skipped"].append(f"CPU {cpu}: {e.strerror}")
+
+        if self.priority is not None:
+            try:
+                self._saved["sched"] = (os.sched_getscheduler(0), os.sched_getparam(0))
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(int(self.priority)))
+                st["sched"] = f"SCHED_FIFO {int(self.priority)}"
+            except (PermissionError, OSError) as e:
+                self._saved.pop("sched", None)
+                st["skipped"].append(f"SCHED_FIFO: {getattr(e, 'strerror', None) or e}")
+
+        with _LOCK:
+            if self.lock_memory:
+                if _mlock_users or _libc().mlockall(MCL_CURRENT | MCL_FUTURE) == 0:
+                    _mlock_users += 1
+                    self._saved["mlock"] = True
+                    st["mlock"] = True
+                else:
+                    st["skipped"].append(f"mlockall: {os.strerror(ctypes.get_errno())}")
+            if self.freeze_gc:
+                if _gc_users == 0:
+                    _gc_was_enabled = gc.isenabled()
+                    gc.collect()
+                    gc.freeze()
+                    gc.disable()
+                _gc_users += 1
+                self._saved["gc"] = True
+                st["gc_frozen"] = gc.get_freeze_count()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _gc_users, _mlock_users
+        with _LOCK:
+            if self._saved.pop("gc", False):
+                _gc_users -= 1
+                if _gc_users == 0:
+                    gc.unfreeze()
+                    if _gc_was_enabled:
+                        gc.enable()
+            if self._saved.pop("mlock", False):
+                _mlock_users -= 1
+                if _mlock_users == 0:
+                    _libc().munlockall()
+        if "sched" in self._saved:
+            policy, param = self._saved.pop("sched")
+            try:
+                os.sched_setscheduler(0, policy, param)
+            except OSError:
+                pass
+        if "affinity" in self._saved:
+            os.sched_setaffinity(0, self._saved.pop("affinity"))
+        return False
+
+    def describe(self):
+        st = self.status
+        parts = [f"CPU {st['cpu']}" if st.get("cpu") is not None else "ohne Pinning", st.get("sched", "-"),
+                 "mlockall" if st.get("mlock") else "ohne mlockall",
+                 f"GC eingefroren ({st['gc_frozen']} Objekte)" if st.get("gc_frozen") else "GC aktiv"]
+        if st.get("skipped"):
+            parts.append("übersprungen: " + "; ".join(st["skipped"]))
+        return ", ".join(parts)
+
+# ---------- Vergleich normal vs. Echtzeit ----------
+# Gemessen wird die echte Schleife (synthetisch, Go2VelocityStreamer bzw. arm_trajectory.stream_table)
+# gegen Senken ohne Hardware; die Arbeit pro Tick (Payload/JSON, NumPy-Regler) bleibt gleich.
+class _NullSport:
+    def Move(self, vx, vy, vyaw):
+        return 0
+
+    def StopMove(self):
+        return 0
+
+class _NullStream:
+    """Wie ArmPublisher, aber ohne arm_pub: kodiert wie send_multi und verwirft die Zeile."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def start(self):
+        return self
+
+    def send_multi(self, angles_deg, mode=1, habr=20, ply=3):
+        import arm_control as ac
+        ac.encode_multi(angles_deg, mode=mode, habr=habr, ply=ply)
+        return 0
+
+    def send_line(self, line):
+        return 0
+
+def _tick_work(q, k):
+    """Typische Arbeit eines Streaming-Ticks (Payload bauen + kodieren), erzeugt Objekte für den GC."""
+    data = {f"angle{i}": float(q[i]) + 1e-3 * k for i in range(7)}
+    data.update({"mode": 0, "habr": [0] * 7, "plyLevel": [0] * 7})
+    return json.dumps({"seq": 4, "address": 1, "funcode": 2, "data": data})
+
+def _garbage(stop):
+    """Hintergrund-Thread wie Plotten/Logging: viele zyklische Objekte -> häufige GC-Läufe."""
+    while not stop.is_set():
+        junk = []
+        for _ in range(2000):
+            a = {"x": list(range(20))}
+            a["self"] = a
+            junk.append(a)
+        time.sleep(0.001)
+
+def _run_synthetic(hz, seconds, realtime):
+    q = [0.0] * 7
+    rt = RealtimeSection.from_option(realtime)
+    sched = RateScheduler(hz, late_policy="skip")
+    try:
+        with contextlib.ExitStack() as stack:
+            if rt is not None:
+                stack.enter_context(rt)
+            for k in sched.ticks(duration=seconds):
+                _tick_work(q, k)
+    finally:
+        if rt is not None:
+            sched.realtime = rt.describe()
+        sched.close()
+    return sched.summary()
+
+def _run_go2(hz, distance, realtime):
+    from go2_motion import Go2VelocityStreamer
+    return Go2VelocityStreamer(_NullSport(), hz=hz, realtime=realtime).move(dx=distance)["sched"]
+
+def _run_trajectory(hz, path, realtime):
+    import arm_trajectory as at
+    ts, qs, _ = at.plan_smooth(path, control_hz=hz)
+    return at.stream_table(ts, qs, control_hz=hz, realtime=realtime, stream=_NullStream()).summary()
+
+def measure(loop="synthetic", hz=200, realtime=None, garbage=True, seconds=5.0, distance=1.0, path=None):
+    """
+    Eine Schleife einmal laufen lassen -> RateScheduler.summary() (mit "realtime", falls aktiv).
+      loop  – "synthetic" (Payload + JSON pro Tick, 'seconds' lang), "go2" (Go2VelocityStreamer über
+              'distance' m) oder "trajectory" (arm_trajectory.stream_table der Aufnahme 'path')
+      garbage – Hintergrund-Thread mit zyklischem Abfall (GC-Last wie Plotten/Logging)
+    """
+    stop = threading.Event()
+    th = threading.Thread(target=_garbage, args=(stop,), daemon=True) if garbage else None
+    if th:
+        th.start()
+    try:
+        if loop == "go2":
+            return _run_go2(hz, distance, realtime)
+        if loop == "trajectory":
+            return _run_trajectory(hz, path, realtime)
+        return _run_synthetic(hz, seconds, realtime)
+    finally:
+        stop.set()
+
+def _load_procs(n):
+    """n CPU-Lastprozesse (Endlosschleife), wie andere Workloads auf dem Steuer-PC."""
+    return [subprocess.Popen([sys.executable, "-c", "while True: pass"]) for _ in range(n)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Takt-Jitter einer Streaming-Schleife: normal vs. Echtzeit-Modus")
+    parser.add_argument("--loop", choices=("synthetic", "go2", "trajectory"), default="synthetic")
+    parser.add_argument("--trajectory", default=None, help="Aufnahme für --loop trajectory (.json/.d1traj)")
+    parser.add_argument("--hz", type=float, default=200)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Dauer der synthetischen Schleife")
+    parser.add_argument("--distance", type=float, default=1.0, help="Go2-Strecke in m (--loop go2)")
+    parser.add_argument("--cpu", type=int, default=None)
+    parser.add_argument("--priority", type=int, default=DEFAULT_PRIORITY)
+    parser.add_argument("--load", type=int, default=0, help="Anzahl CPU-Lastprozesse während der Messung")
+    parser.add_argument("--no-garbage", action="store_true", help="ohne GC-Last im Hintergrund")
+    args = parser.parse_args()
+    if args.loop == "trajectory" and not args.trajectory:
+        parser.error("--loop trajectory braucht --trajectory <datei>")
+
+    print("Möglich:", capabilities())
+    opts = dict(loop=args.loop, hz=args.hz, garbage=not args.no_garbage, seconds=args.seconds,
+                distance=args.distance, path=args.trajectory)
+    load = _load_procs(args.load)
+    try:
+        normal = measure(**opts)
+        rt = measure(realtime={"cpu": args.cpu, "priority": args.priority}, **opts)
+    finally:
+        for p in load:
+            p.kill()
+    print(f"normal   : {format_stats(normal)}")
+    print(f"echtzeit : {format_stats(rt)}")
+    print(f"           {rt.get('realtime', '-')}")
@@ -0,0 +1,295 @@
+# robot_daemon.py
+# Dauerhafter Steuer-Dienst: hält arm_pub-Session, JointStateMonitor, ikpy-Kette + IK-Caches sowie
+# ChannelFactory/SportClient (Go2) warm und bietet sie über einen Unix-Domain-Socket an.
+# Skripte benutzen arm_client.py (gleiche Funktionen wie arm_control) und starten dadurch ohne
+# DDS-Discovery, Prozessstart, ikpy-Import und IK-Berechnung – die liegen alle schon im Dienst.
+#
+# Protokoll: eine JSON-Zeile pro Anfrage/Antwort (Verbindung bleibt offen, beliebig viele Anfragen)
+#   -> {"op": "move_and_wait", "args": [[...7 Winkel...]], "kwargs": {"tol": 2.0}}
+#   <- {"ok": true, "result": {...}}   bzw.   {"ok": false, "error": "...", "type": "ValueError"}
+# Jede Verbindung hat einen eigenen Thread (Arm und Go2 parallel = zwei Verbindungen).
+# SportClient-Aufrufe werden einzeln serialisiert, Bewegungen (go2_move*) untereinander.
+# sport("StopMove") / sport("Damp") warten auf keinen Lock und brechen laufende und wartende Bewegungen ab.
+#
+# Operationen:
+#   Arm      – torque_lock, torque_release, go_home, go_stow, go_stand, move_single_joint, move_multi,
+#              move_multi_stream, move_multi_simultaneous, move_and_wait, read_angles_once, compare_angles
+#   IK       – ik_solve(positions, orientation, orientation_mode, grippers) -> Servo-Winkel bzw. ikpy-Vektoren
+#   Go2      – sport(method, *args), go2_move(dx, dy, dyaw, ...), go2_move_distance(...), go2_state(topic)
+#   Dienst   – ping, status, shutdown
+#
+# Benutzung (Beispiel):
+#   python3 d1_servo_arm/robot_daemon.py --interface eno1           # einmal starten (Terminal/systemd)
+#   python3 d1_servo_arm/robot_daemon.py --no-go2                   # nur Arm + IK
+#   import d1_servo_arm.arm_client as ac                            # in den Skripten statt arm_control
+
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import argparse
+import pathlib
+import threading
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))  # damit "import arm_control" lokal klappt
+import arm_control as ac
+import kinematics as kin
+
+DEFAULT_SOCKET = os.environ.get("D1_DAEMON_SOCKET", f"/tmp/d1-robot-{os.getuid()}.sock")
+
+ARM_OPS = ("torque_lock", "torque_release", "go_home", "go_stow", "go_stand", "move_single_joint",
+           "move_multi", "move_multi_stream", "move_multi_simultaneous", "move_and_wait",
+           "read_angles_once", "compare_angles")
+SPORT_METHODS = ("Move", "StopMove", "StandUp", "StandDown", "RecoveryStand", "Damp", "BalanceStand",
+                 "Sit", "RiseSit")
+STOP_METHODS = ("StopMove", "Damp")        # Not-Stopp: ohne Lock, bricht laufende Bewegungen ab
+
+class MotionAborted(RuntimeError):
+    pass
+
+class _SportProxy:
+    """
+    SportClient-Hülle für Bewegungen im Dienst: jeder Aufruf einzeln unter 'lock' (nie die ganze
+    Bewegung), Move() bricht mit MotionAborted ab, sobald aborted() wahr ist (StopMove/Damp).
+    """
+
+    def __init__(self, sport, lock, aborted):
+        self._sport, self._lock, self._aborted = sport, lock, aborted
+
+    def __getattr__(self, name):
+        attr = getattr(self._sport, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args):
+            if name == "Move" and self._aborted():
+                raise MotionAborted("Go2-Bewegung durch StopMove/Damp abgebrochen.")
+            with self._lock:
+                return attr(*args)
+        return call
+
+def _to_json(obj):
+    """numpy-Typen und Tupel für json.dumps."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"{type(obj).__name__} ist nicht JSON-serialisierbar")
+
+class RobotDaemon:
+    """
+    Socket-Server um arm_control, kinematics und (optional) den Go2.
+      interface     – Netzwerk-Interface für ChannelFactoryInitialize (None = kein Go2)
+      sport_client  – fertiger SportClient (z. B. sim_robot.SimSportClient) statt eigener Initialisierung
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, interface=None, sport_client=None, urdf_path=kin.URDF_PATH):
+        self.socket_path = str(socket_path)
+        self.interface = interface
+        self.urdf_path = urdf_path
+        self.sport = sport_client
+        self.chain = None
+        self._solvers = {}                      # (Orientierung, Modus) -> IKSolver (mit eigenem Cache)
+        self._solver_lock = threading.Lock()
+        self._sport_lock = threading.Lock()          # einzelne SportClient-Aufrufe
+        self._motion_lock = threading.Lock()         # eine Go2-Bewegung zur Zeit
+        self._count_lock = threading.Lock()          # requests, _stop_gen
+        self._stop_gen = 0                           # +1 bei jedem StopMove/Damp
+        self._stop = threading.Event()
+        self._srv = None
+        self.t_start = time.monotonic()
+        self.requests = 0
+        self.ops = {name: getattr(ac, name) for name in ARM_OPS}
+        self.ops.update({"ik_solve": self.ik_solve, "sport": self.sport_call, "go2_move": self.go2_move,
+                         "go2_move_distance": self.go2_move_distance, "go2_state": self.go2_state,
+                         "ping": self.ping, "status": self.status, "shutdown": self.shutdown})
+
+    # ----- Aufwärmen -----
+    def warm_up(self):
+        """Alles starten, was sonst jedes Skript selbst bezahlt (Prozesse, Discovery, Kette, Go2)."""
+        ac._session().start()
+        ac.joint_monitor()
+        self.chain = kin.load_chain(self.urdf_path)
+        self._solver((0, 0, -1), "Y")           # Orientierung der Sequenz-Skripte
+        if self.sport is None and self.interface:
+            from unitree_sdk2py.core.channel import ChannelFactoryInitialize
+            from unitree_sdk2py.go2.sport.sport_client import SportClient
+            ChannelFactoryInitialize(0, self.interface)
+            sport = SportClient()
+            sport.SetTimeout(10.0)
+            sport.Init()
+            self.sport = sport
+        if self.sport is not None:
+            self.sport = ac.traced_sport(self.sport)
+        ac.read_angles_once(timeout=2.0)        # erstes Feedback abwarten
+        return self
+
+    # ----- IK -----
+    def _solver(self, orientation, mode):
+        key = (json.dumps(np.asarray(orientation, dtype=float).round(6).tolist()), str(mode))
+        with self._solver_lock:
+            if key not in self._solvers:
+                self._solvers[key] = kin.IKSolver(self.chain, np.asarray(orientation, dtype=float), mode)
+            return self._solvers[key]
+
+    def ik_solve(self, positions, orientation=(0, 0, -1), orientation_mode="Y", grippers=None):
+        """
+        IK für mehrere Positionen (m). Mit grippers (Skalar oder Liste) -> 7 Servo-Winkel in Grad je Pose
+        (wie kin.to_servo_angles), sonst ikpy-Gelenkvektoren in rad.
+        """
+        sols = self._solver(orientation, orientation_mode).solve_many(positions)
+        if grippers is None:
+            return [np.asarray(q).tolist() for q in sols]
+        g = grippers if isinstance(grippers, (list, tuple)) else [grippers] * len(sols)
+        return [kin.to_servo_angles(q, gi) for q, gi in zip(sols, g)]
+
+    # ----- Go2 -----
+    def _require_sport(self):
+        if self.sport is None:
+            raise RuntimeError("Go2 ist im Dienst nicht initialisiert (mit --interface starten).")
+        return self.sport
+
+    def sport_call(self, method, *args):
+        if method not in SPORT_METHODS:
+            raise ValueError(f"SportClient-Methode '{method}' nicht erlaubt (erlaubt: {', '.join(SPORT_METHODS)}).")
+        sport = self._require_sport()
+        if method in STOP_METHODS:
+            self._bump_stop_gen()               # laufende und wartende Bewegungen senden kein Move() mehr
+            return getattr(sport, method)(*args)
+        with self._sport_lock:
+            return getattr(sport, method)(*args)
+
+    def _bump_stop_gen(self):
+        with self._count_lock:
+            self._stop_gen += 1
+
+    def _motion_sport(self, gen):
+        """
+        _SportProxy für eine Bewegung, die bei Stopp-Generation 'gen' angefragt wurde: jedes
+        StopMove/Damp danach bricht sie ab – auch wenn es kam, während sie noch auf _motion_lock wartete.
+        """
+        sport = self._require_sport()
+        def aborted():
+            return self._stop_gen != gen
+        if aborted():
+            raise MotionAborted("Go2-Bewegung durch StopMove/Damp abgebrochen, bevor sie begann.")
+        return _SportProxy(sport, self._sport_lock, aborted)
+
+    def go2_move(self, dx=0.0, dy=0.0, dyaw=0.0, hz=50, profile="trapezoid"):
+        from go2_motion import Go2VelocityStreamer
+        gen = self._stop_gen
+        with self._motion_lock:
+            return Go2VelocityStreamer(self._motion_sport(gen), hz=hz, profile=profile).move(dx, dy, dyaw)
+
+    def go2_move_distance(self, dx=0.0, dy=0.0, dyaw=0.0, **kwargs):
+        import go2_motion
+        state = getattr(self.sport, "odometry", None)          # Simulator bringt eigene Odometrie mit
+        gen = self._stop_gen
+        with self._motion_lock:
+            r = go2_motion.move_distance(self._motion_sport(gen), dx, dy, dyaw, state=state, **kwargs)
+        r["trace"] = r["trace"][:, :4]                          # (t, x, y, yaw) reicht dem Client
+        return r
+
+    def go2_state(self, topic="sport", fields=None):
+        from go2_state import state_hub
+        self._require_sport()
+        return state_hub().latest(topic, fields)
+
+    # ----- Dienst -----
+    def ping(self):
+        return "pong"
+
+    def status(self):
+        mon = ac.joint_monitor()
+        latest = mon.latest()
+        return {"pid": os.getpid(), "uptime_s": round(time.monotonic() - self.t_start, 1),
+                "requests": self.requests, "go2": self.sport is not None,
+                "joint_age_s": None if latest is None else round(time.monotonic() - latest[0], 3),
+                "ik": {k[1] + " " + k[0]: s.cache_info() for k, s in self._solvers.items()}}
+
+    def shutdown(self):
+        self._stop.set()
+        return True
+
+    # ----- Socket -----
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise RuntimeError(f"Auf {self.socket_path} läuft bereits ein Dienst.")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.socket_path)                     # verwaister Socket
+            finally:
+                probe.close()
+        self._srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._srv.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._srv.listen(16)
+        self._srv.settimeout(0.2)
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn, _ = self._srv.accept()
+                except socket.timeout:
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), name="daemon-conn", daemon=True).start()
+        finally:
+            self._srv.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _handle(self, conn):
+        f = conn.makefile("rwb", buffering=0)
+        try:
+            for raw in f:
+                reply = self._dispatch(raw)
+                conn.sendall(json.dumps(reply, default=_to_json).encode() + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            conn.close()
+
+    def _dispatch(self, raw):
+        with self._count_lock:
+            self.requests += 1
+        try:
+            req = json.loads(raw)
+            fn = self.ops.get(req.get("op"))
+            if fn is None:
+                raise ValueError(f"Unbekannte Operation '{req.get('op')}'.")
+            return {"ok": True, "result": fn(*req.get("args", ()), **req.get("kwargs", {}))}
+        except Exception as e:
+            return {"ok": False, "error": str(e), "type": type(e).__name__}
+
+    def close(self):
+        """Go2-Bewegung abbrechen und stoppen, dann arm_pub-Session und Gelenk-Monitor beenden."""
+        self._bump_stop_gen()
+        if self.sport is not None:
+            try:
+                self.sport.StopMove()
+            except Exception:
+                pass
+        ac.close_session()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="D1/Go2-Steuerdienst (Unix-Socket)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--interface", default="eno1", help="Netzwerk-Interface für den Go2")
+    parser.add_argument("--no-go2", action="store_true", help="nur Arm und IK")
+    args = parser.parse_args()
+
+    daemon = RobotDaemon(args.socket, interface=None if args.no_go2 else args.interface)
+    signal.signal(signal.SIGTERM, lambda *_: daemon.shutdown())
+    t0 = time.monotonic()
+    daemon.warm_up()
+    print(f"Dienst bereit nach {time.monotonic() - t0:.2f} s auf {args.socket}", flush=True)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
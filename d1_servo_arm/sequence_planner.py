@@ -0,0 +1,171 @@
+# sequence_planner.py
+# Zeitoptimale, jerk-limitierte Planung einer ganzen Posen-Folge (Pick-and-Place) mit Überschleifen.
+#
+# Statt jede Pose einzeln anzufahren und auf compare_angles/move_and_wait zu warten, wird die
+# komplette Folge VORAB mit Ruckig zu EINER Setpoint-Tabelle geplant:
+#   - Überschleifradius pro Wegpunkt (Grad, Max-Norm über die Armgelenke 0..5): sobald der Arm so nah
+#     am Wegpunkt ist, wird bereits auf den nächsten umgeschaltet – kein Stillstand dazwischen.
+#     Radius 0 = exakt anfahren (z. B. Greifpunkt). Der letzte Wegpunkt und jeder Wegpunkt mit
+#     Greifer-Ereignis werden immer exakt erreicht (der Arm fährt erst weiter, wenn der Greifer fertig ist).
+#   - Greifer-Ereignisse: ändert sich zwischen zwei Posen nur der Greifer, wird das als Ereignis
+#     im selben Plan behandelt (Greifer ist die 7. Achse mit eigenen Grenzen); Start- und
+#     Endzeit jedes Greifer-Ereignisses stehen in info["events"].
+#   - Grenzen pro Gelenk (v/a/j) wie in arm_trajectory, Positionsgrenzen aus der URDF.
+# Ergebnis wird wie bei plan_smooth als .d1traj in cache/ abgelegt.
+#
+# Benutzung (Beispiel):
+#   import sequence_planner as sp
+#   waypoints = sp.poses_to_waypoints(target_poses, ik)           # [(position, greifer), ...]
+#   ts, qs, info = sp.plan_sequence(waypoints, blend=[0, 0, 8, 0, 0], start=ac.read_angles_once())
+#   sp.execute(ts, qs)
+
+import sys
+import json
+import time
+import hashlib
+import pathlib
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))  # damit "import arm_control" lokal klappt
+import arm_control as ac
+import arm_trajectory as at
+import trajectory_file as tf
+
+_PLAN_VERSION = 2
+
+# Greifer: eigene (langsamere) Grenzen, Einheit Grad wie die übrigen Achsen
+GRIPPER_LIMITS = (40.0, 200.0, 2000.0)     # v (Grad/s), a (Grad/s^2), j (Grad/s^3)
+GRIPPER_TOL = 0.5                          # Grad – Greifer-Ereignis gilt als abgeschlossen
+# Toleranz auf die URDF-Positionsgrenzen: die Werksposen STOW/STAND stehen bis ~3° jenseits von ±1.57 rad
+POSITION_TOL_DEG = 4.0
+
+def poses_to_waypoints(target_poses, ik):
+    """
+    Posen im Format der Sequenz-Skripte ([position, greifer]) -> (n, 7) Servo-Winkel in Grad.
+    ik: kinematics.IKSolver (Warmstart/Cache); gleiche Positionen kosten nur einen Cache-Lookup.
+    """
+    import kinematics as kin
+    sols = ik.solve_many([pose[0] for pose in target_poses])
+    return np.array([kin.to_servo_angles(q, pose[1]) for q, pose in zip(sols, target_poses)])
+
+def _check_position_limits(waypoints, tol=POSITION_TOL_DEG):
+    """URDF-Grenzen (rad, tf.D1_JOINT_LIMITS_RAD) plus tol Grad; Greifer ohne Grenze."""
+    for i, wp in enumerate(waypoints):
+        for j, lim in enumerate(tf.D1_JOINT_LIMITS_RAD):
+            if lim is None:
+                continue
+            lo, hi = np.degrees(lim[0]) - tol, np.degrees(lim[1]) + tol
+            if not (lo <= wp[j] <= hi):
+                raise ValueError(f"Wegpunkt {i}: Gelenk {j} = {wp[j]:.1f}° außerhalb [{lo:.1f}, {hi:.1f}].")
+
+def plan_sequence(waypoints, blend=0.0, start=None, control_hz=100, vmax=None, amax=None, jmax=None,
+                  use_cache=True, max_duration=120.0):
+    """
+    Wegpunkte ((n, 7) Grad, Greifer an letzter Stelle) -> (ts (m,), qs (m, 7), info).
+      blend: Überschleifradius in Grad (Armgelenke 0..5) – Skalar oder ein Wert pro Wegpunkt;
+             an Wegpunkten mit Greifer-Ereignis und am letzten Wegpunkt immer 0
+      start: Startwinkel (Default: erster Wegpunkt)
+    info: duration, arrivals (Zeit, zu der jeder Wegpunkt erreicht bzw. überschliffen wurde),
+          events (Greifer-Ereignisse), cache, cached.
+    """
+    if not at._RUCKIG_OK:
+        raise RuntimeError("Ruckig ist nicht installiert. Bitte `pip install ruckig` ausführen.")
+    wps = np.asarray(waypoints, dtype=np.float64)
+    if wps.ndim != 2 or wps.shape[1] != 7 or len(wps) == 0:
+        raise ValueError(f"Erwarte Wegpunkte der Form (n, 7), nicht {wps.shape}.")
+    start = wps[0] if start is None else np.asarray(start, dtype=np.float64)
+    blends = np.broadcast_to(np.asarray(blend, dtype=np.float64), (len(wps),)).copy()
+    blends[-1] = 0.0
+    grips = np.concatenate(([start[6]], wps[:, 6]))
+    blends[np.abs(np.diff(grips)) > GRIPPER_TOL] = 0.0     # Greifer-Ereignis: exakt anfahren
+    _check_position_limits(wps)
+    vmax, amax, jmax = at.joint_limits_deg(vmax, amax, jmax, gripper=GRIPPER_LIMITS)
+
+    key = {"v": _PLAN_VERSION, "waypoints": np.round(wps, 4).tolist(), "start": np.round(start, 4).tolist(),
+           "blend": blends.tolist(), "control_hz": float(control_hz), "vmax": vmax, "amax": amax, "jmax": jmax}
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    cache = at.CACHE_DIR / f"sequence-{digest}{tf.SUFFIX}"
+    meta_path = cache.with_suffix(".json")
+    if use_cache and cache.exists() and meta_path.exists():
+        _, t_tab, q_tab = tf.load(cache)
+        with open(meta_path) as f:
+            info = json.load(f)
+        info.update(cache=cache, cached=True)
+        return t_tab, q_tab, info
+
+    dt = 1.0 / float(control_hz)
+    otg = at.Ruckig(7, dt)
+    inp = at.InputParameter(7)
+    out = at.OutputParameter(7)
+    inp.current_position = start.tolist()
+    inp.current_velocity = [0.0] * 7
+    inp.current_acceleration = [0.0] * 7
+    inp.max_velocity, inp.max_acceleration, inp.max_jerk = vmax, amax, jmax
+    inp.target_velocity = [0.0] * 7
+    inp.target_acceleration = [0.0] * 7
+
+    table = [start.copy()]
+    arrivals, events = [], []
+    open_event = None
+    max_steps = int(max_duration * control_hz)
+    grip = float(start[6])
+
+    for i, wp in enumerate(wps):
+        inp.target_position = wp.tolist()
+        if abs(wp[6] - grip) > GRIPPER_TOL:
+            open_event = {"waypoint": i, "from": grip, "to": float(wp[6]),
+                          "t_start": (len(table) - 1) * dt, "t_done": None}
+            events.append(open_event)
+        grip = float(wp[6])
+
+        while True:
+            res = otg.update(inp, out)
+            q = np.asarray(out.new_position)
+            table.append(q)
+            inp.current_position = out.new_position
+            inp.current_velocity = out.new_velocity
+            inp.current_acceleration = out.new_acceleration
+
+            if open_event is not None and abs(q[6] - open_event["to"]) <= GRIPPER_TOL:
+                open_event["t_done"] = (len(table) - 1) * dt
+                open_event = None
+            if at._ruckig_finished(res):
+                break
+            if res not in (getattr(at.Result, 'Working', res), getattr(at.Result, 'Busy', res)):
+                raise RuntimeError(f"Ruckig-Fehler bei Wegpunkt {i}: {res}")
+            if blends[i] > 0 and float(np.max(np.abs(q[:6] - wp[:6]))) <= blends[i]:
+                break               # überschleifen: nächsten Wegpunkt schon jetzt ansteuern
+            if len(table) > max_steps:
+                raise RuntimeError(f"Plan länger als max_duration={max_duration}s (Wegpunkt {i}).")
+        arrivals.append(round((len(table) - 1) * dt, 4))
+
+    q_tab = np.asarray(table, dtype=np.float64)
+    t_tab = np.arange(q_tab.shape[0], dtype=np.float64) * dt
+    info = {"duration": float(t_tab[-1]), "arrivals": arrivals, "events": events,
+            "blend": blends.tolist(), "control_hz": float(control_hz)}
+    if use_cache:
+        at.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tf.save(cache, t_tab, q_tab, hz=float(control_hz), units="deg")
+        with open(meta_path, "w") as f:
+            json.dump(info, f)
+    info.update(cache=cache, cached=False)
+    return t_tab, q_tab, info
+
+def execute(ts, qs, lock=None, mode=0, habr=0, ply=0):
+    """Geplante Tabelle streamen (wie play_smooth); gibt den RateScheduler mit Takt-Statistik zurück."""
+    control_hz = 1.0 / float(ts[1] - ts[0]) if len(ts) > 1 else 100.0
+    if lock is not None:
+        ac.torque_lock(int(lock))
+        time.sleep(0.2)
+    return at.stream_table(ts, qs, control_hz=control_hz, mode=mode, habr=habr, ply=ply, tag="SEQUENCE")
+
+def run_poses(target_poses, ik, blend=0.0, control_hz=100, lock=None, **limits):
+    """Komfort: IK, Planung ab Ist-Winkeln, Ausführung. Rückgabe: info des Plans."""
+    wps = poses_to_waypoints(target_poses, ik)
+    start = ac.read_angles_once()
+    if start is None:
+        raise RuntimeError("Keine aktuellen Winkel lesbar (get_arm_joint_angle läuft?) – Planung abgebrochen.")
+    ts, qs, info = plan_sequence(wps, blend=blend, start=start,
+                                 control_hz=control_hz, **limits)
+    info["sched"] = execute(ts, qs, lock=lock)
+    return info
@@ -0,0 +1,459 @@
+# sim_robot.py
+# Lokaler Stellvertreter für D1-Arm und Go2 – Benchmarks und Tests ohne Hardware.
+#
+#   Arm  – eigener Simulator-Prozess (Unix-Socket) mit Servo-Dynamik (v/a-begrenzt je Gelenk);
+#          im Build-Verzeichnis liegen Stub-"Binaries" mit denselben Namen und Schnittstellen:
+#            arm_pub [--stdin] [--repeat N --hz H]  – JSON-Zeilen wie rt/arm_Command (funcode 1/2/5/7)
+#            get_arm_joint_angle                    – "servo0_data:..., servo6_data:..." wie current_servo_angle
+#            arm_zero_control                       – funcode 7 (Home)
+#          arm_control merkt sich BUILD_DIR beim Import -> SimRobot VOR "import arm_control" starten.
+#   Go2  – SimSportClient: SportClient-Methoden (Move, StopMove, StandDown, StandUp, RecoveryStand,
+#          Damp, ...) mit RPC-Latenz; die Basis folgt Move() mit Verzögerung 1. Ordnung,
+#          Odometrie über .odometry (latest/wait_for_new wie go2_state.OdometryView).
+#
+# Einstellbar (SIM_DEFAULTS): Servo-Geschwindigkeit/-Beschleunigung, Kommando-Latenz (+ Jitter),
+# Feedback-Rate und -Latenz, Messrauschen, Startverzögerung der Binaries (Discovery), Go2-RPC-Latenz.
+#
+# Benutzung (Beispiel):
+#   from d1_servo_arm.sim_robot import SimRobot
+#   sim = SimRobot(vmax_deg_s=90, cmd_latency_s=0.02).start()    # setzt D1_SDK_BUILD
+#   import d1_servo_arm.arm_control as ac
+#   ac.move_and_wait([0, 0, 0, 0, 0, 0, 20])
+#   sport_client = sim.sport_client()
+#   sim.reset(ac.STOW_ANGLES); print(sim.stats()); sim.close()
+
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import shutil
+import socket
+import tempfile
+import threading
+import subprocess
+from collections import deque
+import numpy as np
+
+SIM_DEFAULTS = {
+    "vmax_deg_s": 60.0,          # Servo-Höchstgeschwindigkeit (Skalar oder 7 Werte)
+    "amax_deg_s2": 300.0,        # Servo-Beschleunigung
+    "cmd_latency_s": 0.010,      # rt/arm_Command -> Controller übernimmt das Ziel
+    "cmd_jitter_s": 0.002,       # gleichverteilt [0, jitter] zusätzlich
+    "feedback_hz": 100.0,        # Rate von current_servo_angle
+    "feedback_latency_s": 0.005, # gemeldeter Zustand ist so alt
+    "noise_deg": 0.05,           # Messrauschen (Normalverteilung, Standardabweichung)
+    "startup_s": 0.05,           # Prozessstart + DDS-Discovery der Binaries
+    "physics_hz": 1000.0,        # Integrationsrate des Servo-Modells
+    "initial": [-9.8, -87.8, 92.3, -7.7, 0.5, 10.0, 18.0],   # Startpose (STOW_ANGLES)
+    "home": [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],            # Ziel von funcode 7
+    "go2_rpc_s": 0.002,          # Dauer eines SportClient-Aufrufs
+    "go2_tau_s": 0.15,           # Verzögerung des Go2-Geschwindigkeitsreglers
+    "go2_state_hz": 500.0,       # Rate der simulierten rt/sportmodestate-Odometrie
+    "seed": 0,
+}
+
+# ---------- Arm-Simulator (eigener Prozess) ----------
+class _ArmModel:
+    """Servo-Modell: pro Gelenk Ziel + Geschwindigkeitsgrenze, v/a-begrenzte Annäherung."""
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.vmax = np.broadcast_to(np.asarray(cfg["vmax_deg_s"], dtype=float), (7,)).copy()
+        self.amax = float(cfg["amax_deg_s2"])
+        self.q = np.array(cfg["initial"], dtype=float)
+        self.v = np.zeros(7)
+        self.target = self.q.copy()
+        self.vlim = self.vmax.copy()
+        self.history = deque(maxlen=int(4 * cfg["physics_hz"]))   # (t, q) für Feedback-Latenz
+        self.pending = []                                        # Heap (t_apply, n, msg)
+        self.counts = {"lines": 0, "bad": 0, "funcode": {}}
+        self.lock = threading.Lock()
+        self._n = 0
+        self._rng = random.Random(cfg["seed"])
+
+    def command(self, line, now):
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            self.counts["bad"] += 1
+            return
+        lat = self.cfg["cmd_latency_s"] + self._rng.uniform(0.0, self.cfg["cmd_jitter_s"])
+        with self.lock:
+            self.counts["lines"] += 1
+            fc = str(msg.get("funcode"))
+            self.counts["funcode"][fc] = self.counts["funcode"].get(fc, 0) + 1
+            self._n += 1
+            heapq.heappush(self.pending, (now + lat, self._n, msg))
+
+    def _apply(self, msg):
+        fc, data = msg.get("funcode"), msg.get("data", {})
+        if fc == 2:
+            self.target[:] = [float(data[f"angle{i}"]) for i in range(7)]
+            self.vlim[:] = self.vmax
+        elif fc == 1:
+            j = int(data["id"])
+            self.target[j] = float(data["angle"])
+            T = int(data.get("delay_ms", 0)) / 1000.0
+            dist = abs(self.target[j] - self.q[j])
+            self.vlim[j] = min(self.vmax[j], dist / T) if T > 0 and dist > 0 else self.vmax[j]
+        elif fc == 7:
+            self.target[:] = self.cfg["home"]
+            self.vlim[:] = self.vmax
+        # funcode 5 (Torque) ändert die Kinematik hier nicht
+
+    def step(self, now, dt):
+        with self.lock:
+            while self.pending and self.pending[0][0] <= now:
+                self._apply(heapq.heappop(self.pending)[2])
+            e = self.target - self.q
+            v_des = np.sign(e) * np.minimum(self.vlim, np.sqrt(2.0 * self.amax * np.abs(e)))
+            dv = np.clip(v_des - self.v, -self.amax * dt, self.amax * dt)
+            self.v += dv
+            step = self.v * dt
+            over = np.abs(step) >= np.abs(e)          # nicht überschwingen
+            self.q = np.where(over, self.target, self.q + step)
+            self.v[over] = 0.0
+            self.history.append((now, self.q.copy()))
+
+    def observed(self, now):
+        """Zustand vor feedback_latency_s (mit Rauschen)."""
+        t_obs = now - self.cfg["feedback_latency_s"]
+        with self.lock:
+            q = self.history[0][1] if self.history else self.q
+            for t, qh in reversed(self.history):
+                if t <= t_obs:
+                    q = qh
+                    break
+        return q + np.array([self._rng.gauss(0.0, self.cfg["noise_deg"]) for _ in range(7)])
+
+    def reset(self, q):
+        with self.lock:
+            self.q = np.array(q, dtype=float)
+            self.target = self.q.copy()
+            self.v[:] = 0.0
+            self.vlim[:] = self.vmax
+            self.pending.clear()
+            self.history.clear()
+
+def _serve(sock_path, cfg):
+    """Simulator-Prozess: Physik-Thread + ein Thread pro Verbindung (pub / read / ctl)."""
+    model = _ArmModel(cfg)
+    stop = threading.Event()
+
+    def physics():
+        dt = 1.0 / cfg["physics_hz"]
+        nxt = time.monotonic()
+        while not stop.is_set():
+            model.step(time.monotonic(), dt)
+            nxt += dt
+            time.sleep(max(0.0, nxt - time.monotonic()))
+
+    def handle(conn):
+        f = conn.makefile("rw", buffering=1)
+        role = f.readline().strip()
+        try:
+            if role == "pub":
+                for line in f:
+                    if line.strip():
+                        model.command(line, time.monotonic())
+            elif role == "read":
+                time.sleep(cfg["startup_s"])
+                period = 1.0 / cfg["feedback_hz"]
+                nxt = time.monotonic()
+                while not stop.is_set():
+                    q = model.observed(time.monotonic())
+                    f.write(", ".join(f"servo{i}_data:{v:.2f}" for i, v in enumerate(q)) + "\n")
+                    f.flush()
+                    nxt += period
+                    time.sleep(max(0.0, nxt - time.monotonic()))
+            elif role == "ctl":
+                for line in f:
+                    req = json.loads(line)
+                    if req["op"] == "reset":
+                        model.reset(req.get("q") or cfg["initial"])
+                        f.write(json.dumps({"ok": True}) + "\n")
+                    elif req["op"] == "stats":
+                        with model.lock:
+                            f.write(json.dumps({"counts": model.counts, "q": model.q.tolist(),
+                                                "target": model.target.tolist()}) + "\n")
+                    elif req["op"] == "stop":
+                        stop.set()
+                        f.write(json.dumps({"ok": True}) + "\n")
+                    f.flush()
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(sock_path)
+    srv.listen(16)
+    srv.settimeout(0.2)
+    threading.Thread(target=physics, daemon=True).start()
+    while not stop.is_set():
+        try:
+            conn, _ = srv.accept()
+        except socket.timeout:
+            continue
+        threading.Thread(target=handle, args=(conn,), daemon=True).start()
+    srv.close()
+
+def _connect(sock_path, role):
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.connect(sock_path)
+    s.sendall((role + "\n").encode())
+    return s
+
+def _stub_pub(sock_path, argv):
+    """arm_pub-Ersatz: stdin-Zeilen an den Simulator; --repeat/--hz wie arm_pub.cpp (neueste Zeile hält)."""
+    repeat, hz = 1, 0.0
+    for i, a in enumerate(argv):
+        if a == "--repeat":
+            repeat = max(0, int(argv[i + 1]))
+        elif a == "--hz":
+            hz = float(argv[i + 1])
+    s = _connect(sock_path, "pub")
+    if hz <= 0:
+        for line in sys.stdin:
+            if line.strip():
+                s.sendall(line.encode() * max(1, repeat))
+        return
+    latest = {"line": None, "eof": False}
+    cv = threading.Condition()
+
+    def reader():
+        for line in sys.stdin:
+            if line.strip():
+                with cv:
+                    latest["line"] = line
+                    cv.notify()
+        with cv:
+            latest["eof"] = True
+            cv.notify()
+    threading.Thread(target=reader, daemon=True).start()
+    period, current, remaining, nxt = 1.0 / hz, None, 0, time.monotonic()
+    while True:
+        with cv:
+            if remaining == 0:
+                cv.wait_for(lambda: latest["line"] is not None or latest["eof"])
+                if latest["line"] is None:
+                    break
+                nxt = max(nxt, time.monotonic())
+            elif remaining < 0 and latest["eof"] and latest["line"] is None:
+                break
+        time.sleep(max(0.0, nxt - time.monotonic()))
+        with cv:
+            if latest["line"] is not None:
+                current, latest["line"] = latest["line"], None
+                remaining = repeat if repeat > 0 else -1
+        s.sendall(current.encode())
+        if remaining > 0:
+            remaining -= 1
+        nxt += period
+        if time.monotonic() - nxt > period:
+            nxt = time.monotonic()
+
+def _stub_read(sock_path):
+    """get_arm_joint_angle-Ersatz: Simulator-Feedback nach stdout."""
+    s = _connect(sock_path, "read")
+    try:
+        for line in s.makefile("r"):
+            sys.stdout.write(line)
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+
+# ---------- Go2-Simulator (im Prozess) ----------
+class _SimOdometry:
+    """(t, x, y, yaw) wie go2_state.OdometryView, im Takt go2_state_hz."""
+
+    def __init__(self, client):
+        self._c = client
+
+    def latest(self):
+        return self._c._advance(time.monotonic())
+
+    def wait_for_new(self, after_ts=None, timeout=1.0):
+        period = 1.0 / self._c.cfg["go2_state_hz"]
+        now = time.monotonic()
+        tick = (int(now / period) + 1) * period
+        if after_ts is not None:
+            tick = max(tick, (int(after_ts / period) + 1) * period)
+        if tick - now > timeout:
+            time.sleep(max(0.0, timeout))
+            return None
+        time.sleep(max(0.0, tick - now))
+        return self.latest()
+
+class SimSportClient:
+    """
+    SportClient-Ersatz. Jeder Aufruf dauert go2_rpc_s; die Basis folgt Move(vx, vy, vyaw)
+    (Körperkoordinaten) mit Verzögerung 1. Ordnung (go2_tau_s). calls zählt die Aufrufe je Methode.
+    """
+
+    def __init__(self, **config):
+        self.cfg = dict(SIM_DEFAULTS, **config)
+        self.calls = {}
+        self.pose = np.zeros(3)          # x, y, yaw (Welt)
+        self.vel = np.zeros(3)           # tatsächlich (Körper)
+        self.cmd = np.zeros(3)           # kommandiert (Körper)
+        self.standing = True
+        self._t = time.monotonic()
+        self._lock = threading.Lock()
+        self.odometry = _SimOdometry(self)
+
+    def _advance(self, now):
+        with self._lock:
+            tau, h = self.cfg["go2_tau_s"], 0.002
+            while self._t < now:
+                dt = min(h, now - self._t)
+                self.vel += (self.cmd - self.vel) * (dt / (tau + dt))
+                c, s = np.cos(self.pose[2]), np.sin(self.pose[2])
+                self.pose += dt * np.array([c * self.vel[0] - s * self.vel[1],
+                                            s * self.vel[0] + c * self.vel[1], self.vel[2]])
+                self._t += dt
+            return (now, float(self.pose[0]), float(self.pose[1]), float(self.pose[2]))
+
+    def _rpc(self, name, cmd=None):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        time.sleep(self.cfg["go2_rpc_s"])
+        self._advance(time.monotonic())
+        if cmd is not None:
+            with self._lock:
+                self.cmd = np.asarray(cmd, dtype=float)
+        return 0
+
+    def SetTimeout(self, timeout):
+        return None
+
+    def Init(self):
+        return None
+
+    def Move(self, vx, vy, vyaw):
+        return self._rpc("Move", (vx, vy, vyaw))
+
+    def StopMove(self):
+        return self._rpc("StopMove", (0.0, 0.0, 0.0))
+
+    def StandDown(self):
+        self.standing = False
+        return self._rpc("StandDown", (0.0, 0.0, 0.0))
+
+    def StandUp(self):
+        self.standing = True
+        return self._rpc("StandUp")
+
+    def RecoveryStand(self):
+        self.standing = True
+        return self._rpc("RecoveryStand")
+
+    def Damp(self):
+        return self._rpc("Damp", (0.0, 0.0, 0.0))
+
+    def BalanceStand(self):
+        return self._rpc("BalanceStand")
+
+    def reset(self):
+        with self._lock:
+            self.pose[:], self.vel[:], self.cmd[:] = 0.0, 0.0, 0.0
+            self._t = time.monotonic()
+        self.calls = {}
+
+# ---------- Steuerung aus dem Benchmark ----------
+class SimRobot:
+    """
+    Startet den Arm-Simulator und legt ein Build-Verzeichnis mit Stub-Binaries an.
+    start() setzt D1_SDK_BUILD (falls set_env), close() räumt alles wieder auf.
+    """
+
+    def __init__(self, set_env=True, **config):
+        unknown = set(config) - set(SIM_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unbekannte Simulator-Parameter: {', '.join(sorted(unknown))}")
+        self.cfg = dict(SIM_DEFAULTS, **config)
+        self.set_env = set_env
+        self.build_dir = None
+        self._proc = None
+        self._ctl = None
+
+    def start(self, timeout=5.0):
+        if self._proc is not None:
+            return self
+        self.build_dir = tempfile.mkdtemp(prefix="d1sim-")
+        sock = os.path.join(self.build_dir, "sim.sock")
+        cfg_path = os.path.join(self.build_dir, "sim.json")
+        with open(cfg_path, "w") as f:
+            json.dump(self.cfg, f)
+        me = os.path.abspath(__file__)
+        for exe, role in (("arm_pub", "pub"), ("get_arm_joint_angle", "read"), ("arm_zero_control", "zero")):
+            path = os.path.join(self.build_dir, exe)
+            with open(path, "w") as f:
+                f.write(f'#!/bin/sh\nexec "{sys.executable}" "{me}" {role} "{sock}" "$@"\n')
+            os.chmod(path, 0o755)
+        self._proc = subprocess.Popen([sys.executable, me, "serve", sock, cfg_path])
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(sock):
+            if time.monotonic() > deadline or self._proc.poll() is not None:
+                self.close()
+                raise RuntimeError("Arm-Simulator ist nicht gestartet.")
+            time.sleep(0.01)
+        self._ctl = _connect(sock, "ctl").makefile("rw", buffering=1)
+        if self.set_env:
+            os.environ["D1_SDK_BUILD"] = self.build_dir
+        return self
+
+    def _request(self, **req):
+        self._ctl.write(json.dumps(req) + "\n")
+        self._ctl.flush()
+        return json.loads(self._ctl.readline())
+
+    def reset(self, q=None):
+        """Arm sofort auf q (Default: cfg["initial"]) setzen, offene Kommandos verwerfen."""
+        return self._request(op="reset", q=None if q is None else [float(v) for v in q])
+
+    def stats(self):
+        """Zähler der empfangenen Kommandos sowie aktuelle Ist-/Sollwinkel."""
+        return self._request(op="stats")
+
+    def sport_client(self):
+        return SimSportClient(**self.cfg)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        if self._ctl is not None:
+            try:
+                self._request(op="stop")
+            except Exception:
+                pass
+            self._ctl = None
+        if self._proc is not None:
+            try:
+                self._proc.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self._proc.terminate()
+            self._proc = None
+        if self.build_dir is not None:
+            shutil.rmtree(self.build_dir, ignore_errors=True)
+            self.build_dir = None
+
+if __name__ == "__main__":
+    role, sock_path = sys.argv[1], sys.argv[2]
+    if role == "serve":
+        with open(sys.argv[3]) as f:
+            _serve(sock_path, json.load(f))
+    elif role == "pub":
+        _stub_pub(sock_path, sys.argv[3:])
+    elif role == "read":
+        _stub_read(sock_path)
+    elif role == "zero":
+        s = _connect(sock_path, "pub")
+        s.sendall(b'{"seq":4,"address":1,"funcode":7}\n')
+        s.close()
@@ -0,0 +1,83 @@
+# startup_profile.py
+# Startzeit-Messung der Skripte: Prozessstart -> Importe -> Kette geladen -> erstes Kommando.
+# Aktiv nur mit "--profile-startup" auf der Kommandozeile (sonst kostet jede Marke einen if-Test).
+# Nullpunkt ist der echte Prozessstart aus /proc/self/stat (inkl. Interpreter-Start),
+# ohne /proc der Import dieses Moduls.
+#
+# Benutzung (Beispiel):
+#   from d1_servo_arm import startup_profile as sp    # möglichst als erster Import
+#   import numpy as np
+#   sp.mark("imports")
+#   ...
+#   ac.torque_lock(60000)     # arm_control meldet das erste Kommando selbst und druckt den Bericht
+#
+#   python3 "Robot movements/Efficiency Measurement/sequence_1_arm_only.py" --profile-startup
+
+import os
+import sys
+import time
+import atexit
+import threading
+
+# ein Zustand pro Prozess – egal ob als "startup_profile" (Bibliothek) oder
+# "d1_servo_arm.startup_profile" (Skripte) importiert
+for _name in ("startup_profile", "d1_servo_arm.startup_profile"):
+    sys.modules.setdefault(_name, sys.modules[__name__])
+
+ENABLED = "--profile-startup" in sys.argv
+
+def _process_start():
+    """Prozessstart in time.monotonic()-Zeit (Linux), sonst None."""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_s = int(fields[19]) / os.sysconf("SC_CLK_TCK")        # Feld 22: starttime seit Boot
+        return time.monotonic() - (time.clock_gettime(time.CLOCK_BOOTTIME) - start_s)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+T0 = (_process_start() if ENABLED else None) or time.monotonic()
+_marks = []                     # (label, t seit T0, Thread-Name)
+_lock = threading.Lock()
+_first_done = False
+_reported = 0                   # Anzahl Marken im letzten gedruckten Bericht
+
+def mark(label):
+    """Zeitmarke (Sekunden seit Prozessstart) setzen – nur mit --profile-startup."""
+    if ENABLED:
+        with _lock:
+            _marks.append((label, time.monotonic() - T0, threading.current_thread().name))
+
+def first_command(label="erstes Kommando"):
+    """Von arm_control beim ersten Pipe-Write gerufen: Marke setzen und Bericht drucken (einmal)."""
+    global _first_done
+    if not ENABLED or _first_done:
+        return
+    _first_done = True
+    mark(label)
+    _print_report()
+
+def _print_report():
+    global _reported
+    _reported = len(_marks)
+    print(report(), flush=True)
+
+def _report_at_exit():
+    if ENABLED and len(_marks) > _reported:     # Marken nach dem ersten Kommando (z. B. "IK gelöst")
+        _print_report()
+
+def marks():
+    with _lock:
+        return list(_marks)
+
+def report():
+    lines = ["Startprofil (s seit Prozessstart):"]
+    prev = 0.0
+    for label, t, thread in sorted(marks(), key=lambda m: m[1]):
+        where = "" if thread == "MainThread" else f"  [{thread}]"
+        lines.append(f"  {t:7.3f}  (+{t - prev:6.3f})  {label}{where}")
+        prev = t
+    return "\n".join(lines)
+
+mark("Interpreter bereit")
+atexit.register(_report_at_exit)
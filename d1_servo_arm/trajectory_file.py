@@ -0,0 +1,155 @@
+# trajectory_file.py
+# Kompaktes Binärformat für aufgezeichnete Trajektorien (.d1traj) + Konverter von/nach JSON.
+#
+# Layout (little endian):
+#   [0:8]    Magic b"D1TRAJ01"
+#   [8:12]   uint32 – Länge des JSON-Headers in Bytes
+#   [12:..]  JSON-Header (utf-8, mit Leerzeichen auf 64-Byte-Grenze aufgefüllt):
+#              {"n", "dofs", "hz", "units", "limits", "t_offset", "q_offset"}
+#   t_offset float64[n]        Zeitstempel (s, ab Aufnahmebeginn)
+#   q_offset float32[n, dofs]  Gelenkwinkel (Zeilen = Samples)
+#
+# load() bildet beide Spalten per np.memmap direkt auf die Datei ab (keine Kopie),
+# auch Aufnahmen über viele Minuten kosten beim Öffnen also praktisch nichts.
+#
+# Benutzung (Beispiel):
+#   import trajectory_file as tf
+#   tf.json_to_binary("demo.json")              # -> demo.d1traj
+#   meta, ts, qs = tf.load_any("demo.d1traj")   # oder "demo.json"
+
+import json
+import struct
+import pathlib
+import numpy as np
+
+MAGIC = b"D1TRAJ01"
+SUFFIX = ".d1traj"
+_ALIGN = 64
+
+# Positionsgrenzen aus urdf/d1.urdf (joint_0..joint_5); Greifer ohne Angabe
+D1_JOINT_LIMITS_RAD = [
+    [-2.356, 2.356],
+    [-1.57, 1.57],
+    [-1.57, 1.57],
+    [-2.356, 2.356],
+    [-1.57, 1.57],
+    [-2.356, 2.356],
+    None,
+]
+# gerundet in Grad (so in den Headern bestehender .d1traj-Dateien)
+D1_JOINT_LIMITS_DEG = [
+    [-135.0, 135.0],
+    [-90.0, 90.0],
+    [-90.0, 90.0],
+    [-135.0, 135.0],
+    [-90.0, 90.0],
+    [-135.0, 135.0],
+    None,
+]
+
+def is_binary(path):
+    """True, wenn die Datei mit dem .d1traj-Magic beginnt."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def default_limits(units="deg", dofs=7):
+    """D1-Positionsgrenzen passend zu units ("deg" | "rad"); None, wenn dofs nicht zum D1 passt."""
+    if dofs != len(D1_JOINT_LIMITS_DEG):
+        return None
+    return D1_JOINT_LIMITS_RAD if units == "rad" else D1_JOINT_LIMITS_DEG
+
+def save(path, ts, qs, hz=None, units="deg", limits=None):
+    """
+    Schreibt Zeitstempel (n,) und Gelenkwinkel (n, dofs) als .d1traj.
+    limits: Liste [lo, hi] bzw. None pro Gelenk (Default: default_limits(units) bei 7 Gelenken).
+    """
+    ts = np.ascontiguousarray(ts, dtype="<f8")
+    qs = np.ascontiguousarray(qs, dtype="<f4")
+    if qs.ndim != 2 or qs.shape[0] != ts.shape[0]:
+        raise ValueError(f"Form passt nicht: ts {ts.shape}, qs {qs.shape} (erwartet (n,), (n, dofs)).")
+    n, dofs = qs.shape
+    if limits is None:
+        limits = default_limits(units, dofs)
+
+    header = {"n": int(n), "dofs": int(dofs), "hz": None if hz is None else float(hz),
+              "units": str(units), "limits": limits}
+    # Offsets hängen von der Header-Länge ab -> so lange anpassen, bis sie stabil sind
+    t_offset = 0
+    while True:
+        header["t_offset"] = t_offset
+        header["q_offset"] = t_offset + ts.nbytes
+        raw = json.dumps(header).encode("utf-8")
+        need = -(-(len(MAGIC) + 4 + len(raw)) // _ALIGN) * _ALIGN
+        if need == t_offset:
+            break
+        t_offset = need
+    raw = raw.ljust(t_offset - len(MAGIC) - 4, b" ")
+
+    path = pathlib.Path(path)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(raw)))
+        f.write(raw)
+        f.write(ts.tobytes())
+        f.write(qs.tobytes())
+    return path
+
+def read_header(path):
+    """Nur den JSON-Header einer .d1traj-Datei lesen."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Keine .d1traj-Datei: {path}")
+        (size,) = struct.unpack("<I", f.read(4))
+        return json.loads(f.read(size).decode("utf-8"))
+
+def load(path):
+    """
+    .d1traj öffnen -> (meta, ts, qs). ts/qs sind schreibgeschützte np.memmap-Sichten
+    auf die Datei (float64 (n,), float32 (n, dofs)).
+    """
+    meta = read_header(path)
+    n, dofs = meta["n"], meta["dofs"]
+    if n == 0:
+        return meta, np.zeros(0, dtype="<f8"), np.zeros((0, dofs), dtype="<f4")
+    ts = np.memmap(path, dtype="<f8", mode="r", offset=meta["t_offset"], shape=(n,))
+    qs = np.memmap(path, dtype="<f4", mode="r", offset=meta["q_offset"], shape=(n, dofs))
+    return meta, ts, qs
+
+def load_json(path):
+    """Bisheriges JSON-Format ({"hz", "samples": [{"t", "q"}, ...]}) -> (meta, ts, qs)."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    samples = data.get("samples", [])
+    if not samples:
+        # leere Aufnahme -> leere Arrays; die Player melden dann "Aufnahme zu kurz."
+        ts, qs = np.zeros(0, dtype=np.float64), np.zeros((0, len(D1_JOINT_LIMITS_DEG)), dtype=np.float64)
+    else:
+        ts = np.array([s["t"] for s in samples], dtype=np.float64)
+        qs = np.array([s["q"] for s in samples], dtype=np.float64).reshape(len(samples), -1)
+    meta = {"n": len(samples), "dofs": qs.shape[1], "hz": data.get("hz"),
+            "units": data.get("units", "deg"), "limits": data.get("limits")}
+    return meta, ts, qs
+
+def load_any(path):
+    """JSON oder .d1traj laden (Erkennung am Dateiinhalt, nicht an der Endung)."""
+    return load(path) if is_binary(path) else load_json(path)
+
+def save_json(path, ts, qs, hz=None):
+    """Arrays im bisherigen JSON-Format speichern (kompatibel zu älteren Skripten)."""
+    samples = [{"t": round(float(t), 4), "q": [round(float(x), 4) for x in q]}
+               for t, q in zip(ts, qs)]
+    with open(path, "w") as f:
+        json.dump({"hz": hz, "samples": samples}, f, indent=2)
+    return pathlib.Path(path)
+
+def json_to_binary(src, dst=None):
+    """JSON-Aufnahme nach .d1traj konvertieren (Default: gleicher Name, Endung .d1traj)."""
+    meta, ts, qs = load_json(src)
+    dst = pathlib.Path(dst) if dst else pathlib.Path(src).with_suffix(SUFFIX)
+    return save(dst, ts, qs, hz=meta["hz"], units=meta["units"], limits=meta["limits"])
+
+def binary_to_json(src, dst=None):
+    """.d1traj zurück ins JSON-Format konvertieren (Default: gleicher Name, Endung .json)."""
+    meta, ts, qs = load(src)
+    dst = pathlib.Path(dst) if dst else pathlib.Path(src).with_suffix(".json")
+    return save_json(dst, ts, qs, hz=meta["hz"])
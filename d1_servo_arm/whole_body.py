@@ -0,0 +1,165 @@
+# whole_body.py
+# Koordinierte Arm+Basis-Planung: Greifziel im Welt-Frame, Go2 fährt nur so weit wie nötig,
+# der Arm greift schon während der Fahrt zum Ziel vor.
+#
+# Welt-Frame = Arm-Frame zu Beginn (x vorne, y links, z oben), die Basis verschiebt sich nur in x/y.
+#   1) Basis-Strecke: kleinste Verschiebung in Zielrichtung, nach der das Ziel laut URDF-Reichweite
+#      (Schulter = joint_1, Summe der folgenden Gliedlängen) und IK (Orientierung wie in den
+#      Skripten) erreichbar ist – weniger Fahrstrecke = kürzere Gesamtzeit.
+#   2) Basis-Profil: Trapez (v/a-Grenzen pro Achse wie speed_x/speed_y der Skripte), daraus die
+#      vorhergesagte Verschiebung inkl. Verzögerung 1. Ordnung des Go2-Reglers.
+#   3) Arm: IK wird mit ik_hz fortlaufend gegen die vorhergesagte Basisposition neu gelöst
+#      (Ziel außerhalb der Reichweite -> auf die Reichweiten-Kugel geklemmt, der Arm greift vor);
+#      Ruckig folgt diesen Zielen jerk-limitiert im control_hz-Raster.
+#
+# Benutzung (Beispiel):
+#   import whole_body as wb
+#   plan = wb.plan_reach([0.9, 0.1, -0.02], gripper=20)    # ab den Ist-Winkeln (ac.read_angles_once)
+#   print(plan["info"])
+#   asyncio.run(wb.execute(plan, arm, go2))       # AsyncArm / AsyncGo2 aus async_control
+
+import sys
+import asyncio
+import pathlib
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))  # damit "import kinematics" lokal klappt
+import kinematics as kin
+import arm_control as ac
+import arm_trajectory as at
+from go2_motion import trapezoid, GO2_VMAX, GO2_AMAX
+
+# Go2-Grenzen (x, y) aus go2_motion
+BASE_VMAX = GO2_VMAX[:2]     # m/s
+BASE_AMAX = GO2_AMAX[:2]     # m/s^2
+BASE_TAU = 0.15               # s – Verzögerung des Go2-Geschwindigkeitsreglers (1. Ordnung)
+
+def reach_model(urdf_path=kin.URDF_PATH):
+    """Schulterpunkt (Ursprung von joint_1 in Nullstellung) und maximale Reichweite ab Schulter (m)."""
+    joints = kin._urdf_joints(urdf_path)
+    T = np.eye(4)
+    for _, _, origin, _ in joints[:2]:
+        T = T @ origin
+    reach = float(sum(np.linalg.norm(origin[:3, 3]) for _, _, origin, _ in joints[2:]))
+    return T[:3, 3].copy(), reach
+
+def _ik_ok(ik, fk, p, tol):
+    q = ik.solve(p)
+    return q, float(np.linalg.norm(fk(q)[:3, 3] - p)) <= tol
+
+def plan_reach(target_world, gripper=20, start=None, control_hz=100, ik_hz=10, ik=None,
+               base_vmax=BASE_VMAX, base_amax=BASE_AMAX, base_tau=BASE_TAU, reach_margin=0.9,
+               step=0.02, ik_tol=2e-3, vmax=None, amax=None, jmax=None):
+    """
+    Plan für "Basis fahren + Arm greifen" zu target_world (m, Welt-Frame).
+    start: 7 Servo-Winkel (Grad), von denen der Arm losfährt (Default: Ist-Winkel über
+    ac.read_angles_once(); RuntimeError, wenn kein Feedback kommt).
+    Rückgabe: dict mit
+      ts (m,), q (m, 7) Arm-Setpoints (Grad), base_v (m, 3) Go2-Kommandos (vx, vy, vyaw) im selben Raster,
+      info: base_displacement, base_time, duration, final_arm_target, reach
+    """
+    if not at._RUCKIG_OK:
+        raise RuntimeError("Ruckig ist nicht installiert. Bitte `pip install ruckig` ausführen.")
+    if start is None:
+        start = ac.read_angles_once()
+        if start is None:
+            raise RuntimeError("Keine aktuellen Winkel lesbar (get_arm_joint_angle läuft?) – start übergeben.")
+    target = np.asarray(target_world, dtype=float)
+    ik = ik if ik is not None else kin.IKSolver()
+    fk = kin.ForwardKinematics()
+    shoulder, reach = reach_model()
+    r_eff = reach * float(reach_margin)
+
+    # 1) kleinste Basis-Verschiebung in Zielrichtung (horizontal), nach der die IK aufgeht
+    horiz = target[:2] - shoulder[:2]
+    dist = float(np.linalg.norm(horiz))
+    u = horiz / dist if dist > 1e-9 else np.zeros(2)
+    dz = target[2] - shoulder[2]
+    s = max(0.0, dist - np.sqrt(max(0.0, r_eff ** 2 - dz ** 2)))
+    while True:
+        p_final = target - np.append(s * u, 0.0)
+        q_final, ok = _ik_ok(ik, fk, p_final, ik_tol)
+        if ok:
+            break
+        s += step
+        if s > dist:
+            raise ValueError(f"Ziel {target.tolist()} ist auch mit Basisfahrt nicht erreichbar.")
+    disp = s * u
+
+    # 2) Basis-Profil (Pfadlänge s, Grenzen aus den Achsgrenzen projiziert)
+    dt = 1.0 / float(control_hz)
+    if s > 0:
+        scale_v = 1.0 / max(abs(u[0]) / base_vmax[0], abs(u[1]) / base_vmax[1])
+        scale_a = 1.0 / max(abs(u[0]) / base_amax[0], abs(u[1]) / base_amax[1])
+        v_path = trapezoid(s, scale_v, scale_a, dt)
+    else:
+        v_path = np.zeros(0)
+    n_base = len(v_path)
+    # Vorhersage: Go2 folgt dem Kommando mit Verzögerung tau (Integral bleibt gleich) -> Nachlauf
+    n_tail = int(np.ceil(5 * base_tau / dt)) if n_base else 0
+    v_cmd = np.concatenate([v_path, np.zeros(n_tail)])
+    v_act = np.zeros_like(v_cmd)
+    alpha = dt / (base_tau + dt)
+    for k in range(1, len(v_cmd)):
+        v_act[k] = v_act[k - 1] + alpha * (v_cmd[k - 1] - v_act[k - 1])
+    pos = np.cumsum(v_act) * dt
+    if len(pos):
+        pos *= s / max(pos[-1], 1e-12)
+
+    # 3) Arm: IK gegen die vorhergesagte Basisposition (ik_hz), Ruckig im control_hz-Raster
+    vmax, amax, jmax = at.joint_limits_deg(vmax, amax, jmax)
+    q0 = np.asarray(start, dtype=float)
+    otg = at.Ruckig(7, dt)
+    inp = at.InputParameter(7)
+    out = at.OutputParameter(7)
+    inp.current_position = q0.tolist()
+    inp.current_velocity = [0.0] * 7
+    inp.current_acceleration = [0.0] * 7
+    inp.max_velocity, inp.max_acceleration, inp.max_jerk = vmax, amax, jmax
+    inp.target_velocity = [0.0] * 7
+    inp.target_acceleration = [0.0] * 7
+    final_servo = kin.to_servo_angles(q_final, gripper)
+
+    ik_every = max(1, int(round(control_hz / float(ik_hz))))
+    table = [q0]
+    k = 0
+    while True:
+        if k < len(pos) and k % ik_every == 0:
+            p_arm = target - np.append(pos[k] * u, 0.0)
+            rel = p_arm - shoulder
+            norm = float(np.linalg.norm(rel))
+            if norm > r_eff:
+                p_arm = shoulder + rel * (r_eff / norm)      # vorgreifen bis zur Reichweiten-Kugel
+            inp.target_position = kin.to_servo_angles(ik.solve(p_arm), gripper)
+        elif k >= len(pos):
+            inp.target_position = final_servo
+        res = otg.update(inp, out)
+        table.append(np.asarray(out.new_position))
+        inp.current_position = out.new_position
+        inp.current_velocity = out.new_velocity
+        inp.current_acceleration = out.new_acceleration
+        k += 1
+        if k >= len(pos) and at._ruckig_finished(res):
+            break
+        if res not in (getattr(at.Result, 'Working', res), getattr(at.Result, 'Busy', res)):
+            raise RuntimeError(f"Ruckig-Fehler bei t={k * dt:.2f}s: {res}")
+
+    q_tab = np.asarray(table, dtype=np.float64)
+    ts = np.arange(len(q_tab)) * dt
+    base_v = np.zeros((len(q_tab), 3))
+    base_v[:n_base, :2] = v_path[:, None] * u[None, :]
+    info = {"base_displacement": disp.round(4).tolist(), "base_ticks": n_base, "base_time": round(n_base * dt, 3),
+            "duration": round(float(ts[-1]), 3), "final_arm_target": p_final.round(4).tolist(),
+            "reach": round(reach, 4)}
+    return {"ts": ts, "q": q_tab, "base_v": base_v, "control_hz": float(control_hz), "info": info}
+
+async def execute(plan, arm, go2, base_hz=20, mode=0, habr=0, ply=0):
+    """
+    Plan ausführen: Arm-Setpoints (AsyncArm.stream) und Go2-Kommandos (AsyncGo2.stream, base_hz)
+    gleichzeitig auf einer Event-Loop. Gibt (gesendete Arm-Setpoints, Dauer der Basisfahrt) zurück.
+    """
+    every = max(1, int(round(plan["control_hz"] / float(base_hz))))
+    base_v = plan["base_v"][:plan["info"]["base_ticks"]:every]
+    return await asyncio.gather(
+        arm.stream(plan["q"], hz=plan["control_hz"], mode=mode, habr=habr, ply=ply),
+        go2.stream(base_v, hz=base_hz) if len(base_v) else asyncio.sleep(0, 0.0))